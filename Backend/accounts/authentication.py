@@ -0,0 +1,51 @@
+# accounts/authentication.py
+from django.core.exceptions import ValidationError
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from doctor.models import DoctorProfile
+from .models import CustomUser
+
+
+def claims_user(user_id, claims):
+    """A CustomUser built from token claims, without a query.
+
+    id and role are set and user.doctor_profile is primed from the
+    doctor_profile_id claim; every other field is deferred and loaded from
+    the database if something reads it.
+    """
+    db = router.db_for_read(CustomUser)
+    user = CustomUser.from_db(db, ['id', 'role'], [user_id, claims['role']])
+    profile_id = claims.get('doctor_profile_id')
+    if profile_id is not None:
+        profile = DoctorProfile.from_db(db, ['id', 'user_id'], [profile_id, user_id])
+        CustomUser.doctor_profile.related.set_cached_value(user, profile)
+        DoctorProfile.user.field.set_cached_value(profile, user)
+    elif claims['role'] != 'doctor':
+        # Only doctors have profiles; a doctor without one in the claims may have created it since, so
+        # user.doctor_profile is left to the normal lookup
+        CustomUser.doctor_profile.related.set_cached_value(user, None)
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication without the per-request user lookup, for read endpoints.
+
+    request.user comes from the token's claims (see accounts/tokens.py), so
+    authenticating costs no query. The account's is_active state is checked
+    when the token is refreshed instead, i.e. at least every
+    ACCESS_TOKEN_LIFETIME. Tokens issued before the claims existed are
+    authenticated the usual way.
+    """
+
+    def get_user(self, validated_token):
+        if "role" not in validated_token:
+            return super().get_user(validated_token)
+        try:
+            user_id = CustomUser._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, ValidationError):
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        return claims_user(user_id, validated_token)
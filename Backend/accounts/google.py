@@ -0,0 +1,201 @@
+# accounts/google.py
+"""Google ID token verification with a process-wide certificate cache.
+
+google-auth fetches Google's signing certificates on every verification
+through whatever transport it is handed. The transport here answers those
+fetches from a cache kept for the response's Cache-Control max-age and
+refreshed in the background shortly before it expires; everything else
+goes over one pooled HTTP session. Verification itself (signature,
+audience, expiry, issuer) is left to google-auth.
+
+A token signed with a key the cached copy lacks (Google rotated its keys
+before the copy expired) refetches the certificates once and is verified
+again; such refetches are spaced KEY_REFETCH_INTERVAL apart, so forged key
+ids cannot turn logins into fetches.
+
+settings.GOOGLE_CERTS_URL points the certificate fetches elsewhere, e.g. at
+the offline stub server of accounts/google_stub.py.
+"""
+import json
+import re
+import threading
+import time
+from functools import lru_cache
+
+import google.auth.transport
+import requests
+from django.conf import settings
+from google.auth import exceptions, jwt
+from google.auth.transport.requests import Request as SessionRequest
+from google.oauth2 import id_token
+from requests.adapters import HTTPAdapter
+
+GOOGLE_CERTS_URLS = (
+    "https://www.googleapis.com/oauth2/v1/certs",
+    "https://www.googleapis.com/oauth2/v3/certs",
+)
+# Used when the certificate response carries no max-age
+DEFAULT_CERTS_MAX_AGE = 300
+# A background refresh starts this many seconds before the cached certificates expire
+CERTS_REFRESH_MARGIN = 60
+# Least time between two refetches for an unknown key id
+KEY_REFETCH_INTERVAL = 60
+HTTP_TIMEOUT = 10
+HTTP_POOL_SIZE = 10
+
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+@lru_cache(maxsize=None)
+def get_http_session():
+    """One keep-alive session (and connection pool) for the whole process."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class CachedResponse(google.auth.transport.Response):
+    def __init__(self, status, headers, data):
+        self._status, self._headers, self._data = status, headers, data
+
+    @property
+    def status(self):
+        return self._status
+
+    @property
+    def headers(self):
+        return self._headers
+
+    @property
+    def data(self):
+        return self._data
+
+
+def freshness(headers):
+    """Seconds a response stays fresh: Cache-Control max-age minus Age."""
+    match = MAX_AGE_RE.search(headers.get("Cache-Control", ""))
+    max_age = int(match.group(1)) if match else DEFAULT_CERTS_MAX_AGE
+    try:
+        age = int(headers.get("Age", 0))
+    except ValueError:
+        age = 0
+    return max(max_age - age, 0)
+
+
+class CertCache:
+    """Certificate responses by URL, each kept until its max-age runs out.
+
+    A read inside the last CERTS_REFRESH_MARGIN seconds starts one background
+    refresh and still returns the cached copy, so steady traffic never waits
+    on Google; only a cold or expired entry is fetched in line.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.fetches = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._refreshing = set()
+        self._fetched_at = {}
+
+    def fetch(self, url):
+        try:
+            response = get_http_session().get(url, timeout=HTTP_TIMEOUT)
+        except requests.RequestException as error:
+            raise exceptions.TransportError(error) from error
+        self.fetches += 1
+        self._fetched_at[url] = self.clock()
+        cached = CachedResponse(response.status_code, dict(response.headers), response.content)
+        if response.status_code == 200:
+            with self._lock:
+                self._entries[url] = (cached, self.clock() + freshness(response.headers))
+        return cached
+
+    def fresh(self, url):
+        entry = self._entries.get(url)
+        return entry if entry is not None and self.clock() < entry[1] else None
+
+    def get(self, url):
+        entry = self.fresh(url)
+        if entry is None:
+            # Concurrent misses wait for one fetch instead of all going to Google
+            with self._fetch_lock:
+                entry = self.fresh(url)
+                if entry is None:
+                    return self.fetch(url)
+        if self.clock() >= entry[1] - CERTS_REFRESH_MARGIN:
+            self.refresh_in_background(url)
+        return entry[0]
+
+    def refresh_in_background(self, url):
+        with self._lock:
+            if url in self._refreshing:
+                return
+            self._refreshing.add(url)
+
+        def refresh():
+            try:
+                self.fetch(url)
+            except exceptions.TransportError:
+                pass  # The cached copy stays until it expires; the next read fetches in line
+            finally:
+                with self._lock:
+                    self._refreshing.discard(url)
+
+        threading.Thread(target=refresh, name="google-certs-refresh", daemon=True).start()
+
+    def refetch_for_key(self, url, key_id):
+        """Fetch url again if its cached certificates lack key_id; True if they were refetched."""
+        entry = self.fresh(url)
+        if entry is not None and key_id in json.loads(entry[0].data):
+            return False
+        with self._fetch_lock:
+            fetched_at = self._fetched_at.get(url)
+            if fetched_at is not None and self.clock() - fetched_at < KEY_REFETCH_INTERVAL:
+                return False
+            return self.fetch(url).status == 200
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def certs_url(url):
+    return getattr(settings, "GOOGLE_CERTS_URL", None) or url
+
+
+class CachingRequest(google.auth.transport.Request):
+    """google-auth transport: certificate GETs come from the cache, the rest use the pooled session."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.session_request = SessionRequest(session=get_http_session())
+
+    def __call__(self, url, method="GET", body=None, headers=None, timeout=None, **kwargs):
+        if method == "GET" and url in GOOGLE_CERTS_URLS:
+            return self.cache.get(certs_url(url))
+        return self.session_request(url, method=method, body=body, headers=headers, timeout=timeout, **kwargs)
+
+
+@lru_cache(maxsize=None)
+def get_cert_cache():
+    return CertCache()
+
+
+@lru_cache(maxsize=None)
+def get_google_request():
+    return CachingRequest(get_cert_cache())
+
+
+def verify_google_token(token, client_id):
+    """id_token.verify_oauth2_token() against the cached certificates; raises ValueError for bad tokens."""
+    try:
+        return id_token.verify_oauth2_token(token, get_google_request(), client_id)
+    except ValueError:
+        key_id = jwt.decode_header(token).get("kid")
+        if not get_cert_cache().refetch_for_key(certs_url(GOOGLE_CERTS_URLS[0]), key_id):
+            raise
+    return id_token.verify_oauth2_token(token, get_google_request(), client_id)
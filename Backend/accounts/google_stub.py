@@ -0,0 +1,80 @@
+# accounts/google_stub.py
+"""Offline stand-in for Google's certificate endpoint and ID tokens, for tests and bench_google_login."""
+import datetime
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt, jwt
+
+STUB_KEY_ID = "stub-key"
+STUB_CLIENT_ID = "stub-client.apps.googleusercontent.com"
+
+
+class GoogleStub:
+    """A signing key, its certificate served over HTTP, and ID tokens signed with it."""
+
+    def __init__(self, max_age):
+        self.max_age = max_age
+        self.hits = 0
+        self.rotate(STUB_KEY_ID)
+
+    def rotate(self, key_id):
+        """Sign with a new key from now on and serve only its certificate, as Google does on rotation."""
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "stub.googleapis.com")])
+        now = datetime.datetime.now(datetime.timezone.utc)
+        certificate = (
+            x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1)).not_valid_after(now + datetime.timedelta(days=1))
+            .sign(key, hashes.SHA256())
+        )
+        self.certs = json.dumps(
+            {key_id: certificate.public_bytes(serialization.Encoding.PEM).decode()}
+        ).encode()
+        private_pem = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        self.signer = crypt.RSASigner.from_string(private_pem, key_id=key_id)
+
+    def token(self, email, audience=STUB_CLIENT_ID, issuer="https://accounts.google.com"):
+        now = int(time.time())
+        return jwt.encode(self.signer, {
+            "iss": issuer, "aud": audience, "sub": email, "email": email, "email_verified": True,
+            "given_name": "Stub", "family_name": "User", "iat": now, "exp": now + 3600,
+        }).decode()
+
+
+@contextmanager
+def google_stub(max_age=3600):
+    """Serve a GoogleStub's certificates on 127.0.0.1; yields (stub, certificate URL)."""
+    stub = GoogleStub(max_age)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            stub.hits += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Cache-Control", f"public, max-age={stub.max_age}, must-revalidate, no-transform")
+            self.send_header("Content-Length", str(len(stub.certs)))
+            self.end_headers()
+            self.wfile.write(stub.certs)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield stub, f"http://127.0.0.1:{server.server_port}/oauth2/v1/certs"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,89 @@
+import os
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from google.auth.transport import requests as google_requests
+from google.oauth2 import id_token
+from rest_framework.test import APIRequestFactory
+
+from accounts.google import CERTS_REFRESH_MARGIN, CachingRequest, CertCache, get_cert_cache
+from accounts.google_stub import STUB_CLIENT_ID, google_stub
+from accounts.views import LoginGoogleAuthView
+from main.bench import make_user, rolled_back
+
+
+class Command(BaseCommand):
+    help = (
+        "Google login against an offline stub certificate server: latency and certificate fetches "
+        "with the shared cache versus a fresh transport per login, plus rejection and refresh checks"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=200, help="Logins per measurement")
+
+    def handle(self, *args, **kwargs):
+        logins = kwargs["logins"]
+        factory = APIRequestFactory(HTTP_HOST="localhost")
+        view = LoginGoogleAuthView.as_view()
+        failures = []
+
+        with google_stub() as (stub, certs_url), rolled_back(), \
+                override_settings(GOOGLE_CERTS_URL=certs_url), \
+                mock.patch.dict(os.environ, {"GOOGLE_CLIENT_ID": STUB_CLIENT_ID}):
+            user = make_user("bench-google@example.com")
+            token = stub.token(user.email)
+
+            # Before: a new transport (and connection) per login, certificates fetched every time
+            started = time.perf_counter()
+            for _ in range(logins):
+                id_token.verify_token(token, google_requests.Request(), STUB_CLIENT_ID, certs_url=certs_url)
+            uncached_ms = (time.perf_counter() - started) * 1000 / logins
+            uncached_hits, stub.hits = stub.hits, 0
+
+            # After: the whole view, certificates from the process-wide cache
+            get_cert_cache().clear()
+            started = time.perf_counter()
+            for _ in range(logins):
+                response = view(factory.post("/", {"credential": token}, format="json"))
+                if response.status_code != 200:
+                    failures.append(f"login returned {response.status_code}: {response.data}")
+                    break
+            cached_ms = (time.perf_counter() - started) * 1000 / logins
+            cached_hits = stub.hits
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{logins} Google logins against the stub"))
+            self.stdout.write(f"  fresh transport per login: {uncached_ms:7.2f} ms/login  certificate fetches: {uncached_hits}")
+            self.stdout.write(f"  cached, through the view:  {cached_ms:7.2f} ms/login  certificate fetches: {cached_hits}")
+            if cached_hits != 1:
+                failures.append(f"expected 1 certificate fetch with the cache, got {cached_hits}")
+
+            # Tokens the view must refuse
+            rejected = {
+                "wrong audience": stub.token(user.email, audience="someone-else"),
+                "forged signature": token[:-4] + ("AAAA" if not token.endswith("AAAA") else "BBBB"),
+            }
+            for label, bad_token in rejected.items():
+                response = view(factory.post("/", {"credential": bad_token}, format="json"))
+                self.stdout.write(f"  {label}: {response.status_code}")
+                if response.status_code != 400:
+                    failures.append(f"{label} returned {response.status_code}")
+
+            # Refresh ahead: a read inside the margin returns at once and refreshes in the background
+            now = [0.0]
+            cache = CertCache(clock=lambda: now[0])
+            request = CachingRequest(cache)
+            request("https://www.googleapis.com/oauth2/v1/certs")
+            now[0] = stub.max_age - CERTS_REFRESH_MARGIN / 2
+            request("https://www.googleapis.com/oauth2/v1/certs")
+            for _ in range(100):
+                if cache.fetches == 2:
+                    break
+                time.sleep(0.01)
+            self.stdout.write(f"  refresh ahead of expiry: {'background fetch done' if cache.fetches == 2 else 'NO refresh'}")
+            if cache.fetches != 2:
+                failures.append("no background refresh inside the margin")
+
+        if failures:
+            raise CommandError("; ".join(failures))
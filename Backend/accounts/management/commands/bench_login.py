@@ -0,0 +1,75 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.test import AsyncRequestFactory
+from django.test.utils import override_settings
+
+from accounts.passwords import verify_password
+from accounts.views import LoginView
+from main.bench import make_user, rolled_back
+
+PASSWORD = "Bench-login-password-1"
+
+
+class Command(BaseCommand):
+    help = "Logins per second (per core and over all cores) for each hasher in PASSWORD_HASHER_CHOICES"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=40, help="Logins per measurement")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Hash threads")
+
+    def handle(self, *args, **kwargs):
+        logins, workers = kwargs["logins"], kwargs["workers"]
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{logins} logins per measurement, {workers} hash thread(s)"))
+
+        for name, path in settings.PASSWORD_HASHER_CHOICES.items():
+            with override_settings(PASSWORD_HASHERS=[path]):
+                try:
+                    encoded = make_password(PASSWORD)
+                except ValueError as error:
+                    # The hasher's library is not installed
+                    self.stdout.write(f"  {name:7} skipped: {error}")
+                    continue
+
+                # Hash check alone, one thread: the cost of a login on one core
+                started = time.perf_counter()
+                for _ in range(logins):
+                    verify_password(PASSWORD, encoded)
+                per_core = logins / (time.perf_counter() - started)
+
+                # Hash checks spread over the worker threads
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    started = time.perf_counter()
+                    list(pool.map(verify_password, [PASSWORD] * logins, [encoded] * logins))
+                    pooled = logins / (time.perf_counter() - started)
+
+                # Whole async LoginView (lookup, hash check on the pool, tokens), all requests in flight at once
+                with rolled_back():
+                    user = make_user(f"bench-login-{name}@example.com")
+                    user.set_password(PASSWORD)
+                    user.save(update_fields=['password'])
+                    view = LoginView.as_view()
+                    factory = AsyncRequestFactory()
+                    body = json.dumps({"email": user.email, "password": PASSWORD})
+
+                    async def login_burst():
+                        responses = await asyncio.gather(*(
+                            view(factory.post("/", body, content_type="application/json")) for _ in range(logins)
+                        ))
+                        return sum(response.status_code == 200 for response in responses)
+
+                    started = time.perf_counter()
+                    succeeded = async_to_sync(login_burst)()
+                    end_to_end = logins / (time.perf_counter() - started)
+
+            self.stdout.write(
+                f"  {name:7} {per_core:8.1f} logins/s per core  {pooled:8.1f} logins/s on {workers} thread(s)  "
+                f"{end_to_end:8.1f} logins/s through LoginView ({succeeded}/{logins} ok)  [{encoded.split('$')[0]}]"
+            )
@@ -0,0 +1,65 @@
+# accounts/passwords.py
+"""Password checks off the request thread, for the async login view.
+
+Verifying a hash is pure CPU (hashlib, bcrypt and argon2 release the GIL
+while they work), so it runs on a bounded pool of LOGIN_HASH_WORKERS
+threads: a login spike queues there instead of holding a server thread per
+login. Only the hasher runs there: PooledModelBackend is a ModelBackend
+whose async path hands it the hash, so aauthenticate() keeps every other
+backend, the user_login_failed signal and user_can_authenticate.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+
+
+@lru_cache(maxsize=None)
+def get_hash_executor():
+    workers = getattr(settings, 'LOGIN_HASH_WORKERS', None) or os.cpu_count() or 1
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+
+
+def verify_password(password, encoded):
+    """(matches, new hash or None) for a stored hash; no database access, so safe on any thread.
+
+    The new hash is set when the stored one was made by another hasher than
+    settings.PASSWORD_HASHERS[0] or with an outdated work factor.
+    """
+    if encoded is None:
+        # Unknown email: do the work of a real check so accounts cannot be probed by timing
+        make_password(password)
+        return False, None
+    upgraded = []
+    matches = check_password(password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+    return matches, upgraded[0] if upgraded else None
+
+
+class PooledModelBackend(ModelBackend):
+    """ModelBackend checking hashes on the LOGIN_HASH_WORKERS pool when called through aauthenticate()."""
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        User = get_user_model()
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await User._default_manager.aget_by_natural_key(username)
+        except User.DoesNotExist:
+            user = None
+        matches, upgraded = await asyncio.get_running_loop().run_in_executor(
+            get_hash_executor(), verify_password, password, user.password if user else None
+        )
+        if not matches or not self.user_can_authenticate(user):
+            return None
+        # Stored hashes are upgraded to the preferred hasher on a successful login
+        if upgraded:
+            user.password = upgraded
+            await user.asave(update_fields=['password'])
+        return user
@@ -1,7 +1,10 @@
 # serializers.py
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from .models import CustomUser
-from django.contrib.auth import authenticate
+from .tokens import ProfileRefreshToken, profile_claims
 
 class RegisterSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,11 +19,25 @@ class RegisterSerializer(serializers.ModelSerializer):
         return CustomUser.objects.create_user(**validated_data)
 
 class LoginSerializer(serializers.Serializer):
+    # Input check only: LoginView verifies the password off the request thread (accounts/passwords.py)
     email = serializers.EmailField()
     password = serializers.CharField()
 
-    def validate(self, data):
-        user = authenticate(email=data['email'], password=data['password'])
-        if not user:
-            raise serializers.ValidationError("Invalid credentials")
-        return user
+
+class ProfileTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ProfileRefreshToken
+
+
+class ProfileTokenRefreshSerializer(TokenRefreshSerializer):
+    """Token refresh that re-reads the profile claims, so access tokens catch up with profile changes."""
+    token_class = ProfileRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user = CustomUser.objects.filter(pk=refresh.payload.get(api_settings.USER_ID_CLAIM)).first()
+        if user is None:
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+        refresh.payload.update(profile_claims(user))
+        # Same token (jti, exp) with current claims; the parent checks the account and issues the access token
+        return super().validate({**attrs, "refresh": str(refresh)})
+
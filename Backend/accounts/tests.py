@@ -1,3 +1,184 @@
-from django.test import TestCase
+import importlib
+import os
+import time
+from datetime import time as dtime
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.signals import user_login_failed
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework_simplejwt.views import TokenRefreshView
+
+import main.settings
+from doctor.models import DoctorProfile
+from .authentication import ClaimsJWTAuthentication
+from .google import CERTS_REFRESH_MARGIN, KEY_REFETCH_INTERVAL, CachingRequest, CertCache, verify_google_token
+from .google_stub import STUB_CLIENT_ID, GoogleStub, google_stub
+from .models import CustomUser
+from .tokens import ProfileRefreshToken
+from .views import LoginView
+
+
+class LoginTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email="login@example.com", password="secret-pass", first_name="Log", last_name="In", role="patient"
+        )
+
+    def login(self, password="secret-pass"):
+        request = RequestFactory().post(
+            "/", {"email": "login@example.com", "password": password}, content_type="application/json"
+        )
+        return async_to_sync(LoginView.as_view())(request)
+
+    def test_active_user_logs_in(self):
+        self.assertEqual(self.login().status_code, 200)
+
+    def test_inactive_user_is_refused(self):
+        CustomUser.objects.filter(id=self.user.id).update(is_active=False)
+
+        self.assertEqual(self.login().status_code, 400)
+
+    def test_failed_login_is_signalled(self):
+        failures = []
+
+        def handler(sender, credentials, **kwargs):
+            failures.append(credentials["email"])
+
+        user_login_failed.connect(handler)
+        self.addCleanup(user_login_failed.disconnect, handler)
+
+        self.assertEqual(self.login("wrong-pass").status_code, 400)
+        self.assertEqual(failures, ["login@example.com"])
+
+    def test_unknown_password_hasher_is_a_configuration_error(self):
+        self.addCleanup(importlib.reload, main.settings)
+        with mock.patch.dict(os.environ, {"PASSWORD_HASHER": "argon"}):
+            with self.assertRaisesMessage(ImproperlyConfigured, "argon2, bcrypt, pbkdf2"):
+                importlib.reload(main.settings)
+
+
+class ClaimsAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = CustomUser.objects.create_user(
+            email="claims-patient@example.com", password=None, first_name="Pat", last_name="Ient", role="patient"
+        )
+        cls.doctor = CustomUser.objects.create_user(
+            email="claims-doctor@example.com", password=None, first_name="Doc", last_name="Tor", role="doctor"
+        )
+        cls.profile = DoctorProfile.objects.create(
+            user=cls.doctor, phone_number="0000000000", specialization="cardiology", years_of_experience=5,
+            consultation_fee=500, qualifications="MBBS", clinic_name="Clinic", address="Main Street",
+            working_days=["monday"], start_time=dtime(9, 0), end_time=dtime(12, 0), appointment_duration=30, bio="",
+        )
+
+    def authenticate(self, access):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        return ClaimsJWTAuthentication().authenticate(request)
+
+    def refresh(self, refresh):
+        request = RequestFactory().post("/", {"refresh": str(refresh)}, content_type="application/json")
+        return TokenRefreshView.as_view()(request)
+
+    def test_authentication_costs_no_query(self):
+        for user in (self.patient, self.doctor):
+            with self.subTest(role=user.role):
+                access = ProfileRefreshToken.for_user(user).access_token
+
+                with self.assertNumQueries(0):
+                    authenticated, _ = self.authenticate(access)
+                    profile = getattr(authenticated, "doctor_profile", None)
+
+                self.assertEqual((authenticated.id, authenticated.role), (user.id, user.role))
+                self.assertEqual(profile and profile.id, self.profile.id if user == self.doctor else None)
+
+    def test_deactivated_user_is_rejected_at_refresh(self):
+        refresh = ProfileRefreshToken.for_user(self.patient)
+        access = refresh.access_token
+        CustomUser.objects.filter(id=self.patient.id).update(is_active=False)
+
+        # Issued access tokens keep working until they expire; the refresh is where it stops
+        self.assertEqual(self.authenticate(access)[0].id, self.patient.id)
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+    def test_refresh_reissues_the_claims(self):
+        refresh = ProfileRefreshToken.for_user(self.doctor)
+        self.profile.delete()
+
+        response = self.refresh(refresh)
+
+        self.assertEqual(response.status_code, 200)
+        _, token = self.authenticate(response.data["access"])
+        self.assertIsNone(token["doctor_profile_id"])
+        self.assertFalse(token["is_profile_completed"])
+
+
+class VerifyGoogleTokenTests(SimpleTestCase):
+    """verify_google_token against the offline certificate stub, on a clock the tests move."""
+
+    def setUp(self):
+        self.stub, certs_url = self.enterContext(google_stub(max_age=600))
+        self.now = 0.0
+        self.cache = CertCache(clock=lambda: self.now)
+        self.enterContext(override_settings(GOOGLE_CERTS_URL=certs_url))
+        self.enterContext(mock.patch("accounts.google.get_cert_cache", return_value=self.cache))
+        self.enterContext(mock.patch("accounts.google.get_google_request", return_value=CachingRequest(self.cache)))
+
+    def verify(self, token=None):
+        return verify_google_token(token or self.stub.token("patient@example.com"), STUB_CLIENT_ID)
+
+    def test_cached_certificates_are_not_fetched_again(self):
+        self.assertEqual(self.verify()["email"], "patient@example.com")
+        self.verify()
+
+        self.assertEqual(self.stub.hits, 1)
+
+    def test_certificates_expire_with_their_max_age(self):
+        self.verify()
+        self.now = self.stub.max_age - CERTS_REFRESH_MARGIN - 1
+        self.verify()
+        self.assertEqual(self.stub.hits, 1)
+
+        self.now = self.stub.max_age
+        self.verify()
+        self.assertEqual(self.stub.hits, 2)
+
+    def test_certificates_are_refreshed_in_the_background_before_expiry(self):
+        self.verify()
+        self.now = self.stub.max_age - CERTS_REFRESH_MARGIN / 2
+
+        self.verify()
+        for _ in range(200):
+            if self.cache.fetches == 2:
+                break
+            time.sleep(0.01)
+
+        self.assertEqual(self.stub.hits, 2)
+        # The refreshed copy is good for another max-age from now
+        self.now += self.stub.max_age - CERTS_REFRESH_MARGIN - 1
+        self.verify()
+        self.assertEqual(self.stub.hits, 2)
+
+    def test_unknown_key_id_refetches_the_certificates(self):
+        self.verify()
+        self.stub.rotate("rotated-key")
+        self.now = KEY_REFETCH_INTERVAL + 1
+
+        self.assertEqual(self.verify()["email"], "patient@example.com")
+        self.assertEqual(self.stub.hits, 2)
+
+    def test_unknown_key_id_refetches_at_most_once_per_interval(self):
+        self.verify()
+        self.now = KEY_REFETCH_INTERVAL + 1
+        # Signed with a key Google never served
+        forger = GoogleStub(max_age=600)
+        forger.rotate("forged-key")
+        forged = forger.token("patient@example.com")
+
+        for _ in range(3):
+            with self.assertRaises(ValueError):
+                self.verify(forged)
+
+        self.assertEqual(self.stub.hits, 2)
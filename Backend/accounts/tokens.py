@@ -0,0 +1,26 @@
+# accounts/tokens.py
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from doctor.models import DoctorProfile
+
+
+def profile_claims(user):
+    """Token claims that let ClaimsJWTAuthentication serve a request without loading the user."""
+    doctor_profile_id = None
+    if user.role == 'doctor':
+        doctor_profile_id = DoctorProfile.objects.filter(user=user).values_list('id', flat=True).first()
+    return {
+        "role": user.role,
+        "doctor_profile_id": doctor_profile_id,
+        "is_profile_completed": doctor_profile_id is not None,
+    }
+
+
+class ProfileRefreshToken(RefreshToken):
+    """RefreshToken carrying profile_claims(); access tokens made from it copy them."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.payload.update(profile_claims(user))
+        return token
@@ -3,12 +3,17 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .serializers import RegisterSerializer, LoginSerializer
-from rest_framework_simplejwt.tokens import RefreshToken
-from doctor.models import DoctorProfile 
 from rest_framework.permissions import AllowAny
 from .models import CustomUser
-from google.oauth2 import id_token
-from google.auth.transport import requests
+from .tokens import ProfileRefreshToken
+from asgiref.sync import sync_to_async
+from django.contrib.auth import aauthenticate
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+import json
+from .google import verify_google_token
 from dotenv import load_dotenv
 import os
 load_dotenv()
@@ -19,7 +24,7 @@ class RegisterView(APIView):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = ProfileRefreshToken.for_user(user)
 
             return Response({
                 "message": "User registered successfully",
@@ -30,39 +35,54 @@ class RegisterView(APIView):
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class LoginView(APIView):
-    permission_classes = [AllowAny]
-    
-    def post(self, request):
-        serializer = LoginSerializer(data=request.data)
-        if serializer.is_valid():
-            user = serializer.validated_data
-            refresh = RefreshToken.for_user(user)
+def login_payload(user):
+    """Tokens and profile state returned by a successful login."""
+    # The token's claims already say whether a doctor has completed their profile
+    refresh = ProfileRefreshToken.for_user(user)
+    is_profile_completed = refresh["is_profile_completed"]
 
-            # Check if doctor has completed profile
-            is_profile_completed = False
-            if user.role == 'doctor':
-                is_profile_completed = DoctorProfile.objects.filter(user=user).exists()
+    return {
+        "message": "Login successful",
+        "role": user.role,
+        "access": str(refresh.access_token),
+        "refresh": str(refresh),
+        "is_profile_completed": is_profile_completed,
+        "user_id": user.id
+    }
 
-            response = Response({
-                "message": "Login successful",
-                "role": user.role,
-                "access": str(refresh.access_token),
-                "refresh": str(refresh),
-                "is_profile_completed": is_profile_completed,
-                "user_id": user.id
-            }, status=status.HTTP_200_OK)
-            
-            # Set secure cookies
-            response.set_cookie(
-                key='access_token',
-                value=str(refresh.access_token),
-                httponly=True,
-                secure=not settings.DEBUG,
-                samesite='Lax'
-            )
-            return response
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class LoginView(View):
+    """Email/password login, async so hash checks wait on a bounded thread pool instead of a worker."""
+
+    async def post(self, request):
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body or b"{}")
+            except ValueError:
+                return JsonResponse({"detail": "JSON parse error"}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            data = request.POST
+
+        serializer = LoginSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        user = await aauthenticate(request, **serializer.validated_data)
+        if user is None:
+            return JsonResponse({"non_field_errors": ["Invalid credentials"]}, status=status.HTTP_400_BAD_REQUEST)
+
+        payload = await sync_to_async(login_payload)(user)
+        response = JsonResponse(payload, status=status.HTTP_200_OK)
+
+        # Set secure cookies
+        response.set_cookie(
+            key='access_token',
+            value=payload["access"],
+            httponly=True,
+            secure=not settings.DEBUG,
+            samesite='Lax'
+        )
+        return response
 
 class SignupGoogleAuthView(APIView):
     permission_classes = [AllowAny]
@@ -76,9 +96,8 @@ class SignupGoogleAuthView(APIView):
             # Use env variable directly
             GOOGLE_CLIENT_ID = os.environ.get("GOOGLE_CLIENT_ID")
 
-            idinfo = id_token.verify_oauth2_token(
-                token, requests.Request(), GOOGLE_CLIENT_ID
-            )
+            # Verified against Google's certificates, cached process-wide (accounts/google.py)
+            idinfo = verify_google_token(token, GOOGLE_CLIENT_ID)
 
             email = idinfo["email"]
             first_name = idinfo.get("given_name", "")
@@ -98,11 +117,8 @@ class SignupGoogleAuthView(APIView):
                 is_active=True
             )
 
-            refresh = RefreshToken.for_user(user)
-
-            is_profile_completed = False
-            if user.role == "doctor":
-                is_profile_completed = DoctorProfile.objects.filter(user=user).exists()
+            refresh = ProfileRefreshToken.for_user(user)
+            is_profile_completed = refresh["is_profile_completed"]
 
             return Response({
                 "message": "Account created successfully with Google.",
@@ -128,9 +144,8 @@ class LoginGoogleAuthView(APIView):
         try:
             GOOGLE_CLIENT_ID = os.environ.get("GOOGLE_CLIENT_ID")
 
-            idinfo = id_token.verify_oauth2_token(
-                token, requests.Request(), GOOGLE_CLIENT_ID
-            )
+            # Verified against Google's certificates, cached process-wide (accounts/google.py)
+            idinfo = verify_google_token(token, GOOGLE_CLIENT_ID)
 
             email = idinfo["email"]
 
@@ -141,11 +156,8 @@ class LoginGoogleAuthView(APIView):
                     "error": "User not registered. Please sign up first."
                 }, status=status.HTTP_404_NOT_FOUND)
 
-            refresh = RefreshToken.for_user(user)
-
-            is_profile_completed = False
-            if user.role == "doctor":
-                is_profile_completed = DoctorProfile.objects.filter(user=user).exists()
+            refresh = ProfileRefreshToken.for_user(user)
+            is_profile_completed = refresh["is_profile_completed"]
 
             return Response({
                 "message": "Login successful via Google.",
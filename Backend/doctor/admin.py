@@ -1,5 +1,19 @@
 from django.contrib import admin
-from .models import DoctorProfile
+from .models import DoctorProfile, DAYS_OF_WEEK
+
+
+class WorkingDayListFilter(admin.SimpleListFilter):
+    """Filter on the indexed WorkingWindow rows instead of the working_days JSON."""
+    title = 'working day'
+    parameter_name = 'working_day'
+
+    def lookups(self, request, model_admin):
+        return [(str(i), label) for i, (_, label) in enumerate(DAYS_OF_WEEK)]
+
+    def queryset(self, request, queryset):
+        if self.value() is not None:
+            return queryset.filter(working_windows__weekday=self.value())
+        return queryset
 
 @admin.register(DoctorProfile)
 class DoctorProfileAdmin(admin.ModelAdmin):
@@ -12,7 +26,7 @@ class DoctorProfileAdmin(admin.ModelAdmin):
         'years_of_experience',
         'consultation_fee',
     )
-    list_filter = ('specialization', 'working_days')
+    list_filter = ('specialization', WorkingDayListFilter)
     search_fields = (
         'user__first_name',
         'user__last_name',
@@ -0,0 +1,177 @@
+# doctor/autocomplete.py
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.db import connections
+
+from .models import DoctorProfile
+
+# Full reload interval, so processes that did not see a write catch up
+REFRESH_SECONDS = 300
+INDEXED_FIELDS = {'clinic_name', 'specialization', 'profile_photo'}
+DEFAULT_AUTOCOMPLETE = 8
+MAX_AUTOCOMPLETE = 20
+
+
+def normalize(text):
+    return " ".join(text.lower().split())
+
+
+class PrefixIndex:
+    """Sorted (term, doctor_id) array answered with bisect; one entry per doctor.
+
+    upsert() and remove() edit the array in place, so every read and write
+    holds the lock; a search only holds it while it collects `limit` entries.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []
+        self._terms = {}
+        self._entries = {}
+        # Bumped on every incremental write, so a reload that read older rows can tell
+        self.writes = 0
+        self.loaded_at = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def terms_for(name, clinic_name, specialization):
+        """Every word plus the full name and clinic, so "john sm" and "apollo he" match too."""
+        terms = set()
+        for text in (name, clinic_name, specialization):
+            text = normalize(text or "")
+            if text:
+                terms.add(text)
+                terms.update(text.split())
+        return terms
+
+    def load(self, entries, unless_written_since=None):
+        """Replace the whole index from (entry, terms) pairs.
+
+        With unless_written_since (a `writes` value), the load is dropped if an
+        incremental write happened after it, since its rows may predate that
+        write. Returns whether the index was replaced.
+        """
+        keys, term_map, entry_map = [], {}, {}
+        for entry, terms in entries:
+            entry_map[entry["id"]] = entry
+            term_map[entry["id"]] = terms
+            keys.extend((term, entry["id"]) for term in terms)
+        keys.sort()
+        with self._lock:
+            if unless_written_since is not None and self.writes != unless_written_since:
+                return False
+            self._keys, self._terms, self._entries = keys, term_map, entry_map
+            self.loaded_at = time.monotonic()
+        return True
+
+    def _discard(self, doctor_id):
+        for term in self._terms.pop(doctor_id, ()):
+            position = bisect_left(self._keys, (term, doctor_id))
+            if position < len(self._keys) and self._keys[position] == (term, doctor_id):
+                del self._keys[position]
+        self._entries.pop(doctor_id, None)
+        self.writes += 1
+
+    def upsert(self, entry, terms):
+        with self._lock:
+            self._discard(entry["id"])
+            for term in terms:
+                insort(self._keys, (term, entry["id"]))
+            self._terms[entry["id"]] = terms
+            self._entries[entry["id"]] = entry
+
+    def remove(self, doctor_id):
+        with self._lock:
+            self._discard(doctor_id)
+
+    def search(self, prefix, limit=10):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results, seen = [], set()
+        with self._lock:
+            keys = self._keys
+            position = bisect_left(keys, (prefix,))
+            while position < len(keys) and len(results) < limit:
+                term, doctor_id = keys[position]
+                if not term.startswith(prefix):
+                    break
+                entry = self._entries.get(doctor_id)
+                if entry is not None and doctor_id not in seen:
+                    seen.add(doctor_id)
+                    results.append(entry)
+                position += 1
+        return results
+
+
+def profile_rows(queryset):
+    """(entry, terms) pairs from a DoctorProfile queryset in one query."""
+    storage = DoctorProfile._meta.get_field('profile_photo').storage
+    rows = queryset.values(
+        'id', 'user__first_name', 'user__last_name', 'clinic_name', 'specialization', 'profile_photo'
+    )
+    for row in rows:
+        name = f"{row['user__first_name']} {row['user__last_name']}".strip() or "N/A"
+        entry = {
+            "id": row["id"],
+            "full_name": name,
+            "profile_photo": storage.url(row["profile_photo"]) if row["profile_photo"] else None,
+        }
+        yield entry, PrefixIndex.terms_for(name, row["clinic_name"], row["specialization"])
+
+
+_index = PrefixIndex()
+_reloading = threading.Lock()
+
+
+def reload_index():
+    """Fully reload the index from the database, unless another reload is running."""
+    if not _reloading.acquire(blocking=False):
+        return
+    try:
+        _index.load(profile_rows(DoctorProfile.objects.all()), unless_written_since=_index.writes)
+    finally:
+        _reloading.release()
+
+
+def reload_in_background():
+    def reload():
+        try:
+            reload_index()
+        finally:
+            # The thread's own database connection
+            connections.close_all()
+
+    threading.Thread(target=reload, name="autocomplete-reload", daemon=True).start()
+
+
+def get_index():
+    """The process-wide index, loaded on first use and fully reloaded every REFRESH_SECONDS.
+
+    Only the first load happens in line; later reloads run in a background
+    thread while searches keep using the current index.
+    """
+    if _index.loaded_at is None:
+        with _reloading:
+            if _index.loaded_at is None:
+                _index.load(profile_rows(DoctorProfile.objects.all()))
+    elif time.monotonic() - _index.loaded_at > REFRESH_SECONDS and not _reloading.locked():
+        reload_in_background()
+    return _index
+
+
+def refresh_doctors(**filters):
+    """Incrementally re-index the profiles matching `filters` if the index is loaded."""
+    if _index.loaded_at is None:
+        return
+    for entry, terms in profile_rows(DoctorProfile.objects.filter(**filters)):
+        _index.upsert(entry, terms)
+
+
+def remove_doctor(doctor_id):
+    if _index.loaded_at is not None:
+        _index.remove(doctor_id)
@@ -0,0 +1,57 @@
+# doctor/conditional.py
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+LISTING_VERSION_KEY = "doctor_listing:version"
+LISTING_VERSION_TIMEOUT = 300
+
+
+def profile_validators(doctor_id, updated_at):
+    """(ETag, Last-Modified timestamp) of one profile, derived from updated_at alone."""
+    return quote_etag(f"doctor-{doctor_id}-{int(updated_at.timestamp() * 1_000_000)}"), int(updated_at.timestamp())
+
+
+def listing_version():
+    """Version of the public doctor data, bumped by every profile write or delete (see doctor/signals.py).
+
+    It expires after LISTING_VERSION_TIMEOUT, so with a per-process cache a
+    write seen by another process stops validating old listings soon after.
+    """
+    return cache.get_or_set(LISTING_VERSION_KEY, time.time_ns, timeout=LISTING_VERSION_TIMEOUT)
+
+
+def invalidate_listing():
+    try:
+        cache.incr(LISTING_VERSION_KEY)
+    except ValueError:
+        # Expired or evicted: a fresh version still differs from every ETag handed out
+        cache.set(LISTING_VERSION_KEY, time.time_ns(), timeout=LISTING_VERSION_TIMEOUT)
+
+
+def listing_etag(params):
+    """ETag of a doctor listing: the data version plus the query string, no database query."""
+    query = urlencode(sorted(params.items()))
+    return quote_etag(hashlib.md5(f"{listing_version()}:{query}".encode()).hexdigest())
+
+
+def not_modified(request, etag, last_modified=None):
+    """A 304 (or 412) response if the client's validators still match, else None."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None and response.status_code == 304:
+        # A 304 must repeat the validators so caches can refresh their stored copy
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    """Attach validators and ask browsers and CDNs to revalidate before reuse."""
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+    return response
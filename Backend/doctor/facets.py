@@ -0,0 +1,100 @@
+# doctor/facets.py
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.db.models.lookups import GreaterThan
+
+from .models import DAYS_OF_WEEK, SPECIALIZATION_CHOICES
+
+FACETS_CACHE_TIMEOUT = 300
+FACETS_VERSION_KEY = "doctor_facets:version"
+
+# (value, lower bound inclusive, upper bound exclusive or None)
+FEE_BUCKETS = [
+    ("0-300", 0, 300),
+    ("300-500", 300, 500),
+    ("500-1000", 500, 1000),
+    ("1000-2000", 1000, 2000),
+    ("2000+", 2000, None),
+]
+EXPERIENCE_BUCKETS = [
+    ("0-4", 0, 5),
+    ("5-9", 5, 10),
+    ("10-19", 10, 20),
+    ("20+", 20, None),
+]
+
+
+def bucket_q(field, low, high):
+    query = Q(**{f"{field}__gte": low})
+    if high is not None:
+        query &= Q(**{f"{field}__lt": high})
+    return query
+
+
+def facet_aggregates():
+    """Every facet count as a named conditional aggregate, so they share one query."""
+    aggregates = {"total": Count('id')}
+    for value, _ in SPECIALIZATION_CHOICES:
+        aggregates[f"specialization:{value}"] = Count('id', filter=Q(specialization=value))
+    for value, low, high in FEE_BUCKETS:
+        aggregates[f"consultation_fee:{value}"] = Count('id', filter=bucket_q('consultation_fee', low, high))
+    for value, low, high in EXPERIENCE_BUCKETS:
+        aggregates[f"years_of_experience:{value}"] = Count('id', filter=bucket_q('years_of_experience', low, high))
+    for bit, (value, _) in enumerate(DAYS_OF_WEEK):
+        aggregates[f"working_days:{value}"] = Count(
+            'id', filter=GreaterThan(F('working_days_mask').bitand(1 << bit), 0)
+        )
+    return aggregates
+
+
+def compute_facets(queryset):
+    """Facet counts of a DoctorProfile queryset in one aggregate query."""
+    # Listing order is irrelevant to counts
+    counts = queryset.order_by().aggregate(**facet_aggregates())
+    labels = dict(SPECIALIZATION_CHOICES) | dict(DAYS_OF_WEEK)
+
+    def facet(name, values):
+        return [
+            {"value": value, "label": labels.get(value, value), "count": counts[f"{name}:{value}"]}
+            for value in values
+        ]
+
+    return {
+        "total": counts["total"],
+        "specialization": facet("specialization", [value for value, _ in SPECIALIZATION_CHOICES]),
+        "consultation_fee": facet("consultation_fee", [value for value, _, _ in FEE_BUCKETS]),
+        "years_of_experience": facet("years_of_experience", [value for value, _, _ in EXPERIENCE_BUCKETS]),
+        "working_days": facet("working_days", [value for value, _ in DAYS_OF_WEEK]),
+    }
+
+
+def facets_cache_key(params):
+    version = cache.get_or_set(FACETS_VERSION_KEY, time.time_ns, timeout=None)
+    digest = hashlib.md5(urlencode(sorted(params.items())).encode()).hexdigest()
+    return f"doctor_facets:{version}:{digest}"
+
+
+def cached_facets(queryset, params):
+    """compute_facets, cached per filter combination until the next DoctorProfile write.
+
+    params are the filters the queryset was built from and make up the key.
+    """
+    key = facets_cache_key(params)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset)
+        cache.set(key, facets, timeout=FACETS_CACHE_TIMEOUT)
+    return facets
+
+
+def invalidate_facets():
+    """Orphan every cached facet result by bumping the shared version."""
+    try:
+        cache.incr(FACETS_VERSION_KEY)
+    except ValueError:
+        # Evicted: a fresh, never-used version still orphans the old entries
+        cache.set(FACETS_VERSION_KEY, time.time_ns(), timeout=None)
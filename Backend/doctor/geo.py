@@ -0,0 +1,87 @@
+# doctor/geo.py
+import math
+
+from django.db.models import Case, ExpressionWrapper, F, FloatField, Q, Value, When
+
+# Grid index: the globe is cut into CELL_DEGREES x CELL_DEGREES cells numbered
+# row-major, so the cells of one grid row are a contiguous range of ids
+CELL_DEGREES = 0.1
+GRID_COLUMNS = int(360 / CELL_DEGREES)
+KM_PER_DEGREE = 111.32
+DEFAULT_RADIUS_KM = 10
+MAX_RADIUS_KM = 100
+
+
+def grid_row(latitude):
+    return int((latitude + 90) // CELL_DEGREES)
+
+
+def grid_column(longitude):
+    return min(int((longitude + 180) // CELL_DEGREES), GRID_COLUMNS - 1)
+
+
+def grid_cell(latitude, longitude):
+    """Cell id of a coordinate, or None when either part is missing."""
+    if latitude is None or longitude is None:
+        return None
+    return grid_row(latitude) * GRID_COLUMNS + grid_column(longitude)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(min_lat, max_lat, min_lng, max_lng); the longitudes may run past ±180, see longitude_ranges()."""
+    lat_delta = radius_km / KM_PER_DEGREE
+    lng_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    return (
+        max(latitude - lat_delta, -90), min(latitude + lat_delta, 90),
+        longitude - lng_delta, longitude + lng_delta,
+    )
+
+
+def longitude_ranges(min_lng, max_lng):
+    """A longitude span as ranges within [-180, 180], split in two where it crosses the antimeridian."""
+    if max_lng - min_lng >= 360:
+        return [(-180, 180)]
+    if min_lng < -180:
+        return [(min_lng + 360, 180), (-180, max_lng)]
+    if max_lng > 180:
+        return [(min_lng, 180), (-180, max_lng - 360)]
+    return [(min_lng, max_lng)]
+
+
+def near(queryset, latitude, longitude, radius_km=DEFAULT_RADIUS_KM):
+    """Doctors within radius_km of a point, annotated with `distance_sq` and ordered by it.
+
+    The bounding box is turned into one geo_cell range per grid row (two
+    where it crosses the antimeridian), each an index range scan, so only
+    doctors in nearby cells are read. Distance uses
+    the equirectangular approximation, which is plain arithmetic in SQL and
+    accurate to well under 1% at these radii.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+    cells = Q()
+    in_box = Q()
+    for first_lng, last_lng in longitude_ranges(min_lng, max_lng):
+        first_column, last_column = grid_column(first_lng), grid_column(last_lng)
+        for row in range(grid_row(min_lat), grid_row(max_lat) + 1):
+            cells |= Q(geo_cell__range=(row * GRID_COLUMNS + first_column, row * GRID_COLUMNS + last_column))
+        in_box |= Q(longitude__range=(first_lng, last_lng))
+
+    doctor_longitude = F('longitude')
+    if min_lng < -180 or max_lng > 180:
+        # Near the antimeridian, measure the short way round
+        doctor_longitude = Case(
+            When(longitude__gt=longitude + 180, then=F('longitude') - 360),
+            When(longitude__lt=longitude - 180, then=F('longitude') + 360),
+            default=F('longitude'),
+        )
+    lat_scale = KM_PER_DEGREE
+    lng_scale = KM_PER_DEGREE * math.cos(math.radians(latitude))
+    dlat = (F('latitude') - Value(latitude)) * Value(lat_scale)
+    dlng = (doctor_longitude - Value(longitude)) * Value(lng_scale)
+    return queryset.filter(
+        cells,
+        in_box,
+        latitude__range=(min_lat, max_lat),
+    ).annotate(
+        distance_sq=ExpressionWrapper(dlat * dlat + dlng * dlng, output_field=FloatField())
+    ).filter(distance_sq__lte=radius_km * radius_km).order_by('distance_sq', 'id')
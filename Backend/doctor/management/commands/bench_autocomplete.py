@@ -0,0 +1,48 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from doctor.autocomplete import PrefixIndex
+from .bench_doctor_search import CLINIC_WORDS, FIRST_NAMES, LAST_NAMES
+
+
+class Command(BaseCommand):
+    help = "Measure in-process autocomplete lookup latency on a synthetic index"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--doctors", type=int, default=100000, help="Number of indexed doctors")
+        parser.add_argument("--lookups", type=int, default=20000, help="Number of timed lookups")
+
+    def handle(self, *args, **kwargs):
+        rng = random.Random(7)
+        specializations = ["cardiology", "dermatology", "neurology", "orthopedics"]
+
+        def entry(doctor_id):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            clinic = f"{rng.choice(CLINIC_WORDS)} {rng.choice(CLINIC_WORDS)} Clinic"
+            return (
+                {"id": doctor_id, "full_name": name, "profile_photo": None},
+                PrefixIndex.terms_for(name, clinic, rng.choice(specializations)),
+            )
+
+        index = PrefixIndex()
+        started = time.perf_counter()
+        index.load(entry(i) for i in range(kwargs["doctors"]))
+        self.stdout.write(f"Loaded {len(index)} doctors in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        words = [w.lower() for w in FIRST_NAMES + LAST_NAMES + CLINIC_WORDS] + specializations
+        prefixes = [rng.choice(words)[:rng.randint(1, 6)] for _ in range(kwargs["lookups"])]
+        started = time.perf_counter()
+        for prefix in prefixes:
+            index.search(prefix, 8)
+        per_lookup = (time.perf_counter() - started) / len(prefixes) * 1e6
+        self.stdout.write(f"Lookup: {per_lookup:.1f} µs on average")
+
+        started = time.perf_counter()
+        for i in range(1000):
+            index.upsert(*entry(i))
+        self.stdout.write(f"Incremental upsert: {(time.perf_counter() - started) * 1000:.1f} µs on average")
+
+        verdict = self.style.SUCCESS("✅ sub-millisecond") if per_lookup < 1000 else self.style.ERROR("❌ over 1 ms")
+        self.stdout.write(verdict)
@@ -0,0 +1,71 @@
+import math
+import random
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import CustomUser
+from doctor.geo import grid_cell, near
+from doctor.models import DoctorProfile
+from main.bench import make_doctor, rolled_back, timed
+
+# Doctors are scattered around these (lat, lng) centres, as in a real catalogue
+CITIES = [(28.61, 77.21), (19.08, 72.88), (12.97, 77.59), (13.08, 80.27), (22.57, 88.36), (17.39, 78.49)]
+
+
+class Command(BaseCommand):
+    help = "Time near= doctor queries on the grid index against a full scan sorted in Python"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--doctors", type=int, default=100000, help="Number of doctors to generate")
+        parser.add_argument("--radius", type=float, default=10, help="Search radius in km")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+
+    def handle(self, *args, **kwargs):
+        rng = random.Random(42)
+        radius = kwargs["radius"]
+
+        with rolled_back():
+            template = make_doctor()
+            base = {
+                field.name: getattr(template, field.name) for field in DoctorProfile._meta.concrete_fields
+                if field.name not in ("id", "user", "latitude", "longitude", "geo_cell")
+            }
+            created = 0
+            while created < kwargs["doctors"]:
+                batch = min(10000, kwargs["doctors"] - created)
+                users = CustomUser.objects.bulk_create([
+                    CustomUser(email=f"bench-near-{created + i}@example.com", role="doctor")
+                    for i in range(batch)
+                ])
+                profiles = []
+                for user in users:
+                    city_lat, city_lng = rng.choice(CITIES)
+                    latitude, longitude = city_lat + rng.gauss(0, 0.2), city_lng + rng.gauss(0, 0.2)
+                    # bulk_create skips save(), so the grid cell is set here
+                    profiles.append(DoctorProfile(
+                        user=user, latitude=latitude, longitude=longitude,
+                        geo_cell=grid_cell(latitude, longitude), **base
+                    ))
+                DoctorProfile.objects.bulk_create(profiles)
+                created += batch
+
+            def scan(latitude, longitude):
+                # What clients did before: download everything and sort by distance
+                rows = DoctorProfile.objects.exclude(latitude=None).values_list('id', 'latitude', 'longitude')
+                scale = math.cos(math.radians(latitude))
+                hits = []
+                for doctor_id, lat, lng in rows:
+                    distance = math.hypot(lat - latitude, (lng - longitude) * scale) * 111.32
+                    if distance <= radius:
+                        hits.append((distance, doctor_id))
+                return sorted(hits)[:20]
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{kwargs['doctors']} doctors, radius {radius} km"))
+            for latitude, longitude in CITIES[:3]:
+                queryset = near(DoctorProfile.objects.select_related('user'), latitude, longitude, radius)
+                indexed = timed(lambda: list(queryset[:20]), kwargs["repeat"])
+                scanned = timed(lambda: scan(latitude, longitude), kwargs["repeat"])
+                self.stdout.write(
+                    f"  ({latitude}, {longitude})  grid index: {indexed:8.2f} ms ({queryset.count()} in range)"
+                    f"  full scan: {scanned:8.2f} ms"
+                )
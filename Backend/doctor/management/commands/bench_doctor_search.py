@@ -0,0 +1,79 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from accounts.models import CustomUser
+from doctor.models import DoctorProfile, SPECIALIZATION_CHOICES
+from doctor.search import IcontainsSearchBackend, SQLiteFTSSearchBackend
+from main.bench import make_doctor, rolled_back, timed
+
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Ananya", "Diya", "Ishaan", "Kavya", "Meera", "Rohan", "Saanvi",
+               "Arjun", "Priya", "Kabir", "Nisha", "Vikram", "Sneha", "Rahul", "Pooja", "Karan", "Tara"]
+LAST_NAMES = ["Sharma", "Verma", "Gupta", "Iyer", "Reddy", "Nair", "Patel", "Singh", "Mehta", "Joshi",
+              "Kapoor", "Chopra", "Bose", "Das", "Rao", "Menon", "Pillai", "Malhotra", "Saxena", "Kulkarni"]
+CLINIC_WORDS = ["City", "Care", "Health", "Sunrise", "Lotus", "Apollo", "Medi", "Life", "Prime", "Hope"]
+QUERIES = ["sharma", "priya reddy", "card", "lotus care", "arr"]
+
+
+class Command(BaseCommand):
+    help = "Compare FTS5 doctor search against the icontains path at several catalogue sizes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated catalogue sizes")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+
+    def handle(self, *args, **kwargs):
+        if connection.vendor != "sqlite":
+            self.stdout.write(self.style.ERROR("The FTS5 backend needs SQLite."))
+            return
+
+        sizes = sorted(int(size) for size in kwargs["sizes"].split(","))
+        backends = {"icontains": IcontainsSearchBackend(), "fts5": SQLiteFTSSearchBackend()}
+        specializations = [value for value, _ in SPECIALIZATION_CHOICES]
+        rng = random.Random(42)
+
+        with rolled_back():
+            template = make_doctor()
+            base = {
+                field.name: getattr(template, field.name) for field in DoctorProfile._meta.concrete_fields
+                if field.name not in ("id", "user", "specialization", "clinic_name", "bio")
+            }
+            created = 0
+            for size in sizes:
+                while created < size:
+                    batch = min(10000, size - created)
+                    users = CustomUser.objects.bulk_create([
+                        CustomUser(
+                            email=f"bench-search-{created + i}@example.com",
+                            first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES), role="doctor",
+                        )
+                        for i in range(batch)
+                    ])
+                    DoctorProfile.objects.bulk_create([
+                        DoctorProfile(
+                            user=user,
+                            specialization=rng.choice(specializations),
+                            clinic_name=f"{rng.choice(CLINIC_WORDS)} {rng.choice(CLINIC_WORDS)} Clinic",
+                            bio=rng.choice(["Treats arrhythmia and hypertension.", "Skin and hair specialist.",
+                                            "Sports injuries and joint care.", "Migraine and epilepsy care."]),
+                            **base
+                        )
+                        for user in users
+                    ])
+                    created += batch
+                # bulk_create skips the indexing signals
+                backends["fts5"].rebuild()
+
+                self.stdout.write(self.style.MIGRATE_HEADING(f"{size} doctors"))
+                for query in QUERIES:
+                    line = f"  {query!r:15}"
+                    for name, backend in backends.items():
+                        queryset = backend.search(DoctorProfile.objects.select_related('user'), query)
+                        if not backend.ranked:
+                            queryset = queryset.order_by('id')
+
+                        # First page of doctor_listing (20 rows), as the paginated endpoint fetches it
+                        elapsed = timed(lambda: list(queryset[:20]), kwargs["repeat"])
+                        line += f"  {name}: {elapsed:9.2f} ms ({queryset.count()} hits)"
+                    self.stdout.write(line)
@@ -45,6 +45,12 @@ class Command(BaseCommand):
                 except Exception:
                     working_days = []
 
+            # Optional coordinates for the near= listing; blank cells come in as NaN
+            latitude = row.get("latitude")
+            longitude = row.get("longitude")
+            if pd.isna(latitude) or pd.isna(longitude):
+                latitude = longitude = None
+
             # Create doctor profile
             DoctorProfile.objects.create(
                 user=user,
@@ -60,6 +66,8 @@ class Command(BaseCommand):
                 end_time=row["end_time"],
                 appointment_duration=int(row["appointment_duration"]),
                 bio=row["bio"],
+                latitude=latitude,
+                longitude=longitude,
             )
 
             self.stdout.write(self.style.SUCCESS(
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from doctor.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the doctor full-text search index (e.g. after bulk imports)"
+
+    def handle(self, *args, **kwargs):
+        backend = get_search_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt search index ({type(backend).__name__})."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctorprofile',
+            name='slots_generated_until',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+    ]
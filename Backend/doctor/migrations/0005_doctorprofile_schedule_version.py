@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor', '0004_doctorprofile_slots_generated_until'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctorprofile',
+            name='schedule_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:02
+
+import django.db.models.deletion
+import doctor.models
+from django.db import migrations, models
+
+
+def fts5_supported(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_fts_index(apps, schema_editor):
+    """Create and fill the FTS5 table on SQLite built with FTS5.
+
+    Without the table, doctor/search.py falls back to the icontains backend.
+    """
+    if schema_editor.connection.vendor != 'sqlite' or not fts5_supported(schema_editor.connection):
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS doctor_search USING fts5("
+        "name, clinic_name, specialization, qualifications, bio, "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO doctor_search (rowid, name, clinic_name, specialization, qualifications, bio) "
+        "SELECT p.id, u.first_name || ' ' || u.last_name, p.clinic_name, p.specialization, "
+        "p.qualifications, p.bio FROM doctor_doctorprofile p JOIN accounts_customuser u ON u.id = p.user_id"
+    )
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS doctor_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_alter_customuser_role'),
+        ('doctor', '0005_doctorprofile_schedule_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorSearchIndex',
+            fields=[
+                ('profile', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='doctor.doctorprofile')),
+                ('document', doctor.models.SearchDocumentField(db_column='doctor_search')),
+                ('rank', models.FloatField(db_column='rank')),
+                ('name', models.TextField()),
+                ('clinic_name', models.TextField()),
+                ('specialization', models.TextField()),
+                ('qualifications', models.TextField()),
+                ('bio', models.TextField()),
+            ],
+            options={
+                'db_table': 'doctor_search',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+def backfill_schedule(apps, schema_editor):
+    DoctorProfile = apps.get_model('doctor', 'DoctorProfile')
+    WorkingWindow = apps.get_model('doctor', 'WorkingWindow')
+    windows = []
+    for profile in DoctorProfile.objects.all():
+        days = [WEEKDAYS.index(day) for day in profile.working_days or [] if day in WEEKDAYS]
+        profile.working_days_mask = sum(1 << day for day in set(days))
+        profile.save(update_fields=['working_days_mask'])
+        windows.extend(
+            WorkingWindow(doctor=profile, weekday=day, start_time=profile.start_time, end_time=profile.end_time)
+            for day in sorted(set(days))
+        )
+    WorkingWindow.objects.bulk_create(windows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor', '0006_doctorsearchindex'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctorprofile',
+            name='working_days_mask',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='WorkingWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='working_windows', to='doctor.doctorprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['weekday', 'end_time', 'start_time'], name='doctor_work_weekday_3dbce7_idx')],
+                'unique_together': {('doctor', 'weekday')},
+            },
+        ),
+        migrations.RunPython(backfill_schedule, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
 from django.db import models
 from accounts.models import CustomUser
 from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
+
+from .geo import grid_cell
 
 SPECIALIZATION_CHOICES = [
     ('cardiology', 'Cardiology'),
@@ -19,6 +22,19 @@ DAYS_OF_WEEK = [
     ('sunday', 'Sunday'),
 ]
 
+SCHEDULE_FIELDS = ('working_days', 'start_time', 'end_time', 'appointment_duration')
+WEEKDAYS = [day for day, _ in DAYS_OF_WEEK]  # index == date.weekday()
+
+
+def weekday_mask(days):
+    """Bitmask of working days, bit n set for WEEKDAYS[n]."""
+    mask = 0
+    for day in days or []:
+        if day in WEEKDAYS:
+            mask |= 1 << WEEKDAYS.index(day)
+    return mask
+
+
 class DoctorProfile(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name='doctor_profile')
     
@@ -35,13 +51,128 @@ class DoctorProfile(models.Model):
     appointment_duration = models.PositiveIntegerField(help_text="Duration in minutes")
     bio = models.TextField()
     profile_photo = models.ImageField(upload_to='doctor_photos/', blank=True, null=True)
+    slots_generated_until = models.DateField(blank=True, null=True, editable=False)
+    # Bumped on every schedule change; part of the availability cache validity
+    schedule_version = models.PositiveIntegerField(default=0, editable=False)
+    # Indexable mirror of working_days, kept in sync by save()
+    working_days_mask = models.PositiveSmallIntegerField(default=0, db_index=True, editable=False)
+    latitude = models.FloatField(
+        blank=True, null=True, validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    longitude = models.FloatField(
+        blank=True, null=True, validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    # Grid cell of (latitude, longitude), kept in sync by save(); see doctor/geo.py
+    geo_cell = models.PositiveIntegerField(blank=True, null=True, db_index=True, editable=False)
+    # Validator for conditional GETs of the public endpoints (see doctor/conditional.py)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Dr. {self.user.first_name} {self.user.last_name}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_schedule = instance.schedule() if set(SCHEDULE_FIELDS) <= set(field_names) else None
+        return instance
+
+    def schedule(self):
+        """Snapshot of the fields slots are generated from."""
+        return (list(self.working_days or []), self.start_time, self.end_time, self.appointment_duration)
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_schedule', None)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not set(update_fields) & set(SCHEDULE_FIELDS):
+            schedule_changed = False
+        else:
+            schedule_changed = loaded is None or self.schedule() != loaded
+
+        self.geo_cell = grid_cell(self.latitude, self.longitude)
+        if update_fields is not None:
+            update_fields = kwargs['update_fields'] = {*update_fields, 'updated_at'}
+            if {'latitude', 'longitude'} & update_fields:
+                update_fields.add('geo_cell')
+
+        if schedule_changed:
+            self.working_days_mask = weekday_mask(self.working_days)
+            if not self._state.adding:
+                self.schedule_version += 1
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'schedule_version', 'working_days_mask'}
+        super().save(*args, **kwargs)
+        if schedule_changed:
+            self.sync_working_windows()
+            self.sync_calendar()
+        self._loaded_schedule = self.schedule()
+
+    def sync_working_windows(self):
+        """Rewrite the per-weekday windows from working_days/start_time/end_time."""
+        self.working_windows.all().delete()
+        WorkingWindow.objects.bulk_create([
+            WorkingWindow(doctor=self, weekday=WEEKDAYS.index(day), start_time=self.start_time, end_time=self.end_time)
+            for day in WEEKDAYS if day in (self.working_days or [])
+        ])
     
+    def sync_calendar(self):
+        """Build or regenerate the materialized slot calendar from the current schedule."""
+        # patient.slots imports this module
+        from patient.slots import rebuild_doctor_calendar
+        rebuild_doctor_calendar(self)
+
     @property
     def profile_picture_url(self):
         """Return full URL for profile picture."""
         if self.profile_photo:
             return f"{settings.MEDIA_URL}{self.profile_photo}"
         return None
+
+
+class WorkingWindow(models.Model):
+    """One weekday a doctor works and its hours; lets day/time filters use an index."""
+    doctor = models.ForeignKey(DoctorProfile, on_delete=models.CASCADE, related_name='working_windows')
+    weekday = models.PositiveSmallIntegerField(choices=[(i, label) for i, (_, label) in enumerate(DAYS_OF_WEEK)])
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+
+    class Meta:
+        unique_together = ('doctor', 'weekday')
+        indexes = [
+            models.Index(fields=['weekday', 'end_time', 'start_time']),
+        ]
+
+    def __str__(self):
+        return f"{self.doctor} on {self.get_weekday_display()} {self.start_time}-{self.end_time}"
+
+
+class SearchDocumentField(models.TextField):
+    """The hidden whole-table column of an FTS5 table, queried with `__match`."""
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", lhs_params + rhs_params
+
+
+class DoctorSearchIndex(models.Model):
+    """SQLite FTS5 index over doctor profiles (see doctor/search.py); rowid is the profile id."""
+    profile = models.OneToOneField(
+        DoctorProfile, on_delete=models.DO_NOTHING, primary_key=True,
+        db_column='rowid', related_name='search_index'
+    )
+    document = SearchDocumentField(db_column='doctor_search')
+    rank = models.FloatField(db_column='rank')
+    name = models.TextField()
+    clinic_name = models.TextField()
+    specialization = models.TextField()
+    qualifications = models.TextField()
+    bio = models.TextField()
+
+    class Meta:
+        managed = False
+        db_table = 'doctor_search'
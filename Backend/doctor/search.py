@@ -0,0 +1,117 @@
+# doctor/search.py
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils.module_loading import import_string
+
+from accounts.models import CustomUser
+from .models import DoctorProfile, DoctorSearchIndex
+
+# Profile/user fields that feed the index; saves touching none of them skip reindexing
+INDEXED_PROFILE_FIELDS = {'clinic_name', 'specialization', 'qualifications', 'bio'}
+INDEXED_USER_FIELDS = {'first_name', 'last_name'}
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class IcontainsSearchBackend:
+    """Portable fallback: every word must appear in a name or the clinic name."""
+    ranked = False
+
+    def search(self, queryset, text):
+        query = Q()
+        for word in text.lower().split():
+            query &= (
+                Q(user__first_name__icontains=word) |
+                Q(user__last_name__icontains=word) |
+                Q(clinic_name__icontains=word)
+            )
+        return queryset.filter(query)
+
+    def update(self, profile_ids=None, user_id=None):
+        pass
+
+    def remove(self, profile_ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class SQLiteFTSSearchBackend(IcontainsSearchBackend):
+    """SQLite FTS5 index over names, clinic, specialization, qualifications and bio.
+
+    Every word is matched as a prefix and results are ordered by bm25 relevance.
+    """
+    ranked = True
+    table = DoctorSearchIndex._meta.db_table
+    columns = ('name', 'clinic_name', 'specialization', 'qualifications', 'bio')
+
+    def match_expression(self, text):
+        return " ".join(f'"{token}"*' for token in TOKEN_RE.findall(text.lower()))
+
+    def search(self, queryset, text):
+        expression = self.match_expression(text)
+        if not expression:
+            return queryset
+        return queryset.filter(
+            search_index__document__match=expression
+        ).annotate(search_rank=F('search_index__rank')).order_by('search_rank', 'id')
+
+    def _select_documents(self, where):
+        profile = DoctorProfile._meta.db_table
+        user = CustomUser._meta.db_table
+        return (
+            f"SELECT p.id, u.first_name || ' ' || u.last_name, p.clinic_name, p.specialization, "
+            f"p.qualifications, p.bio FROM {profile} p JOIN {user} u ON u.id = p.user_id {where}"
+        )
+
+    def _reindex(self, where, params):
+        """Replace the index rows of the profiles selected by `where` with one set-based statement."""
+        profile = DoctorProfile._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid IN (SELECT p.id FROM {profile} p {where})", params
+            )
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, {', '.join(self.columns)}) {self._select_documents(where)}",
+                params
+            )
+
+    def update(self, profile_ids=None, user_id=None):
+        if user_id is not None:
+            self._reindex("WHERE p.user_id = %s", [user_id])
+        elif profile_ids:
+            placeholders = ", ".join(["%s"] * len(profile_ids))
+            self._reindex(f"WHERE p.id IN ({placeholders})", list(profile_ids))
+
+    def remove(self, profile_ids):
+        placeholders = ", ".join(["%s"] * len(profile_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})", list(profile_ids))
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, {', '.join(self.columns)}) {self._select_documents('')}"
+            )
+
+
+def has_fts_index():
+    """Whether the FTS5 table exists; migration 0006 skips it where SQLite lacks FTS5."""
+    return SQLiteFTSSearchBackend.table in connection.introspection.table_names()
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    """Backend from settings.DOCTOR_SEARCH_BACKEND, else FTS5 on SQLite when available and icontains elsewhere."""
+    path = getattr(settings, 'DOCTOR_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite' and has_fts_index():
+        return SQLiteFTSSearchBackend()
+    return IcontainsSearchBackend()
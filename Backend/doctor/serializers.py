@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import DoctorProfile
 import json
+import math
 from patient.models import Booking,PatientBookingInfo
 
 class DoctorProfileSerializer(serializers.ModelSerializer):
@@ -8,6 +9,7 @@ class DoctorProfileSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(source='user.email', read_only=True)
     specialization_display = serializers.CharField(source='get_specialization_display', read_only=True)
     profile_photo_url = serializers.SerializerMethodField()
+    distance_km = serializers.SerializerMethodField()
 
     # ✅ Use ListField instead of JSONField for working_days
     working_days = serializers.ListField(
@@ -24,7 +26,8 @@ class DoctorProfileSerializer(serializers.ModelSerializer):
             'years_of_experience', 'consultation_fee', 'qualifications',
             'clinic_name', 'address', 'working_days',
             'start_time', 'end_time', 'appointment_duration',
-            'bio', 'profile_photo', 'profile_photo_url'
+            'bio', 'profile_photo', 'profile_photo_url',
+            'latitude', 'longitude', 'distance_km'
         ]
         read_only_fields = ['user', 'email', 'full_name']
 
@@ -34,6 +37,18 @@ class DoctorProfileSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.profile_photo.url)
         return None
 
+    def get_distance_km(self, obj):
+        # Only set by the near= listing mode (see doctor/geo.py)
+        distance_sq = getattr(obj, 'distance_sq', None)
+        return round(math.sqrt(distance_sq), 2) if distance_sq is not None else None
+
+    def validate(self, attrs):
+        latitude = attrs.get('latitude', getattr(self.instance, 'latitude', None))
+        longitude = attrs.get('longitude', getattr(self.instance, 'longitude', None))
+        if (latitude is None) != (longitude is None):
+            raise serializers.ValidationError("Latitude and longitude must be given together")
+        return attrs
+
     def validate_working_days(self, value):
         """Ensure working_days only contains valid weekdays."""
         if not isinstance(value, list):
@@ -0,0 +1,53 @@
+# doctor/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from . import autocomplete
+from .conditional import invalidate_listing
+from .facets import invalidate_facets
+from .models import DoctorProfile
+from .search import INDEXED_PROFILE_FIELDS, INDEXED_USER_FIELDS, get_search_backend
+
+PUBLIC_USER_FIELDS = {'first_name', 'last_name', 'email'}
+
+
+def touches(update_fields, indexed_fields):
+    return update_fields is None or bool(indexed_fields & set(update_fields))
+
+
+@receiver(post_save, sender=DoctorProfile)
+def index_doctor_profile(sender, instance, update_fields=None, **kwargs):
+    invalidate_facets()
+    invalidate_listing()
+    if touches(update_fields, INDEXED_PROFILE_FIELDS):
+        get_search_backend().update(profile_ids=[instance.id])
+    if touches(update_fields, autocomplete.INDEXED_FIELDS):
+        autocomplete.refresh_doctors(id=instance.id)
+
+
+@receiver(post_delete, sender=DoctorProfile)
+def unindex_doctor_profile(sender, instance, **kwargs):
+    invalidate_facets()
+    invalidate_listing()
+    get_search_backend().remove([instance.id])
+    autocomplete.remove_doctor(instance.id)
+
+
+@receiver(post_save, sender=CustomUser)
+def index_doctor_user(sender, instance, created=False, update_fields=None, **kwargs):
+    # Names live on the user; logins only save last_login and are skipped here
+    if instance.role == 'doctor' and not created and touches(update_fields, INDEXED_USER_FIELDS):
+        get_search_backend().update(user_id=instance.id)
+        # Names feed the search filter the facets are counted under
+        invalidate_facets()
+        autocomplete.refresh_doctors(user_id=instance.id)
+
+
+@receiver(post_save, sender=CustomUser)
+def touch_doctor_profile(sender, instance, created=False, update_fields=None, **kwargs):
+    # Public profiles show the user's name and email, so their ETag must move with them
+    if instance.role == 'doctor' and not created and touches(update_fields, PUBLIC_USER_FIELDS):
+        DoctorProfile.objects.filter(user_id=instance.id).update(updated_at=timezone.now())
+        invalidate_listing()
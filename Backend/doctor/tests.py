@@ -1,3 +1,455 @@
-from django.test import TestCase
+from datetime import date, time, timedelta
 
-# Create your tests here.
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory, TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import CustomUser
+from accounts.tokens import ProfileRefreshToken
+from patient.events import redeem_events_ticket
+from patient.models import Booking, PatientBookingInfo, Slot
+from patient.slots import CALENDAR_HORIZON_DAYS
+from patient.streaming import streaming_response
+from .autocomplete import PrefixIndex
+from .geo import near
+from .models import DoctorProfile
+from .search import IcontainsSearchBackend, SQLiteFTSSearchBackend, get_search_backend
+from .views import (
+    AppointmentStatsView, BookingInfoView, DoctorEventsTicketView, DoctorEventsView, DoctorProfileCreateView,
+)
+from patient.views.patient_views import DoctorFacetsView, DoctorListView
+
+
+def create_doctor_user(index=0, first_name="Doc", last_name=None):
+    return CustomUser.objects.create_user(
+        email=f"doctor-{index}@example.com", password=None, role="doctor",
+        first_name=first_name, last_name=str(index) if last_name is None else last_name,
+    )
+
+
+def create_doctor(index=0, first_name="Doc", last_name=None, **overrides):
+    fields = dict(
+        phone_number="0000000000",
+        specialization="cardiology",
+        years_of_experience=5,
+        consultation_fee=500,
+        qualifications="MBBS",
+        clinic_name=f"Clinic {index}",
+        address="Main Street",
+        working_days=["monday"],
+        start_time=time(9, 0),
+        end_time=time(12, 0),
+        appointment_duration=30,
+        bio="",
+    )
+    fields.update(overrides)
+    return DoctorProfile.objects.create(user=create_doctor_user(index, first_name, last_name), **fields)
+
+
+def create_patient(index=0):
+    return CustomUser.objects.create_user(
+        email=f"patient-{index}@example.com", password=None, first_name="Pat", last_name=str(index), role="patient"
+    )
+
+
+class DoctorProfileCreateTests(TestCase):
+    def test_new_profile_gets_a_calendar(self):
+        user = create_doctor_user()
+        request = APIRequestFactory(HTTP_HOST="localhost").post("/", {
+            "phone_number": "0000000000",
+            "specialization": "cardiology",
+            "years_of_experience": 3,
+            "consultation_fee": 400,
+            "qualifications": "MBBS",
+            "clinic_name": "New Clinic",
+            "address": "Main Street",
+            "working_days": ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"],
+            "start_time": "09:00",
+            "end_time": "10:00",
+            "appointment_duration": 30,
+            "bio": "New doctor",
+        }, format="json")
+        force_authenticate(request, user=user)
+
+        response = DoctorProfileCreateView.as_view()(request)
+
+        self.assertEqual(response.status_code, 201, response.data)
+        profile = user.doctor_profile
+        self.assertEqual(profile.slots_generated_until, date.today() + timedelta(days=CALENDAR_HORIZON_DAYS - 1))
+        self.assertEqual(Slot.objects.filter(doctor=profile, status="free").count(), CALENDAR_HORIZON_DAYS * 2)
+
+
+class PrefixIndexTests(TestCase):
+    def entry(self, doctor_id, name):
+        return {"id": doctor_id, "full_name": name, "profile_photo": None}, PrefixIndex.terms_for(name, "", "")
+
+    def test_reload_older_than_a_write_is_dropped(self):
+        index = PrefixIndex()
+        index.load([self.entry(1, "Asha Rao")])
+        # A background reload reads the rows, then a write lands before it swaps them in
+        started = index.writes
+        rows = [self.entry(1, "Asha Rao")]
+        index.upsert(*self.entry(2, "Asha Menon"))
+
+        self.assertFalse(index.load(rows, unless_written_since=started))
+        self.assertEqual([entry["id"] for entry in index.search("asha")], [1, 2])
+        self.assertTrue(index.load(rows + [self.entry(2, "Asha Menon")], unless_written_since=index.writes))
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.doctor = create_doctor(clinic_name="Lotus Clinic")
+
+    def search(self, text):
+        return list(get_search_backend().search(DoctorProfile.objects.all(), text).values_list('id', flat=True))
+
+    def indexed(self, profile_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {SQLiteFTSSearchBackend.table} WHERE rowid = %s", [profile_id])
+            return cursor.fetchone()[0]
+
+    def test_index_follows_profile_and_user_writes(self):
+        self.assertIsInstance(get_search_backend(), SQLiteFTSSearchBackend)
+        self.assertEqual(self.search("lotus"), [self.doctor.id])
+
+        self.doctor.clinic_name = "Banyan Care"
+        self.doctor.save()
+        self.assertEqual((self.search("lotus"), self.search("banyan")), ([], [self.doctor.id]))
+
+        self.doctor.user.first_name = "Meera"
+        self.doctor.user.save()
+        self.assertEqual(self.search("meer"), [self.doctor.id])
+
+        doctor_id = self.doctor.id
+        self.doctor.delete()
+        self.assertEqual(self.indexed(doctor_id), 0)
+
+    def test_icontains_fallback_without_fts5(self):
+        get_search_backend.cache_clear()
+        self.addCleanup(get_search_backend.cache_clear)
+        with mock.patch("doctor.search.has_fts_index", return_value=False):
+            self.assertIsInstance(get_search_backend(), IcontainsSearchBackend)
+
+        # Writes skip the index, and the listing still filters by name and clinic
+        self.doctor.clinic_name = "Banyan Care"
+        self.doctor.save()
+        response = DoctorListView.as_view()(APIRequestFactory().get("/", {"search": "banyan"}))
+        self.assertEqual([doctor["id"] for doctor in response.data["results"]], [self.doctor.id])
+        self.assertEqual(self.search("lotus"), [])
+
+
+class NearTests(TestCase):
+    def place(self, index, latitude, longitude):
+        return create_doctor(index, latitude=latitude, longitude=longitude).id
+
+    def near(self, latitude, longitude, radius_km):
+        return [
+            (doctor.id, doctor.distance_sq ** 0.5)
+            for doctor in near(DoctorProfile.objects.all(), latitude, longitude, radius_km)
+        ]
+
+    def test_nearest_first_within_the_radius(self):
+        # 0.01 degrees of latitude is about 1.1 km
+        ids = [self.place(index, 12.97 + offset, 77.59) for index, offset in enumerate((0.05, 0.01, 0.03, 0.1))]
+        self.place(4, None, None)
+
+        found = self.near(12.97, 77.59, 10)
+
+        self.assertEqual([doctor_id for doctor_id, _ in found], [ids[1], ids[2], ids[0]])
+        self.assertAlmostEqual(found[0][1], 1.11, places=2)
+        # Just past the 10 km radius, though inside its bounding box
+        diagonal = self.place(5, 12.97 + 0.07, 77.59 + 0.07)
+        self.assertNotIn(diagonal, [doctor_id for doctor_id, _ in self.near(12.97, 77.59, 10)])
+
+    def test_search_across_the_antimeridian(self):
+        # Fiji sits on both sides of 180°
+        west = self.place(0, -17.0, 179.98)
+        east = self.place(1, -17.0, -179.97)
+        self.place(2, -17.0, 178.0)
+
+        for longitude, expected in ((179.99, [west, east]), (-179.99, [east, west])):
+            with self.subTest(longitude=longitude):
+                found = self.near(-17.0, longitude, 10)
+
+                self.assertEqual([doctor_id for doctor_id, _ in found], expected)
+                # Measured the short way round, not across the whole globe
+                self.assertLess(max(distance for _, distance in found), 5)
+
+
+class FacetsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cheap = create_doctor(0, consultation_fee=250, years_of_experience=2, working_days=["monday"])
+        create_doctor(1, specialization="neurology", consultation_fee=500, years_of_experience=10,
+                      working_days=["tuesday", "wednesday"])
+        self.senior = create_doctor(
+            2, consultation_fee=2500, years_of_experience=25,
+            working_days=["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"],
+        )
+
+    def facets(self, queries=1, **params):
+        with self.assertNumQueries(queries):
+            response = DoctorFacetsView.as_view()(APIRequestFactory().get("/", params))
+        self.assertEqual(response.status_code, 200)
+        return {
+            name: facet if name == "total" else {entry["value"]: entry["count"] for entry in facet}
+            for name, facet in response.data.items()
+        }
+
+    def test_counts(self):
+        facets = self.facets()
+
+        self.assertEqual(facets["total"], 3)
+        self.assertEqual(
+            facets["specialization"], {"cardiology": 2, "dermatology": 0, "neurology": 1, "orthopedics": 0}
+        )
+        # Lower bounds are inclusive: a 500 fee is in 500-1000
+        self.assertEqual(
+            facets["consultation_fee"], {"0-300": 1, "300-500": 0, "500-1000": 1, "1000-2000": 0, "2000+": 1}
+        )
+        self.assertEqual(facets["years_of_experience"], {"0-4": 1, "5-9": 0, "10-19": 1, "20+": 1})
+        self.assertEqual(facets["working_days"]["monday"], 2)
+        self.assertEqual(facets["working_days"]["tuesday"], 2)
+        self.assertEqual(facets["working_days"]["sunday"], 1)
+        # Counted under the listing filters
+        self.assertEqual(self.facets(specialization="cardiology")["total"], 2)
+        self.assertEqual(self.facets(day="monday")["specialization"]["neurology"], 0)
+
+    def test_profile_writes_invalidate_the_cached_counts(self):
+        self.facets()
+        self.assertEqual(self.facets(queries=0)["total"], 3)
+
+        self.cheap.consultation_fee = 1500
+        self.cheap.save()
+        facets = self.facets()
+        self.assertEqual((facets["consultation_fee"]["0-300"], facets["consultation_fee"]["1000-2000"]), (0, 1))
+
+        self.senior.delete()
+        self.assertEqual(self.facets()["total"], 2)
+
+        # A rename moves name searches, so it invalidates too
+        self.assertEqual(self.facets(search="meera")["total"], 0)
+        self.cheap.user.first_name = "Meera"
+        self.cheap.user.save()
+        self.assertEqual(self.facets(search="meera")["total"], 1)
+
+
+class AppointmentStatsTests(TestCase):
+    def setUp(self):
+        self.doctor = create_doctor()
+        self.user = self.doctor.user
+        self.patient = create_patient()
+
+    def book(self, start, days=1, patient=None, **fields):
+        return Booking.objects.create(
+            doctor=self.doctor, patient=patient or self.patient, date=date.today() + timedelta(days=days),
+            start_time=time(9, start), end_time=time(9, start + 29), **fields
+        )
+
+    def stats(self):
+        token = ProfileRefreshToken.for_user(self.user).access_token
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        # Totals with distinct patients and the fee in one aggregate, plus the series
+        with self.assertNumQueries(2):
+            response = AppointmentStatsView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_counter_bookings_are_not_online_payments(self):
+        self.book(0, payment_method="counter", payment_status="success")
+        self.book(30, payment_method="online", payment_status="pending")
+
+        stats = self.stats()
+
+        self.assertEqual(
+            (stats["online_payments"], stats["successful_payments"], stats["payment_success_rate"]), (1, 0, 0.0)
+        )
+        # The unpaid online hold is not an appointment yet, and nobody has been seen
+        self.assertEqual((stats["total_patients_seen"], stats["upcoming_appointments"]), (0, 1))
+        self.assertEqual(stats["expected_revenue"], 500)
+
+    def test_patients_are_seen_on_past_kept_appointments_only(self):
+        other = create_patient(1)
+        self.book(0, days=-2, payment_method="counter", payment_status="success")
+        self.book(0, days=-1, patient=other, payment_method="online", payment_status="failed")
+        self.book(30, days=-1, patient=other, is_rejected=True)
+        self.book(0, days=3, patient=other, payment_method="online", payment_status="success")
+
+        stats = self.stats()
+
+        self.assertEqual(stats["total_patients_seen"], 1)
+        self.assertEqual((stats["completed_appointments"], stats["upcoming_appointments"]), (1, 1))
+        self.assertEqual((stats["revenue"], stats["expected_revenue"]), (500, 500))
+
+    def test_doctor_without_bookings(self):
+        stats = self.stats()
+
+        self.assertEqual((stats["total_appointments"], stats["total_patients_seen"]), (0, 0))
+        self.assertIsNone(stats["payment_success_rate"])
+
+
+class DoctorListingPagesTests(TestCase):
+    """Every keyset page of doctor_listing, in each listing mode, costs the same single query."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctors = []
+        for index in range(24):
+            cls.doctors.append(create_doctor(
+                index, last_name="Kapoor" if index % 3 == 0 else f"Name{index}",
+                working_days=["monday"] if index % 2 else ["tuesday"],
+                # Half of them spread out north of the search point, the rest far away
+                latitude=12.97 + index * 0.004 if index < 12 else 28.6,
+                longitude=77.59 if index < 12 else 77.2,
+            ))
+
+    def walk(self, params, page_size):
+        factory = APIRequestFactory()
+        view = DoctorListView.as_view()
+        request = factory.get("/", {**params, "page_size": page_size})
+        seen = []
+        while request is not None:
+            with self.assertNumQueries(1):
+                response = view(request).render()
+            self.assertEqual(response.status_code, 200)
+            seen.extend(doctor["id"] for doctor in response.data["results"])
+            request = factory.get(response.data["next"]) if response.data["next"] else None
+        return seen
+
+    def test_listing_modes(self):
+        ids = [doctor.id for doctor in self.doctors]
+        modes = {
+            "plain": ({}, ids),
+            "search": ({"search": "kapoor"}, ids[::3]),
+            # Nearest first
+            "near": ({"near": "12.97,77.59", "radius_km": 10}, ids[:12]),
+            "day": ({"day": "monday"}, ids[1::2]),
+        }
+        for mode, (params, expected) in modes.items():
+            for page_size in (1, 5, 50):
+                with self.subTest(mode=mode, page_size=page_size):
+                    seen = self.walk(params, page_size)
+                    if mode == "search":
+                        # Relevance order: compare the set, but still exactly once each
+                        self.assertEqual(sorted(seen), sorted(expected))
+                    else:
+                        self.assertEqual(seen, expected)
+
+
+class BookingInfoPagesTests(TestCase):
+    def test_keyset_pages_cover_every_booking_in_one_query_each(self):
+        doctor = create_doctor()
+        user = doctor.user
+        patient = create_patient()
+        # Three a day over ten days, so pages split inside a day too
+        bookings = Booking.objects.bulk_create([
+            Booking(
+                doctor=doctor, patient=patient, date=date.today() + timedelta(days=index // 3),
+                start_time=time(9 + index % 3, 0), end_time=time(9 + index % 3, 29),
+            )
+            for index in range(30)
+        ])
+        PatientBookingInfo.objects.bulk_create([
+            PatientBookingInfo(booking=booking, full_name="Pat", phone_number="0", date_of_birth=date(1990, 1, 1))
+            for booking in bookings
+        ])
+        expected = list(
+            Booking.objects.filter(doctor=doctor).order_by('-date', 'start_time', 'id').values_list('id', flat=True)
+        )
+        token = ProfileRefreshToken.for_user(user).access_token
+        factory = APIRequestFactory()
+
+        seen = []
+        request = factory.get("/", {"page_size": 7}, HTTP_AUTHORIZATION=f"Bearer {token}")
+        while request is not None:
+            # Claims authentication costs no query, the page one
+            with self.assertNumQueries(1):
+                response = BookingInfoView.as_view()(request)
+            seen.extend(booking["id"] for booking in response.data["results"])
+            next_url = response.data["next"]
+            request = factory.get(next_url, HTTP_AUTHORIZATION=f"Bearer {token}") if next_url else None
+
+        self.assertEqual(seen, expected)
+
+
+class BookingInfoStreamTests(TestCase):
+    """?stream= must send the bytes the buffered response renders, whatever the chunking."""
+
+    @classmethod
+    def setUpTestData(cls):
+        doctor = create_doctor()
+        cls.user = doctor.user
+        patient = create_patient()
+        for index in range(5):
+            booking = Booking.objects.create(
+                doctor=doctor, patient=patient, date=date.today() + timedelta(days=index),
+                start_time=time(9, 0), end_time=time(9, 30), is_rejected=index == 3,
+            )
+            # One booking lost its info row; the others carry text JSON has to escape
+            if index != 2:
+                PatientBookingInfo.objects.create(
+                    booking=booking, full_name="Zoë Ñúñez", phone_number="0", date_of_birth=date(1990, 1, 1),
+                    reason_to_visit='Said "hi"\u2028then left', symptoms_or_concerns="头痛",
+                )
+
+    def get(self, **params):
+        token = ProfileRefreshToken.for_user(self.user).access_token
+        request = APIRequestFactory().get("/", params, HTTP_AUTHORIZATION=f"Bearer {token}")
+        return BookingInfoView.as_view()(request)
+
+    def test_streamed_bytes_equal_the_rendered_page(self):
+        for params in ({}, {"from": date.today().isoformat(), "to": date.today().isoformat()},
+                       # An empty page is still "[]"
+                       {"to": (date.today() - timedelta(days=1)).isoformat()}):
+            for chunk_size in (1, 2, 100):
+                with self.subTest(chunk_size=chunk_size, **params):
+                    expected = JSONRenderer().render(self.get(**params).data)
+
+                    with mock.patch(
+                        "doctor.views.streaming_response",
+                        lambda items, stream_format: streaming_response(items, stream_format, chunk_size),
+                    ):
+                        response = self.get(stream="json", **params)
+
+                    self.assertEqual(response["Content-Type"], "application/json")
+                    self.assertEqual(b"".join(response.streaming_content), expected)
+
+    def test_ndjson_lines_are_the_rendered_items(self):
+        items = self.get().data
+
+        response = self.get(stream="ndjson")
+
+        lines = b"".join(response.streaming_content).splitlines()
+        self.assertEqual(lines, [JSONRenderer().render(item) for item in items])
+
+
+class DoctorEventsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.doctor = create_doctor()
+        self.user = self.doctor.user
+
+    def ticket(self, factory):
+        request = factory.post("/")
+        force_authenticate(request, user=self.user)
+        return DoctorEventsTicketView.as_view()(request)
+
+    def test_wsgi_server_is_told_to_poll(self):
+        # A stream would hold a WSGI worker forever
+        token = ProfileRefreshToken.for_user(self.user).access_token
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(async_to_sync(DoctorEventsView.as_view())(request).status_code, 501)
+        self.assertEqual(self.ticket(APIRequestFactory()).status_code, 501)
+
+    def test_ticket_opens_one_stream(self):
+        response = self.ticket(AsyncRequestFactory())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(redeem_events_ticket(response.data["ticket"]), self.doctor.id)
+        self.assertIsNone(redeem_events_ticket(response.data["ticket"]))
+        self.assertIsNone(redeem_events_ticket("forged"))
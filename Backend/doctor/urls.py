@@ -1,11 +1,16 @@
 from django.urls import path
-from .views import DoctorProfileCreateView,DoctorProfileCheckView, DoctorProfileView,BookingInfoView,AppointmentStatsView,DoctorPublicDetailView
+from .views import DoctorProfileCreateView,DoctorProfileCheckView, DoctorProfileView,BookingInfoView,BookingInfoSyncView,BookingQueueView,BookingExportView,AppointmentStatsView,DoctorPublicDetailView,DoctorEventsView,DoctorEventsTicketView
 
 urlpatterns = [
     path('doctor_profile_create/', DoctorProfileCreateView.as_view(), name='doctor-profile-create'),
     path('doctor_profile_check/', DoctorProfileCheckView.as_view(), name='doctor_profile_check'),
     path('doctor_profile/', DoctorProfileView.as_view(), name='doctor_profile_retrieve'),
     path('booking-info/', BookingInfoView.as_view(), name='booking-info'),
+    path('booking-info/sync/', BookingInfoSyncView.as_view(), name='booking-info-sync'),
+    path('booking-queue/', BookingQueueView.as_view(), name='booking-queue'),
+    path('booking-export/', BookingExportView.as_view(), name='booking-export'),
+    path('events/', DoctorEventsView.as_view(), name='doctor-events'),
+    path('events/ticket/', DoctorEventsTicketView.as_view(), name='doctor-events-ticket'),
     path('appointment-stats/', AppointmentStatsView.as_view(), name='appointment-stats'),
     path('<int:id>/details/', DoctorPublicDetailView.as_view(), name='doctor-details'),
     
@@ -1,19 +1,54 @@
 from rest_framework import generics, permissions
 from .models import DoctorProfile
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import ClaimsJWTAuthentication
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from .serializers import DoctorProfileSerializer
-from patient.serializers import PatientAppointmentSerializer
+from .conditional import not_modified, profile_validators, set_validators
 from rest_framework.exceptions import PermissionDenied
 from patient.models import Booking
-from datetime import date
+from patient.events import doctor_channel, get_broker, issue_events_ticket, redeem_events_ticket
+from patient.exports import EXPORT_FORMATS, csv_chunks, export_queryset, export_rows, write_parquet
+from patient.pagination import BookingKeysetPagination
+from patient.rows import iter_appointments, serialize_appointments
+from patient.streaming import STREAM_CHUNK_SIZE, STREAM_FORMATS, streaming_response
+from patient.sync import booking_delta, parse_sync_params
+from patient.stats import MAX_SERIES_DAYS, STATS_SERIES_DAYS, doctor_stats
+from datetime import date, datetime, timedelta
+from django.utils import timezone
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+import json
+import tempfile
 import logging
 
 logger = logging.getLogger(__name__)
 
+BOOKING_WINDOWS = ('today', 'week')
+SSE_HEARTBEAT_SECONDS = 15
+SSE_RETRY_MS = 3000
+
+
+def parse_date_param(value):
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+
+def booking_window(name):
+    """(start, end) dates of a named window; raises ValueError for unknown names."""
+    today = date.today()
+    if name == 'today':
+        return today, today
+    if name == 'week':
+        return today, today + timedelta(days=6)
+    raise ValueError(name)
+
 
 class DoctorProfileCreateView(generics.CreateAPIView):
     serializer_class = DoctorProfileSerializer
@@ -39,6 +74,7 @@ class DoctorProfileCreateView(generics.CreateAPIView):
     def perform_create(self, serializer):
         if self.request.user.role != 'doctor':
             raise PermissionDenied("Only doctors can create a profile.")
+        # Saving a new profile builds its calendar, so it is bookable right away
         serializer.save(user=self.request.user)
 
 
@@ -88,6 +124,7 @@ class DoctorProfileView(APIView):
         )
 
         if serializer.is_valid():
+            # A schedule change regenerates the slot calendar in DoctorProfile.save
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
         
@@ -96,7 +133,7 @@ class DoctorProfileView(APIView):
 
 
 class BookingInfoView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -109,18 +146,143 @@ class BookingInfoView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Prefetch patient_info to ensure each booking has its related info
+        # Same output as PatientAppointmentSerializer, from one flat joined query
+        bookings = Booking.objects.filter(doctor=doctor_profile).order_by('-date', 'start_time')
+
+        # Date window: ?window=today|week, or ?from=/&to= (YYYY-MM-DD, both optional)
+        window = request.query_params.get('window')
+        try:
+            if window:
+                start_date, end_date = booking_window(window)
+            else:
+                start_date = parse_date_param(request.query_params.get('from'))
+                end_date = parse_date_param(request.query_params.get('to'))
+        except ValueError:
+            return Response(
+                {"error": f"Use window={'|'.join(BOOKING_WINDOWS)} or from/to as YYYY-MM-DD"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if start_date:
+            bookings = bookings.filter(date__gte=start_date)
+        if end_date:
+            bookings = bookings.filter(date__lte=end_date)
+
+        # ?stream=json|ndjson writes rows as they are read, so memory stays flat for long histories
+        stream_format = request.query_params.get('stream')
+        if stream_format:
+            if stream_format not in STREAM_FORMATS:
+                return Response(
+                    {"error": f"'stream' must be one of: {', '.join(STREAM_FORMATS)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return streaming_response(iter_appointments(bookings, STREAM_CHUNK_SIZE), stream_format)
+
+        # ?page_size= / ?cursor= switch to keyset pages of {"next", "results"}
+        if 'page_size' in request.query_params or 'cursor' in request.query_params:
+            page = BookingKeysetPagination().paginate(request, bookings, serialize_appointments)
+            return Response(page, status=status.HTTP_200_OK)
+
+        return Response(serialize_appointments(bookings), status=status.HTTP_200_OK)
+
+
+class BookingInfoSyncView(APIView):
+    """Bookings changed since ?since=<cursor>, so offline copies refresh in O(changes)."""
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            doctor_profile = request.user.doctor_profile
+        except DoctorProfile.DoesNotExist:
+            return Response({"error": "Doctor profile not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        since, page_size = parse_sync_params(request.query_params)
+        bookings = Booking.objects.filter(doctor=doctor_profile)
+        delta = booking_delta(bookings, {"doctor_id": doctor_profile.id}, since, page_size, serialize_appointments)
+        return Response(delta, status=status.HTTP_200_OK)
+
+
+class BookingQueueView(APIView):
+    """A doctor's queue for one day (?date=, default today) in appointment order."""
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            doctor_profile = request.user.doctor_profile
+        except DoctorProfile.DoesNotExist:
+            return Response({"error": "Doctor profile not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            day = parse_date_param(request.query_params.get('date')) or date.today()
+        except ValueError:
+            return Response({"error": "Invalid date format, use YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Equality on (doctor, date) + ORDER BY start_time reads a (doctor, date, start_time) index in order, no sort
         bookings = Booking.objects.filter(
-            doctor=doctor_profile
-        ).select_related('patient_info').order_by('-date', 'start_time')
-        
-        serializer = PatientAppointmentSerializer(bookings, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+            doctor=doctor_profile, date=day, is_rejected=False
+        ).exclude(hold_expires_at__lte=timezone.now()).order_by('start_time')
+        return Response({"date": day.isoformat(), "queue": serialize_appointments(bookings)})
 
-class AppointmentStatsView(APIView): #this voew gives the ocunt of appointments
+
+class BookingExportView(APIView):
+    """CSV/Parquet export of bookings with patient info: a doctor's own, or any (staff)."""
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def get(self, request):
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"'file_format' must be one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        params = request.query_params
+        try:
+            start_date = parse_date_param(params.get('from'))
+            end_date = parse_date_param(params.get('to'))
+            doctor_id = int(params['doctor_id']) if params.get('doctor_id') else None
+        except ValueError:
+            return Response(
+                {"error": "Invalid 'from'/'to' (YYYY-MM-DD) or 'doctor_id'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Staff may export any doctor (or everyone); doctors only their own bookings
+        if not request.user.is_staff:
+            try:
+                doctor_id = request.user.doctor_profile.id
+            except DoctorProfile.DoesNotExist:
+                return Response({"error": "Doctor profile not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        rows = export_rows(export_queryset(doctor_id, start_date, end_date))
+        filename = f"bookings-{doctor_id or 'all'}.{file_format}"
+
+        if file_format == "csv":
+            response = StreamingHttpResponse(csv_chunks(rows), content_type=EXPORT_FORMATS["csv"])
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+
+        # Parquet's footer comes last, so the file is built first; past 16 MB it spills to disk
+        spool = tempfile.SpooledTemporaryFile(max_size=16 * 2**20)
+        try:
+            write_parquet(rows, spool)
+        except ImportError:
+            spool.close()
+            return Response(
+                {"error": "Parquet export needs pyarrow installed"},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        spool.seek(0)
+        return FileResponse(
+            spool, as_attachment=True, filename=filename, content_type=EXPORT_FORMATS["parquet"]
+        )
+
+class AppointmentStatsView(APIView): #this voew gives the ocunt of appointments
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
     def get(self, request):
         try:
             doctor_profile = request.user.doctor_profile
@@ -130,21 +292,13 @@ class AppointmentStatsView(APIView): #this voew gives the ocunt of appointments
                 status=404
             )
 
-        # Calculate stats
-        bookings = Booking.objects.filter(doctor=doctor_profile)
-        total_appointments = bookings.count()
-        upcoming_appointments = bookings.filter(date__gt=date.today()).count()
-
-        # Example: hardcoded for now
-        total_patients_seen = 0  
-        average_rating = 4.8  
+        try:
+            days = max(1, min(int(request.query_params.get('days', STATS_SERIES_DAYS)), MAX_SERIES_DAYS))
+        except ValueError:
+            return Response({"error": "'days' must be an integer"}, status=400)
 
-        response_data = {
-            "total_appointments": total_appointments,
-            "upcoming_appointments": upcoming_appointments,
-            "total_patients_seen": total_patients_seen,
-            "average_rating": average_rating
-        }
+        # Read from the per-doctor counter tables, so the cost does not grow with history
+        response_data = doctor_stats(doctor_profile, days)
 
         return Response(response_data, status=200)
 
@@ -152,10 +306,107 @@ class DoctorPublicDetailView(APIView):
     permission_classes = [permissions.AllowAny]  
 
     def get(self, request, id):
+        # Revalidate from updated_at alone before loading and serializing the profile
+        updated_at = DoctorProfile.objects.filter(id=id).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return Response({"error": "Doctor not found"}, status=404)
+        etag, last_modified = profile_validators(id, updated_at)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+
         try:
-            doctor = DoctorProfile.objects.get(id=id)
+            doctor = DoctorProfile.objects.select_related('user').get(id=id)
         except DoctorProfile.DoesNotExist:
             return Response({"error": "Doctor not found"}, status=404)
 
         serializer = DoctorProfileSerializer(doctor, context={'request': request})
-        return Response(serializer.data, status=200)
+        return set_validators(Response(serializer.data, status=200), etag, last_modified)
+
+
+# Returned instead of a stream when the app is served over WSGI (runserver, gunicorn)
+SSE_UNAVAILABLE = {
+    "error": "Live events need the ASGI server (uvicorn main.asgi:application); poll booking-info/sync/ instead"
+}
+
+
+class DoctorEventsTicketView(APIView):
+    """A short-lived, single-use ticket to open the events stream with.
+
+    EventSource cannot send the Authorization header, and an access token in
+    the URL would end up in server and proxy logs. Answers 501 when live
+    events are unavailable, so clients fall back to polling before opening
+    a stream.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not isinstance(request._request, ASGIRequest):
+            return Response(SSE_UNAVAILABLE, status=status.HTTP_501_NOT_IMPLEMENTED)
+        try:
+            doctor_profile = request.user.doctor_profile
+        except DoctorProfile.DoesNotExist:
+            return Response({"error": "Doctor profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"ticket": issue_events_ticket(doctor_profile.id)}, status=status.HTTP_200_OK)
+
+
+class DoctorEventsView(View):
+    """Server-sent events for the logged-in doctor's bookings.
+
+    Emits booking-created, booking-rejected and payment-status-changed as they
+    happen. Needs the ASGI entry point (uvicorn main.asgi:application), where
+    every open stream is a coroutine instead of a worker thread; under WSGI it
+    answers 501 rather than tying up a worker forever. Opened with ?ticket=
+    from DoctorEventsTicketView, or the Authorization header.
+    """
+
+    def authenticate_doctor(self, request):
+        """(doctor profile id, None) or (None, error status)."""
+        ticket = request.GET.get('ticket')
+        if ticket:
+            doctor_id = redeem_events_ticket(ticket)
+            return (doctor_id, None) if doctor_id is not None else (None, 401)
+        auth = ClaimsJWTAuthentication()
+        header = auth.get_header(request)
+        raw_token = auth.get_raw_token(header) if header else None
+        if not raw_token:
+            return None, 401
+        try:
+            user = auth.get_user(auth.get_validated_token(raw_token))
+        except (InvalidToken, AuthenticationFailed):
+            return None, 401
+        try:
+            return user.doctor_profile.id, None
+        except DoctorProfile.DoesNotExist:
+            return None, 404
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse(SSE_UNAVAILABLE, status=501)
+        doctor_id, error = await sync_to_async(self.authenticate_doctor)(request)
+        if error == 401:
+            return JsonResponse({"error": "Authentication credentials were not provided or are invalid"}, status=401)
+        if error == 404:
+            return JsonResponse({"error": "Doctor profile not found"}, status=404)
+
+        response = StreamingHttpResponse(event_stream(doctor_channel(doctor_id)), content_type="text/event-stream")
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx-style proxies from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+async def event_stream(channel):
+    # Subscribe on the loop that iterates the response, so events are delivered to it
+    subscription = get_broker().subscribe(channel)
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while True:
+            event = await subscription.get(timeout=SSE_HEARTBEAT_SECONDS)
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        subscription.close()
@@ -3,6 +3,12 @@ ASGI config for main project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the app with it (``uvicorn main.asgi:application --port 8000``, add
+``--reload`` in development) rather than runserver or another WSGI server:
+the doctor events stream (doctor/events/) holds its connection open, which
+only ASGI can do without a thread per listener. Over WSGI that endpoint
+answers 501 and the dashboard polls instead.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
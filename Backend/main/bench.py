@@ -0,0 +1,62 @@
+# main/bench.py
+# Shared helpers for the bench_* management commands of every app.
+import time
+from contextlib import contextmanager
+from datetime import time as dtime
+
+from django.db import transaction
+
+from accounts.models import CustomUser
+from doctor.models import DoctorProfile
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Run a benchmark inside a transaction that is always rolled back."""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def timed(fn, repeat=1):
+    """Return the best wall time of `repeat` runs of fn() in milliseconds."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def make_user(email, role="patient", **extra):
+    return CustomUser.objects.create_user(
+        email=email, password=None, first_name="Bench", last_name=role.title(), role=role, **extra
+    )
+
+
+def make_doctor(index=0, **overrides):
+    fields = dict(
+        phone_number="0000000000",
+        specialization="cardiology",
+        years_of_experience=5,
+        consultation_fee=500,
+        qualifications="MBBS",
+        clinic_name=f"Bench Clinic {index}",
+        address="Bench Street",
+        working_days=["monday", "tuesday", "wednesday", "thursday", "friday", "saturday"],
+        start_time=dtime(9, 0),
+        end_time=dtime(17, 0),
+        appointment_duration=30,
+        bio="Benchmark doctor",
+    )
+    fields.update(overrides)
+    user = make_user(f"bench-doctor-{index}@example.com", role="doctor")
+    return DoctorProfile.objects.create(user=user, **fields)
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -82,6 +83,8 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",  # React frontend
 ]
 CORS_ALLOW_CREDENTIALS = True
+# Let the browser read the total of paginated appointment lists
+CORS_EXPOSE_HEADERS = ["X-Total-Count"]
 
 
 # Database
@@ -94,6 +97,16 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'doctor-appointment',
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -113,6 +126,29 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing: PASSWORD_HASHER=argon2|bcrypt|pbkdf2 picks the hasher for new passwords. The
+# others stay listed so existing hashes still verify, and are rehashed with the chosen one on login.
+PASSWORD_HASHER_CHOICES = {
+    "argon2": "django.contrib.auth.hashers.Argon2PasswordHasher",  # needs argon2-cffi
+    "bcrypt": "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",  # needs bcrypt
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+}
+PASSWORD_HASHER = os.environ.get("PASSWORD_HASHER", "pbkdf2")
+if PASSWORD_HASHER not in PASSWORD_HASHER_CHOICES:
+    raise ImproperlyConfigured(
+        f"PASSWORD_HASHER={PASSWORD_HASHER!r} is not one of: {', '.join(PASSWORD_HASHER_CHOICES)}"
+    )
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_CHOICES[PASSWORD_HASHER],
+    *(path for name, path in PASSWORD_HASHER_CHOICES.items() if name != PASSWORD_HASHER),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+# Threads checking passwords for the async login view (None: one per CPU)
+LOGIN_HASH_WORKERS = None
+# ModelBackend, with the async login's hash checks on those threads (accounts/passwords.py)
+AUTHENTICATION_BACKENDS = ["accounts.passwords.PooledModelBackend"]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -156,6 +192,9 @@ from datetime import timedelta
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
+    # Tokens carry role/profile claims (accounts/tokens.py), re-read on every refresh
+    "TOKEN_OBTAIN_SERIALIZER": "accounts.serializers.ProfileTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "accounts.serializers.ProfileTokenRefreshSerializer",
 }
 BASE_DIR = Path(__file__).resolve().parent.parent
 
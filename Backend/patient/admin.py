@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Booking,PatientBookingInfo
+from .models import Booking,DailyBookingStats,PatientBookingInfo,ReleasedHold,Slot
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
@@ -12,4 +12,22 @@ class BookingAdmin(admin.ModelAdmin):
 class PatientBookingInfoAdmin(admin.ModelAdmin):
     list_display = ('full_name', 'booking', 'phone_number', 'email', 'date_of_birth')
     search_fields = ('full_name', 'email', 'phone_number', 'booking__doctor__user__first_name')
-    list_filter = ('booking__doctor', 'date_of_birth')
\ No newline at end of file
+    list_filter = ('booking__doctor', 'date_of_birth')
+
+@admin.register(Slot)
+class SlotAdmin(admin.ModelAdmin):
+    list_display = ('doctor', 'date', 'start_time', 'end_time', 'status')
+    list_filter = ('status', 'date')
+    ordering = ('date', 'start_time')
+
+@admin.register(ReleasedHold)
+class ReleasedHoldAdmin(admin.ModelAdmin):
+    list_display = ('booking_id', 'doctor', 'patient', 'date', 'start_time', 'payment_id', 'rebooked', 'needs_refund')
+    list_filter = ('needs_refund', 'date')
+    ordering = ('-released_at',)
+
+@admin.register(DailyBookingStats)
+class DailyBookingStatsAdmin(admin.ModelAdmin):
+    list_display = ('doctor', 'date', 'booked', 'kept', 'rejected', 'online', 'paid')
+    list_filter = ('date',)
+    ordering = ('-date',)
@@ -0,0 +1,132 @@
+# patient/events.py
+import asyncio
+import secrets
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+BOOKING_CREATED = "booking-created"
+BOOKING_REJECTED = "booking-rejected"
+PAYMENT_STATUS_CHANGED = "payment-status-changed"
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# EventSource cannot send headers, so the stream is opened with a short-lived,
+# single-use ticket instead of putting the access token in the URL
+EVENTS_TICKET_SALT = "doctor-events-ticket"
+EVENTS_TICKET_MAX_AGE = 30
+
+
+def doctor_channel(doctor_id):
+    return f"doctor:{doctor_id}"
+
+
+def issue_events_ticket(doctor_id):
+    return signing.dumps({"doctor_id": doctor_id, "nonce": secrets.token_urlsafe(12)}, salt=EVENTS_TICKET_SALT)
+
+
+def redeem_events_ticket(ticket):
+    """The doctor profile id a ticket was issued for, or None if it is invalid, expired or used."""
+    try:
+        payload = signing.loads(ticket, salt=EVENTS_TICKET_SALT, max_age=EVENTS_TICKET_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    # The first redemption marks the nonce as used until the ticket would have expired anyway
+    if not cache.add(f"doctor_events:ticket:{payload['nonce']}", True, timeout=EVENTS_TICKET_MAX_AGE):
+        return None
+    return payload["doctor_id"]
+
+
+class Subscription:
+    """One listener's queue, bound to the event loop it was created on."""
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def offer(self, event):
+        # Runs on self.loop; a listener that stopped reading loses events instead of memory
+        if not self.queue.full():
+            self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """Next event, or None if `timeout` seconds pass first."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Publish/subscribe between threads and event loops of this process.
+
+    Only listeners connected to the same process receive an event; multi-process
+    deployments set settings.DOCTOR_EVENTS_BROKER to a broker-backed class with
+    the same subscribe()/publish() interface.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, channel):
+        """Must be called from the event loop that will read the subscription."""
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            listeners = self._subscriptions.get(subscription.channel)
+            if listeners is not None:
+                listeners.discard(subscription)
+                if not listeners:
+                    del self._subscriptions[subscription.channel]
+
+    def publish(self, channel, event):
+        """Deliver `event` to every listener of `channel`; safe to call from any thread."""
+        with self._lock:
+            listeners = list(self._subscriptions.get(channel, ()))
+        for subscription in listeners:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The listener's loop is gone
+                self.unsubscribe(subscription)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    path = getattr(settings, 'DOCTOR_EVENTS_BROKER', None)
+    return import_string(path)() if path else InProcessBroker()
+
+
+def booking_event(event_type, booking):
+    return {
+        "type": event_type,
+        "booking_id": booking.id,
+        "date": booking.date.isoformat(),
+        "start_time": booking.start_time.isoformat(),
+        "is_rejected": booking.is_rejected,
+        "payment_method": booking.payment_method,
+        "payment_status": booking.payment_status,
+    }
+
+
+def publish_booking_event(event_type, booking):
+    """Tell the booking's doctor about a change once the surrounding transaction commits."""
+    event = booking_event(event_type, booking)
+    channel = doctor_channel(booking.doctor_id)
+    transaction.on_commit(lambda: get_broker().publish(channel, event))
@@ -0,0 +1,117 @@
+# patient/exports.py
+import csv
+import io
+
+from .models import Booking
+
+EXPORT_CHUNK_SIZE = 5000
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# (column name, Booking.values() key, Parquet type name) in file order
+EXPORT_COLUMNS = [
+    ("booking_id", "id", "int64"),
+    ("doctor_id", "doctor_id", "int64"),
+    ("doctor_first_name", "doctor__user__first_name", "string"),
+    ("doctor_last_name", "doctor__user__last_name", "string"),
+    ("patient_id", "patient_id", "int64"),
+    ("patient_account_email", "patient__email", "string"),
+    ("date", "date", "date"),
+    ("start_time", "start_time", "time"),
+    ("end_time", "end_time", "time"),
+    ("created_at", "created_at", "timestamp"),
+    ("is_rejected", "is_rejected", "bool"),
+    ("rejection_reason", "rejection_reason", "string"),
+    ("payment_method", "payment_method", "string"),
+    ("payment_status", "payment_status", "string"),
+    ("payment_id", "payment_id", "string"),
+    ("patient_full_name", "patient_info__full_name", "string"),
+    ("patient_email", "patient_info__email", "string"),
+    ("patient_phone_number", "patient_info__phone_number", "string"),
+    ("patient_date_of_birth", "patient_info__date_of_birth", "date"),
+    ("reason_to_visit", "patient_info__reason_to_visit", "string"),
+    ("symptoms_or_concerns", "patient_info__symptoms_or_concerns", "string"),
+]
+
+
+def export_queryset(doctor_id=None, start_date=None, end_date=None):
+    """Bookings to export, oldest first; every filter is optional."""
+    bookings = Booking.objects.all()
+    if doctor_id is not None:
+        bookings = bookings.filter(doctor_id=doctor_id)
+    if start_date is not None:
+        bookings = bookings.filter(date__gte=start_date)
+    if end_date is not None:
+        bookings = bookings.filter(date__lte=end_date)
+    return bookings.order_by('date', 'start_time', 'id')
+
+
+def export_rows(bookings, chunk_size=EXPORT_CHUNK_SIZE):
+    """Flat tuples in EXPORT_COLUMNS order, fetched chunk_size rows at a time."""
+    keys = [key for _, key, _ in EXPORT_COLUMNS]
+    return bookings.values_list(*keys).iterator(chunk_size=chunk_size)
+
+
+def csv_chunks(rows, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the CSV file (header first) in pieces of chunk_size rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _, _ in EXPORT_COLUMNS])
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_size:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode()
+
+
+def parquet_schema():
+    import pyarrow as pa
+
+    types = {
+        "int64": pa.int64(),
+        "string": pa.string(),
+        "date": pa.date32(),
+        "time": pa.time64("us"),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+        "bool": pa.bool_(),
+    }
+    return pa.schema([(name, types[kind]) for name, _, kind in EXPORT_COLUMNS])
+
+
+def write_parquet(rows, target, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write rows to `target` (path or binary file) as one Parquet row group per chunk.
+
+    Only one chunk is held in memory at a time. Returns the number of rows written.
+    Needs pyarrow.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = parquet_schema()
+
+    def record_batch(batch):
+        columns = zip(*batch) if batch else [[] for _ in schema]
+        return pa.record_batch(
+            [pa.array(list(values), type=field.type) for values, field in zip(columns, schema)], schema=schema
+        )
+
+    written = 0
+    with pq.ParquetWriter(target, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                writer.write_batch(record_batch(batch))
+                written += len(batch)
+                batch = []
+        if batch or not written:
+            writer.write_batch(record_batch(batch))
+            written += len(batch)
+    return written
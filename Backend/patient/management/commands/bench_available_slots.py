@@ -0,0 +1,74 @@
+from datetime import date, datetime, timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from patient.models import Booking
+from patient.views.patient_views import DoctorAvailableSlotsView
+from main.bench import make_doctor, make_user, rolled_back, timed
+
+
+class Command(BaseCommand):
+    help = "Compare the multi-day availability mode against N single-day requests (cold cache)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30, help="Window size in days")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+
+    def handle(self, *args, **kwargs):
+        days = kwargs["days"]
+        repeat = kwargs["repeat"]
+        factory = APIRequestFactory()
+        view = DoctorAvailableSlotsView.as_view()
+
+        with rolled_back():
+            doctor = make_doctor()
+            patient = make_user("bench-patient@example.com")
+            start_date = date.today() + timedelta(days=1)
+
+            # Book every third slot of the window
+            bookings = []
+            for offset in range(days):
+                day = start_date + timedelta(days=offset)
+                current = datetime.combine(day, doctor.start_time)
+                while current.time() < doctor.end_time:
+                    bookings.append(Booking(
+                        doctor=doctor, patient=patient, date=day,
+                        start_time=current.time(),
+                        end_time=(current + timedelta(minutes=30)).time(),
+                    ))
+                    current += timedelta(minutes=90)
+            Booking.objects.bulk_create(bookings)
+
+            def call(params):
+                request = factory.get("/", params)
+                force_authenticate(request, user=patient)
+                response = view(request, doctor_id=doctor.id)
+                response.render()
+
+            def single_day_calls():
+                cache.clear()
+                for offset in range(days):
+                    call({"date": (start_date + timedelta(days=offset)).isoformat()})
+
+            def range_call():
+                cache.clear()
+                call({"from": start_date.isoformat(), "days": days})
+
+            with CaptureQueriesContext(connection) as single_queries:
+                single_day_calls()
+            with CaptureQueriesContext(connection) as range_queries:
+                range_call()
+
+            single_ms = timed(single_day_calls, repeat)
+            range_ms = timed(range_call, repeat)
+            # Warm run: the availability cache already holds the window
+            cached_ms = timed(lambda: call({"from": start_date.isoformat(), "days": days}), repeat)
+
+        self.stdout.write(f"{days} single-day calls: {single_ms:8.2f} ms, {len(single_queries)} queries")
+        self.stdout.write(f"1 range call:        {range_ms:8.2f} ms, {len(range_queries)} queries")
+        self.stdout.write(f"1 cached range call: {cached_ms:8.2f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {single_ms / range_ms:.1f}x"))
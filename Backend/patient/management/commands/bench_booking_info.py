@@ -0,0 +1,87 @@
+from datetime import date, time as dtime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from doctor.views import BookingInfoView, BookingQueueView
+from patient.models import Booking, PatientBookingInfo
+from patient.pagination import BookingKeysetPagination
+from main.bench import make_doctor, make_user, rolled_back, timed
+
+SLOTS_PER_DAY = 16
+
+
+class Command(BaseCommand):
+    help = "Query counts and latency of booking-info/ and booking-queue/ for a doctor with a long history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bookings", type=int, default=50000, help="Historical bookings of the doctor")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+
+    def handle(self, *args, **kwargs):
+        factory = APIRequestFactory(HTTP_HOST="localhost")
+        total = kwargs["bookings"]
+
+        with rolled_back():
+            doctor = make_doctor()
+            patient = make_user("bench-info-patient@example.com")
+            # 16 slots a day walking back from a week ahead, so today and this week are populated
+            first_day = date.today() + timedelta(days=6)
+            bookings = Booking.objects.bulk_create([
+                Booking(
+                    doctor=doctor, patient=patient,
+                    date=first_day - timedelta(days=i // SLOTS_PER_DAY),
+                    start_time=dtime(9 + i % SLOTS_PER_DAY // 2, 30 * (i % 2)),
+                    end_time=dtime(9 + i % SLOTS_PER_DAY // 2, 30 * (i % 2) + 29),
+                )
+                for i in range(total)
+            ], batch_size=2000)
+            PatientBookingInfo.objects.bulk_create([
+                PatientBookingInfo(
+                    booking=booking, full_name="Bench Patient", phone_number="0000000000",
+                    date_of_birth=date(1990, 1, 1),
+                )
+                for booking in bookings
+            ], batch_size=2000)
+
+            # A cursor half way through the history, as a deep page would carry
+            middle = Booking.objects.filter(doctor=doctor).order_by('-date', 'start_time', 'id')[total // 2]
+            deep_cursor = BookingKeysetPagination().encode_cursor(
+                {"date": middle.date.isoformat(), "start_time": middle.start_time.isoformat(), "id": middle.id}
+            )
+
+            cases = [
+                ("full history", BookingInfoView, {}),
+                ("window=today", BookingInfoView, {"window": "today"}),
+                ("window=week", BookingInfoView, {"window": "week"}),
+                ("first page (50)", BookingInfoView, {"page_size": 50}),
+                ("deep page (50)", BookingInfoView, {"page_size": 50, "cursor": deep_cursor}),
+                ("today's queue", BookingQueueView, {}),
+            ]
+            self.stdout.write(self.style.MIGRATE_HEADING(f"Doctor with {total} bookings"))
+            for label, view_class, params in cases:
+                view = view_class.as_view()
+
+                def call():
+                    request = factory.get("/", params)
+                    force_authenticate(request, user=doctor.user)
+                    return view(request).render()
+
+                with CaptureQueriesContext(connection) as queries:
+                    response = call()
+                repeat = 1 if label == "full history" else kwargs["repeat"]
+                elapsed = timed(call, repeat)
+                self.stdout.write(
+                    f"  {label:16} {elapsed:9.2f} ms  queries: {len(queries)}  "
+                    f"status: {response.status_code}  bytes: {len(response.content)}"
+                )
+
+            with connection.cursor() as cursor:
+                sql, params = Booking.objects.filter(
+                    doctor=doctor, date=date.today(), is_rejected=False
+                ).order_by('start_time').query.sql_with_params()
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                plan = " / ".join(str(row[-1]) for row in cursor.fetchall())
+            self.stdout.write(f"  queue plan: {plan}")
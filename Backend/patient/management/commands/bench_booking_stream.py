@@ -0,0 +1,61 @@
+import tracemalloc
+from datetime import date, time as dtime, timedelta
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from doctor.views import BookingInfoView
+from patient.models import Booking, PatientBookingInfo
+from main.bench import make_doctor, make_user, rolled_back, timed
+
+
+class Command(BaseCommand):
+    help = "Peak memory and time of booking-info/ as one JSON blob vs the streaming modes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10000,50000", help="Comma-separated booking history sizes")
+
+    def consume(self, response):
+        # Drain the body the way the WSGI server would, without keeping it
+        size = 0
+        for chunk in (response.streaming_content if response.streaming else [response.render().content]):
+            size += len(chunk)
+        return size
+
+    def handle(self, *args, **kwargs):
+        factory = APIRequestFactory(HTTP_HOST="localhost")
+        view = BookingInfoView.as_view()
+
+        with rolled_back():
+            doctor = make_doctor()
+            patient = make_user("bench-stream-patient@example.com")
+            created = 0
+            for size in sorted(int(size) for size in kwargs["sizes"].split(",")):
+                # Slots every 30 minutes, 16 a day, walking back from today
+                bookings = Booking.objects.bulk_create([
+                    Booking(
+                        doctor=doctor, patient=patient,
+                        date=date.today() - timedelta(days=i // 16),
+                        start_time=dtime(9 + i % 16 // 2, 30 * (i % 2)),
+                        end_time=dtime(9 + i % 16 // 2, 30 * (i % 2) + 29),
+                    )
+                    for i in range(created, size)
+                ], batch_size=2000)
+                PatientBookingInfo.objects.bulk_create([
+                    PatientBookingInfo(
+                        booking=booking, full_name="Bench Patient", phone_number="0000000000",
+                        date_of_birth=date(1990, 1, 1), reason_to_visit="Follow-up visit",
+                    )
+                    for booking in bookings
+                ], batch_size=2000)
+                created = size
+
+                self.stdout.write(self.style.MIGRATE_HEADING(f"{size} bookings"))
+                for mode in (None, "json", "ndjson"):
+                    request = factory.get("/", {"stream": mode} if mode else {})
+                    force_authenticate(request, user=doctor.user)
+                    tracemalloc.start()
+                    elapsed = timed(lambda: self.consume(view(request)))
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                    self.stdout.write(f"  {mode or 'blob':7} {elapsed:9.2f} ms  peak memory {peak / 2**20:7.1f} MiB")
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import CustomUser
+from doctor.models import DoctorProfile
+from patient.views.patient_views import DoctorListView
+from main.bench import make_doctor, rolled_back, timed
+
+
+class Command(BaseCommand):
+    help = "Time doctor_listing for several page sizes (the query budget is enforced by patient.tests)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--doctors", type=int, default=5000, help="Number of generated doctors")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+
+    def handle(self, *args, **kwargs):
+        # Absolute cursor/photo URLs need a host allowed by ALLOWED_HOSTS in DEBUG
+        factory = APIRequestFactory(HTTP_HOST="localhost")
+        view = DoctorListView.as_view()
+
+        with rolled_back():
+            template = make_doctor()
+            users = CustomUser.objects.bulk_create([
+                CustomUser(email=f"bench-list-{i}@example.com", first_name="Doc", last_name=str(i), role="doctor")
+                for i in range(kwargs["doctors"])
+            ])
+            DoctorProfile.objects.bulk_create([
+                DoctorProfile(user=user, **{
+                    field.name: getattr(template, field.name) for field in DoctorProfile._meta.concrete_fields
+                    if field.name not in ("id", "user")
+                })
+                for user in users
+            ], batch_size=500)
+
+            for page_size in (10, 50, 100):
+                params = {"page_size": page_size}
+
+                def call():
+                    return view(factory.get("/", params)).render()
+
+                with CaptureQueriesContext(connection) as first_page:
+                    response = call()
+                # Follow the cursor to a later page as well
+                next_url = response.data["next"]
+                with CaptureQueriesContext(connection) as next_page:
+                    view(factory.get(next_url)).render()
+
+                elapsed = timed(call, kwargs["repeat"])
+                self.stdout.write(
+                    f"page_size={page_size:<4} {elapsed:8.2f} ms  "
+                    f"queries: first page {len(first_page)}, next page {len(next_page)}"
+                )
+
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import CustomUser
+from doctor.models import DoctorProfile, SPECIALIZATION_CHOICES
+from patient.slots import build_calendar
+from patient.views.patient_views import NextAvailableSlotsView
+from main.bench import make_doctor, rolled_back, timed
+
+
+class Command(BaseCommand):
+    help = "Measure next_available_slots latency against a large generated catalogue"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--doctors", type=int, default=2000, help="Number of generated doctors")
+        parser.add_argument("--days", type=int, default=14, help="Calendar horizon to materialize")
+        parser.add_argument("--budget-ms", type=float, default=50.0, help="Latency budget per request")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+
+    def handle(self, *args, **kwargs):
+        factory = APIRequestFactory()
+        view = NextAvailableSlotsView.as_view()
+        specializations = [value for value, _ in SPECIALIZATION_CHOICES]
+
+        with rolled_back():
+            template = make_doctor()
+            users = CustomUser.objects.bulk_create([
+                CustomUser(email=f"bench-next-{i}@example.com", first_name="Doc", last_name=str(i), role="doctor")
+                for i in range(kwargs["doctors"])
+            ])
+            profiles = DoctorProfile.objects.bulk_create([
+                DoctorProfile(
+                    user=user,
+                    specialization=specializations[i % len(specializations)],
+                    **{field.name: getattr(template, field.name) for field in DoctorProfile._meta.concrete_fields
+                       if field.name not in ("id", "user", "specialization", "slots_generated_until")}
+                )
+                for i, user in enumerate(users)
+            ], batch_size=500)
+            for start in range(0, len(profiles), 200):
+                build_calendar(profiles[start:start + 200], days=kwargs["days"])
+
+            after = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+            for params in ({}, {"specialization": "cardiology"}, {"specialization": "cardiology", "after": after},
+                           {"search": "doc 1"}):
+                def call():
+                    view(factory.get("/", params)).render()
+
+                elapsed = timed(call, kwargs["repeat"])
+                verdict = self.style.SUCCESS("ok") if elapsed <= kwargs["budget_ms"] else self.style.ERROR("over budget")
+                self.stdout.write(f"{str(params):60} {elapsed:8.2f} ms  {verdict}")
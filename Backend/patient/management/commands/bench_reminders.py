@@ -0,0 +1,92 @@
+import tempfile
+from datetime import date, datetime, time as dtime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from doctor.models import DoctorProfile
+from patient.models import Booking, PatientBookingInfo
+from patient.reminders import REMINDER_BATCH_SIZE, FileReminderBackend, send_due_reminders
+from main.bench import make_doctor, make_user, rolled_back
+
+SLOTS_PER_DAY = 16
+
+
+class Command(BaseCommand):
+    help = "Throughput and queries per batch of the reminder engine with a large Booking table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--due", type=int, default=50000, help="Bookings with a reminder due now")
+        parser.add_argument("--idle", type=int, default=200000, help="Bookings with nothing due (history, later)")
+        parser.add_argument("--batch-size", type=int, default=REMINDER_BATCH_SIZE, help="Bookings per batch")
+
+    def handle(self, *args, **kwargs):
+        due, idle = kwargs["due"], kwargs["idle"]
+
+        # Tick at 07:00 tomorrow: 24-hour reminders of tomorrow's 09:00-16:30 appointments are due
+        now = timezone.make_aware(datetime.combine(date.today() + timedelta(days=1), dtime(7, 0)))
+
+        with rolled_back():
+            template = make_doctor()
+            patient = make_user("bench-reminders-patient@example.com")
+            base = {
+                field.name: getattr(template, field.name) for field in DoctorProfile._meta.concrete_fields
+                if field.name not in ("id", "user")
+            }
+            # One doctor per day of SLOTS_PER_DAY bookings keeps (doctor, date, start_time) unique
+            users = CustomUser.objects.bulk_create([
+                CustomUser(email=f"bench-reminders-{i}@example.com", first_name="Doc", last_name=str(i), role="doctor")
+                for i in range(-(-max(due, idle) // SLOTS_PER_DAY))
+            ], batch_size=5000)
+            doctors = DoctorProfile.objects.bulk_create([DoctorProfile(user=user, **base) for user in users])
+
+            def rows(count, day, next_reminder_at):
+                for i in range(count):
+                    doctor, slot = divmod(i, SLOTS_PER_DAY)
+                    yield Booking(
+                        doctor=doctors[doctor], patient=patient, date=day,
+                        start_time=dtime(9 + slot // 2, 30 * (slot % 2)),
+                        end_time=dtime(9 + slot // 2, 30 * (slot % 2) + 29),
+                        next_reminder_at=next_reminder_at,
+                    )
+
+            # Idle: past appointments, nothing to send
+            Booking.objects.bulk_create(rows(idle, date.today() - timedelta(days=30), None), batch_size=5000)
+            # Due: tomorrow's appointments (bulk_create skips save(), so the due time is set here)
+            due_bookings = Booking.objects.bulk_create(
+                rows(due, date.today() + timedelta(days=1), now - timedelta(minutes=1)), batch_size=5000
+            )
+            PatientBookingInfo.objects.bulk_create([
+                PatientBookingInfo(
+                    booking=booking, full_name="Bench Patient", email="bench@example.com",
+                    phone_number="0000000000", date_of_birth=date(1990, 1, 1),
+                )
+                for booking in due_bookings
+            ], batch_size=5000)
+
+            with tempfile.NamedTemporaryFile(suffix=".jsonl") as target:
+                backend = FileReminderBackend(target.name)
+                with CaptureQueriesContext(connection) as queries:
+                    started = datetime.now()
+                    sent = send_due_reminders(now=now, batch_size=kwargs["batch_size"], backend=backend)
+                    elapsed = (datetime.now() - started).total_seconds()
+                with open(target.name) as handle:
+                    written = sum(1 for _ in handle)
+
+            batches = -(-due // kwargs["batch_size"])
+            with connection.cursor() as cursor:
+                sql, params = Booking.objects.filter(next_reminder_at__lte=now).order_by(
+                    'next_reminder_at'
+                )[:kwargs["batch_size"]].query.sql_with_params()
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                plan = " / ".join(str(row[-1]) for row in cursor.fetchall())
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{due} due reminders in a table of {due + idle} bookings"))
+            self.stdout.write(f"  sent: {sent}  written by backend: {written}  in {elapsed:.2f} s")
+            self.stdout.write(f"  throughput: {sent / elapsed * 3600:,.0f} reminders/hour")
+            self.stdout.write(f"  queries: {len(queries)} for {batches} batches (+1 empty check)")
+            self.stdout.write(f"  next_reminder_at still due: {Booking.objects.filter(next_reminder_at__lte=now).count()}")
+            self.stdout.write(f"  due scan plan: {plan}")
@@ -0,0 +1,89 @@
+from datetime import date, time as dtime, timedelta
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import CustomUser
+from doctor.models import DoctorProfile
+from doctor.serializers import DoctorProfileSerializer
+from patient.models import Booking, PatientBookingInfo
+from patient.rows import doctor_values, serialize_appointments, serialize_doctors
+from patient.serializers import PatientAppointmentSerializer
+from main.bench import make_doctor, make_user, rolled_back, timed
+
+
+class Command(BaseCommand):
+    help = "Compare ModelSerializer list output against the .values() fast path (time and bytes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated row counts")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+
+    def handle(self, *args, **kwargs):
+        sizes = sorted(int(size) for size in kwargs["sizes"].split(","))
+        renderer = JSONRenderer()
+        request = Request(APIRequestFactory(HTTP_HOST="localhost").get("/"))
+
+        with rolled_back():
+            template = make_doctor()
+            patient = make_user("bench-serialize-patient@example.com")
+            base = {
+                field.name: getattr(template, field.name) for field in DoctorProfile._meta.concrete_fields
+                if field.name not in ("id", "user")
+            }
+            created = 0
+            for size in sizes:
+                while created < size:
+                    batch = min(10000, size - created)
+                    users = CustomUser.objects.bulk_create([
+                        CustomUser(email=f"bench-serialize-{created + i}@example.com",
+                                   first_name="Doc", last_name=str(created + i), role="doctor")
+                        for i in range(batch)
+                    ])
+                    doctors = DoctorProfile.objects.bulk_create([
+                        DoctorProfile(user=user, **base) for user in users
+                    ])
+                    # One booking per new doctor, every other one with patient info
+                    bookings = Booking.objects.bulk_create([
+                        Booking(
+                            doctor=doctor, patient=patient, date=date.today() + timedelta(days=i % 30),
+                            start_time=dtime(10, 0), end_time=dtime(10, 30),
+                        )
+                        for i, doctor in enumerate(doctors)
+                    ])
+                    PatientBookingInfo.objects.bulk_create([
+                        PatientBookingInfo(
+                            booking=booking, full_name="Bench Patient", email="bench@example.com",
+                            phone_number="0000000000", date_of_birth=date(1990, 1, 1), reason_to_visit="Checkup",
+                        )
+                        for booking in bookings[::2]
+                    ])
+                    created += batch
+
+                self.stdout.write(self.style.MIGRATE_HEADING(f"{size} rows"))
+                bookings = Booking.objects.filter(patient=patient).order_by('-date', 'start_time')[:size]
+                doctors = DoctorProfile.objects.order_by('id')[:size]
+                cases = {
+                    "appointments": (
+                        lambda: PatientAppointmentSerializer(
+                            bookings.select_related('doctor', 'doctor__user', 'patient_info'), many=True
+                        ).data,
+                        lambda: serialize_appointments(bookings),
+                    ),
+                    "doctors": (
+                        lambda: DoctorProfileSerializer(
+                            doctors.select_related('user'), many=True, context={'request': request}
+                        ).data,
+                        lambda: serialize_doctors(doctor_values(doctors), request),
+                    ),
+                }
+                for name, (serializer_path, fast_path) in cases.items():
+                    identical = renderer.render(serializer_path()) == renderer.render(fast_path())
+                    slow = timed(serializer_path, kwargs["repeat"])
+                    fast = timed(fast_path, kwargs["repeat"])
+                    self.stdout.write(
+                        f"  {name:13} serializer: {slow:9.2f} ms  fast path: {fast:9.2f} ms  "
+                        f"({slow / fast:4.1f}x)  identical output: {'yes' if identical else 'NO'}"
+                    )
@@ -0,0 +1,65 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from doctor.models import DoctorProfile
+from patient.slots import CALENDAR_HORIZON_DAYS, build_calendar, extend_calendars, prune_past_slots
+
+
+class Command(BaseCommand):
+    help = "Build the materialized slot calendar for the rolling horizon"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=CALENDAR_HORIZON_DAYS, help="Horizon length in days")
+        parser.add_argument("--doctor", type=int, help="Only rebuild this doctor profile id")
+        parser.add_argument("--chunk-size", type=int, default=200, help="Doctors rebuilt per transaction")
+        parser.add_argument(
+            "--extend", action="store_true",
+            help="Only build the days missing up to the horizon instead of rebuilding it (rolls it forward)"
+        )
+        parser.add_argument(
+            "--every", type=int, help="Keep running and roll the horizon forward every N seconds (implies --extend)"
+        )
+
+    def handle(self, *args, **kwargs):
+        every = kwargs["every"]
+        while True:
+            self.build(kwargs, extend=kwargs["extend"] or bool(every))
+            if not every:
+                break
+            time.sleep(every)
+
+    def build(self, kwargs, extend):
+        doctors = DoctorProfile.objects.order_by('id')
+        if kwargs["doctor"]:
+            doctors = doctors.filter(id=kwargs["doctor"])
+        until = date.today() + timedelta(days=kwargs["days"] - 1)
+        if extend:
+            doctors = doctors.filter(Q(slots_generated_until__isnull=True) | Q(slots_generated_until__lt=until))
+
+        def build_chunk(chunk):
+            if extend:
+                return extend_calendars(chunk, until)
+            return build_calendar(chunk, days=kwargs["days"])
+
+        chunk_size = kwargs["chunk_size"]
+        total_doctors = total_slots = 0
+        chunk = []
+        for doctor in doctors.iterator(chunk_size=chunk_size):
+            chunk.append(doctor)
+            if len(chunk) == chunk_size:
+                total_slots += build_chunk(chunk)
+                total_doctors += len(chunk)
+                chunk = []
+        if chunk:
+            total_slots += build_chunk(chunk)
+            total_doctors += len(chunk)
+
+        pruned = prune_past_slots()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Built {total_slots} slots for {total_doctors} doctors ({kwargs['days']} days), "
+            f"pruned {pruned} past slots."
+        ))
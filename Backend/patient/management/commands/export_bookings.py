@@ -0,0 +1,52 @@
+import sys
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from patient.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, csv_chunks, export_queryset, export_rows, write_parquet
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Invalid date '{value}', use YYYY-MM-DD")
+
+
+class Command(BaseCommand):
+    help = "Export bookings with patient info to CSV or Parquet without loading them all into memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--doctor", type=int, help="Only this DoctorProfile id (default: every doctor)")
+        parser.add_argument("--from", dest="start_date", type=parse_date, help="First date, YYYY-MM-DD")
+        parser.add_argument("--to", dest="end_date", type=parse_date, help="Last date, YYYY-MM-DD")
+        parser.add_argument("--format", dest="file_format", choices=list(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--output", help="Output file (CSV defaults to stdout; Parquet needs a path)")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="Rows fetched per round trip")
+
+    def handle(self, *args, **kwargs):
+        chunk_size = kwargs["chunk_size"]
+        rows = export_rows(
+            export_queryset(kwargs["doctor"], kwargs["start_date"], kwargs["end_date"]), chunk_size
+        )
+        output = kwargs["output"]
+
+        if kwargs["file_format"] == "parquet":
+            if not output:
+                raise CommandError("--output is required for Parquet")
+            try:
+                written = write_parquet(rows, output, chunk_size)
+            except ImportError:
+                raise CommandError("Parquet export needs pyarrow installed")
+            self.stderr.write(self.style.SUCCESS(f"✅ Exported {written} bookings to {output}"))
+            return
+
+        target = open(output, "wb") if output else sys.stdout.buffer
+        try:
+            for chunk in csv_chunks(rows, chunk_size):
+                target.write(chunk)
+        finally:
+            if output:
+                target.close()
+        if output:
+            self.stderr.write(self.style.SUCCESS(f"✅ Exported bookings to {output}"))
@@ -0,0 +1,79 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import CustomUser
+from patient.views.patient_views import BookSlotView
+from main.bench import make_doctor
+
+
+class Command(BaseCommand):
+    help = "Fire concurrent bookings at the same slot(s) and report throughput and conflict rate"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=300, help="Total booking attempts")
+        parser.add_argument("--threads", type=int, default=32, help="Concurrent worker threads")
+        parser.add_argument("--slots", type=int, default=1, help="Distinct slots the attempts contend on")
+
+    def handle(self, *args, **kwargs):
+        total = kwargs["requests"]
+        slot_count = kwargs["slots"]
+
+        # Data must be committed so every worker thread (own DB connection) can see it
+        doctor = make_doctor(index="load")
+        patients = CustomUser.objects.bulk_create([
+            CustomUser(email=f"bench-load-{i}@example.com", first_name="Load", last_name=str(i), role="patient")
+            for i in range(total)
+        ])
+        day = date.today() + timedelta(days=1)
+        while day.strftime("%A").lower() not in doctor.working_days:
+            day += timedelta(days=1)
+        starts = [
+            datetime.combine(day, doctor.start_time) + timedelta(minutes=doctor.appointment_duration * i)
+            for i in range(slot_count)
+        ]
+
+        factory = APIRequestFactory()
+        view = BookSlotView.as_view()
+        def attempt(i):
+            start = starts[i % slot_count]
+            request = factory.post("/", {
+                "date": day.isoformat(),
+                "start_time": start.strftime("%I:%M %p"),
+                "end_time": (start + timedelta(minutes=doctor.appointment_duration)).strftime("%I:%M %p"),
+                "full_name": "Load Test",
+                "phone_number": "0000000000",
+                "date_of_birth": "1990-01-01",
+            }, format="json")
+            force_authenticate(request, user=patients[i])
+            try:
+                return view(request, doctor_id=doctor.id).status_code
+            except Exception as exc:
+                return type(exc).__name__
+            finally:
+                # Each worker thread has its own connection; close it like a request cycle would
+                connection.close()
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=kwargs["threads"]) as pool:
+                results = Counter(pool.map(attempt, range(total)))
+            elapsed = time.perf_counter() - started
+        finally:
+            booked = doctor.bookings.count()
+            CustomUser.objects.filter(id__in=[p.id for p in patients] + [doctor.user_id]).delete()
+
+        self.stdout.write(f"{total} attempts on {slot_count} slot(s) with {kwargs['threads']} threads")
+        self.stdout.write(f"Elapsed: {elapsed:.2f} s, throughput: {total / elapsed:.1f} req/s")
+        for outcome, count in sorted(results.items(), key=lambda item: str(item[0])):
+            self.stdout.write(f"  {outcome}: {count} ({count / total:.1%})")
+        self.stdout.write(f"Conflict rate: {results.get(409, 0) / total:.1%}")
+        if booked == slot_count and results.get(201, 0) == slot_count:
+            self.stdout.write(self.style.SUCCESS(f"✅ Exactly one booking per slot ({booked})"))
+        else:
+            self.stdout.write(self.style.ERROR(f"❌ {booked} bookings stored for {slot_count} slot(s)"))
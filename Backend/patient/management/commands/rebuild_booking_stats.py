@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from patient.models import DailyBookingStats, DoctorPatientStats
+from patient.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the appointment statistics counters from the bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--doctor", type=int, action="append", help="Only this DoctorProfile id (repeatable)")
+
+    def handle(self, *args, **kwargs):
+        rebuild_stats(kwargs["doctor"])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Rebuilt {DailyBookingStats.objects.count()} daily and "
+            f"{DoctorPatientStats.objects.count()} per-patient counter rows."
+        ))
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from patient.slots import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Release expired online-payment slot holds in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--every", type=int, help="Keep running and sweep every N seconds")
+
+    def handle(self, *args, **kwargs):
+        every = kwargs["every"]
+        while True:
+            released = release_expired_holds()
+            self.stdout.write(self.style.SUCCESS(f"✅ Released {released} expired slot holds."))
+            if not every:
+                break
+            time.sleep(every)
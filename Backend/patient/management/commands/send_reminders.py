@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from patient.reminders import REMINDER_BATCH_SIZE, send_due_reminders
+
+
+class Command(BaseCommand):
+    help = "Send due appointment reminders (24 hours and 1 hour ahead) in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--every", type=int, help="Keep running and check for due reminders every N seconds")
+        parser.add_argument("--batch-size", type=int, default=REMINDER_BATCH_SIZE, help="Bookings per batch")
+
+    def handle(self, *args, **kwargs):
+        every = kwargs["every"]
+        while True:
+            sent = send_due_reminders(batch_size=kwargs["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"✅ Sent {sent} appointment reminders."))
+            if not every:
+                break
+            time.sleep(every)
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patient', '0003_booking_is_rejected_booking_rejection_reason'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='payment_id',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='payment_method',
+            field=models.CharField(choices=[('counter', 'Pay at Counter'), ('online', 'Pay Online')], default='counter', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='payment_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('success', 'Success'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor', '0004_doctorprofile_slots_generated_until'),
+        ('patient', '0004_booking_payment_id_booking_payment_method_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Slot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('status', models.CharField(choices=[('free', 'Free'), ('booked', 'Booked'), ('rejected', 'Rejected')], default='free', max_length=20)),
+                ('booking', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='slot', to='patient.booking')),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='doctor.doctorprofile')),
+            ],
+            options={
+                'unique_together': {('doctor', 'date', 'start_time')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor', '0004_doctorprofile_slots_generated_until'),
+        ('patient', '0005_slot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='slot',
+            index=models.Index(fields=['status', 'date', 'start_time'], name='patient_slo_status_ddcbe2_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patient', '0006_slot_patient_slo_status_ddcbe2_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='hold_expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='slot',
+            name='status',
+            field=models.CharField(choices=[('free', 'Free'), ('held', 'Held'), ('booked', 'Booked'), ('rejected', 'Rejected')], default='free', max_length=20),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Q
+
+
+def backfill_stats(apps, schema_editor):
+    # Not rejected, and not an unpaid online hold (patient.stats.KEPT_BOOKINGS)
+    kept = Q(is_rejected=False) & (~Q(payment_method='online') | Q(payment_status='success'))
+    Booking = apps.get_model('patient', 'Booking')
+    DailyBookingStats = apps.get_model('patient', 'DailyBookingStats')
+    DoctorPatientStats = apps.get_model('patient', 'DoctorPatientStats')
+    DailyBookingStats.objects.bulk_create([
+        DailyBookingStats(**row) for row in Booking.objects.values('doctor_id', 'date').annotate(
+            booked=Count('id'),
+            rejected=Count('id', filter=Q(is_rejected=True)),
+            online=Count('id', filter=Q(payment_method='online')),
+            paid=Count('id', filter=Q(payment_method='online', payment_status='success')),
+            kept=Count('id', filter=kept),
+        )
+    ], batch_size=1000)
+    DoctorPatientStats.objects.bulk_create([
+        DoctorPatientStats(**row) for row in Booking.objects.filter(kept).values(
+            'doctor_id', 'patient_id'
+        ).annotate(bookings=Count('id'), first_date=Min('date'))
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor', '0009_doctorprofile_updated_at'),
+        ('patient', '0007_booking_hold_expires_at_alter_slot_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBookingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('booked', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+                ('online', models.PositiveIntegerField(default=0)),
+                ('paid', models.PositiveIntegerField(default=0)),
+                ('kept', models.PositiveIntegerField(default=0)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='doctor.doctorprofile')),
+            ],
+            options={
+                'unique_together': {('doctor', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DoctorPatientStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('first_date', models.DateField(blank=True, null=True)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='patient_stats', to='doctor.doctorprofile')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='doctor_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('doctor', 'patient')},
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_changes(apps, schema_editor):
+    """One change per existing booking, so a first sync (since=0) returns the whole history."""
+    Booking = apps.get_model('patient', 'Booking')
+    BookingChange = apps.get_model('patient', 'BookingChange')
+    BookingChange.objects.bulk_create([
+        BookingChange(booking_id=booking_id, doctor_id=doctor_id, patient_id=patient_id)
+        for booking_id, doctor_id, patient_id in Booking.objects.order_by('id').values_list(
+            'id', 'doctor_id', 'patient_id'
+        )
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patient', '0009_booking_booking_doctor_history_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('booking_id', models.BigIntegerField()),
+                ('doctor_id', models.BigIntegerField()),
+                ('patient_id', models.BigIntegerField()),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['doctor_id', 'id'], name='booking_change_doctor_idx'), models.Index(fields=['patient_id', 'id'], name='booking_change_patient_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_changes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor', '0009_doctorprofile_updated_at'),
+        ('patient', '0010_bookingchange'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['patient', 'date', 'start_time'], name='booking_patient_date_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:29
+
+from datetime import datetime, timedelta
+
+from django.db import migrations, models
+from django.db.models import Q
+from django.utils import timezone
+
+
+# REMINDER_LEADS when this migration was written
+LEADS = (timedelta(hours=24), timedelta(hours=1))
+
+
+def first_reminder_due(booking, now):
+    """Booking.next_reminder_due() for a booking with no reminder sent yet."""
+    starts_at = timezone.make_aware(datetime.combine(booking.date, booking.start_time))
+    if starts_at <= now:
+        return None
+    # Stages already due when the booking was made are skipped while a later one is left
+    stage = 0
+    while stage + 1 < len(LEADS) and starts_at - LEADS[stage] <= booking.created_at:
+        stage += 1
+    return starts_at - LEADS[stage]
+
+
+def schedule_upcoming(apps, schema_editor):
+    """Schedule the first reminder of every confirmed booking that has not started yet."""
+    Booking = apps.get_model('patient', 'Booking')
+    now = timezone.now()
+    # Rejected bookings and unpaid online holds are not reminded of; they keep None
+    bookings = list(
+        Booking.objects.filter(date__gte=now.date(), is_rejected=False)
+        .filter(~Q(payment_method='online') | Q(payment_status='success'))
+    )
+    for booking in bookings:
+        booking.next_reminder_at = first_reminder_due(booking, now)
+    Booking.objects.bulk_update(bookings, ['next_reminder_at'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patient', '0011_booking_booking_patient_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='next_reminder_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='reminders_sent',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(schedule_upcoming, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:56
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor', '0009_doctorprofile_updated_at'),
+        ('patient', '0012_booking_reminders'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReleasedHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('booking_id', models.BigIntegerField(unique=True)),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('patient_info', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('released_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('payment_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('needs_refund', models.BooleanField(db_index=True, default=False)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='released_holds', to='doctor.doctorprofile')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='released_holds', to=settings.AUTH_USER_MODEL)),
+                ('rebooked', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='released_hold', to='patient.booking')),
+            ],
+        ),
+    ]
@@ -3,6 +3,14 @@ from django.db import models
 
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from datetime import datetime, timedelta
+
+# How long before an appointment each reminder goes out, earliest first (see patient/reminders.py)
+REMINDER_LEADS = (timedelta(hours=24), timedelta(hours=1))
+# Fields the reminder schedule depends on
+REMINDER_FIELDS = {'date', 'start_time', 'is_rejected', 'payment_method', 'payment_status', 'reminders_sent'}
 
 class Booking(models.Model):
     doctor = models.ForeignKey('doctor.DoctorProfile', on_delete=models.CASCADE, related_name='bookings')
@@ -28,15 +36,67 @@ class Booking(models.Model):
         choices=[("pending", "Pending"), ("success", "Success"), ("failed", "Failed")],
         default="pending"
     )
+    # Online bookings hold their slot until payment is verified or the hold expires
+    hold_expires_at = models.DateTimeField(blank=True, null=True, db_index=True)
+
+    # Reminders: when the next one is due (None when nothing is left to send) and how many stages are done
+    next_reminder_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    reminders_sent = models.PositiveSmallIntegerField(default=0)
 
     class Meta:
         unique_together = ('doctor', 'date', 'start_time')
+        indexes = [
+            # A doctor's history in display order (newest day first), for keyset pages
+            models.Index(fields=['doctor', '-date', 'start_time', 'id'], name='booking_doctor_history_idx'),
+            # A patient's upcoming (forward) and past (backward) appointments, for keyset pages
+            models.Index(fields=['patient', 'date', 'start_time'], name='booking_patient_date_idx'),
+        ]
 
     def __str__(self):
         status = "Rejected" if self.is_rejected else "Accepted"
         payment = f" | Payment: {self.payment_status}" if self.payment_method else ""
         return f"{self.doctor} - {self.patient} on {self.date} at {self.start_time} ({status}){payment}"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(update_fields) & REMINDER_FIELDS:
+            self.next_reminder_at = self.next_reminder_due()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'next_reminder_at'}
+        super().save(*args, **kwargs)
+
+    @property
+    def starts_at(self):
+        return timezone.make_aware(datetime.combine(self.date, self.start_time))
+
+    @property
+    def wants_reminders(self):
+        # Rejected appointments and unpaid online holds are not reminded of
+        if self.is_rejected:
+            return False
+        return self.payment_method != "online" or self.payment_status == "success"
+
+    def next_reminder_due(self, now=None):
+        """When the first reminder stage not sent yet is due, or None.
+
+        Stages already due when the booking was made are skipped while a later
+        one is left: a booking made three hours ahead gets the one-hour
+        reminder only.
+        """
+        now = now or timezone.now()
+        if not self.wants_reminders or self.reminders_sent >= len(REMINDER_LEADS) or self.starts_at <= now:
+            return None
+        # created_at is only set by the first save, which runs after this
+        made_at = self.created_at or now
+        stage = self.reminders_sent
+        while stage + 1 < len(REMINDER_LEADS) and self.starts_at - REMINDER_LEADS[stage] <= made_at:
+            stage += 1
+        return self.starts_at - REMINDER_LEADS[stage]
+
+    @property
+    def is_hold_expired(self):
+        return self.hold_expires_at is not None and self.hold_expires_at <= timezone.now()
+
     def reject(self, reason=None):
         """Reject the appointment with optional reason."""
         self.is_rejected = True
@@ -55,4 +115,117 @@ class PatientBookingInfo(models.Model):
     
 
     def __str__(self):
-        return f"{self.full_name} info for booking {self.booking.id}"
\ No newline at end of file
+        return f"{self.full_name} info for booking {self.booking.id}"
+
+
+SLOT_STATUS_CHOICES = [
+    ("free", "Free"),
+    ("held", "Held"),
+    ("booked", "Booked"),
+    ("rejected", "Rejected"),
+]
+
+
+class Slot(models.Model):
+    """Materialized appointment slot of a doctor's rolling calendar."""
+    doctor = models.ForeignKey('doctor.DoctorProfile', on_delete=models.CASCADE, related_name='slots')
+    date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    status = models.CharField(max_length=20, choices=SLOT_STATUS_CHOICES, default="free")
+    booking = models.OneToOneField(Booking, on_delete=models.SET_NULL, blank=True, null=True, related_name='slot')
+
+    class Meta:
+        unique_together = ('doctor', 'date', 'start_time')
+        indexes = [
+            models.Index(fields=['status', 'date', 'start_time']),
+        ]
+
+    def __str__(self):
+        return f"{self.doctor} on {self.date} at {self.start_time} ({self.status})"
+
+
+class ReleasedHold(models.Model):
+    """An online hold released unpaid after a payment order was created for it.
+
+    The patient may still be in checkout when the hold expires, so the
+    booking is kept here: a payment verified later re-books the slot if it is
+    still free, otherwise it is recorded and flagged for refund.
+    """
+    # Id of the deleted booking, the one the client still verifies against
+    booking_id = models.BigIntegerField(unique=True)
+    patient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='released_holds')
+    doctor = models.ForeignKey('doctor.DoctorProfile', on_delete=models.CASCADE, related_name='released_holds')
+    date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    # PatientBookingInfo fields of the released booking
+    patient_info = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    released_at = models.DateTimeField(default=timezone.now)
+
+    # Set once a payment is verified after the release
+    payment_id = models.CharField(max_length=100, blank=True, null=True)
+    rebooked = models.OneToOneField(
+        Booking, on_delete=models.SET_NULL, blank=True, null=True, related_name='released_hold'
+    )
+    needs_refund = models.BooleanField(default=False, db_index=True)
+
+    def __str__(self):
+        return f"Released hold of booking {self.booking_id} ({self.doctor} on {self.date} at {self.start_time})"
+
+
+class DailyBookingStats(models.Model):
+    """Per-doctor, per-day booking counters, refreshed on every booking write (see patient/stats.py)."""
+    doctor = models.ForeignKey('doctor.DoctorProfile', on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    booked = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    online = models.PositiveIntegerField(default=0)
+    paid = models.PositiveIntegerField(default=0)
+    # Appointments that will (or did) take place: not rejected, and not an unpaid online hold
+    kept = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('doctor', 'date')
+
+    def __str__(self):
+        return f"{self.doctor} on {self.date}: {self.booked} booked"
+
+
+class DoctorPatientStats(models.Model):
+    """Kept bookings per (doctor, patient); one row per distinct patient of a doctor.
+
+    first_date is the day of the earliest of them: the patient has been seen
+    once it is in the past.
+    """
+    doctor = models.ForeignKey('doctor.DoctorProfile', on_delete=models.CASCADE, related_name='patient_stats')
+    patient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='doctor_stats')
+    bookings = models.PositiveIntegerField(default=0)
+    first_date = models.DateField(blank=True, null=True)
+
+    class Meta:
+        unique_together = ('doctor', 'patient')
+
+    def __str__(self):
+        return f"{self.patient} with {self.doctor}: {self.bookings} bookings"
+
+
+class BookingChange(models.Model):
+    """Append-only log of booking writes; its id is the delta-sync cursor (see patient/sync.py).
+
+    Plain id columns rather than foreign keys, so entries for deleted
+    bookings survive as tombstones.
+    """
+    booking_id = models.BigIntegerField()
+    doctor_id = models.BigIntegerField()
+    patient_id = models.BigIntegerField()
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['doctor_id', 'id'], name='booking_change_doctor_idx'),
+            models.Index(fields=['patient_id', 'id'], name='booking_change_patient_idx'),
+        ]
+
+    def __str__(self):
+        return f"Change {self.id} of booking {self.booking_id}"
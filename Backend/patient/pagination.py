@@ -0,0 +1,98 @@
+# patient/pagination.py
+from base64 import b64decode, b64encode
+from datetime import date, time
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class DoctorCursorPagination(CursorPagination):
+    """Keyset pagination over the primary key, so page cost is independent of depth."""
+    ordering = ('id',)
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        # near= listings page through results nearest first
+        if 'distance_sq' in queryset.query.annotations:
+            return ('distance_sq', 'id')
+        # Full-text searches page through results in relevance order
+        if 'search_rank' in queryset.query.annotations:
+            return ('search_rank', 'id')
+        return super().get_ordering(request, queryset, view)
+
+
+class BookingKeysetPagination:
+    """Keyset pagination over date, start_time and id, in the directions given by `ordering`.
+
+    The default is (-date, start_time, id), the order doctors read their
+    bookings in. The cursor is the (date, start_time, id) of the last row
+    served, so every page is one index range read however deep it is.
+    """
+    ordering = ('-date', 'start_time', 'id')
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = ordering
+
+    def get_page_size(self, request):
+        try:
+            return max(1, min(int(request.query_params[self.page_size_query_param]), self.max_page_size))
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def encode_cursor(self, item):
+        position = f"{item['date']}|{item['start_time']}|{item['id']}"
+        return b64encode(position.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            day, start_time, booking_id = b64decode(encoded.encode(), validate=True).decode().split('|')
+            return date.fromisoformat(day), time.fromisoformat(start_time), int(booking_id)
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound("Invalid cursor")
+
+    def after(self, position):
+        """Rows strictly past `position` in self.ordering, e.g. date < d OR (date = d AND start_time > t) OR ...
+
+        The redundant bound on the leading field (date <= d) gives the database
+        an index range to seek to instead of scanning from the first row.
+        """
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            ties = {previous.lstrip('-'): value for previous, value in zip(self.ordering[:index], position)}
+            condition |= Q(**ties, **{f'{name}__{lookup}': position[index]})
+        leading = self.ordering[0]
+        bound = 'lte' if leading.startswith('-') else 'gte'
+        return Q(**{f'{leading.lstrip("-")}__{bound}': position[0]}) & condition
+
+    def paginate(self, request, bookings, serialize):
+        """Return ({"next": url, "results": [...]}) for one page of an ordered Booking queryset.
+
+        serialize(queryset) turns the page queryset into dicts carrying date, start_time and id.
+        """
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        if position is not None:
+            bookings = bookings.filter(self.after(position))
+        # One extra row tells whether another page exists
+        results = serialize(bookings.order_by(*self.ordering)[:page_size + 1])
+        next_url = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            next_url = replace_query_param(
+                request.build_absolute_uri(), self.cursor_query_param, self.encode_cursor(results[-1])
+            )
+        return {"next": next_url, "results": results}
@@ -0,0 +1,143 @@
+# patient/reminders.py
+"""Appointment reminders, REMINDER_LEADS (24 hours and 1 hour) before each booking.
+
+Every booking carries when its next reminder is due (next_reminder_at,
+indexed) and how many stages it has been through. A tick reads due bookings
+with one range query on that index per batch, hands them to the configured
+backend and records the outcome with bulk_update, so its cost follows the
+number of due reminders, not the size of the Booking table.
+"""
+import json
+import sys
+from datetime import datetime
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import REMINDER_LEADS, Booking
+
+REMINDER_BATCH_SIZE = 1000
+
+
+def reminder_message(reminder):
+    """(subject, body) of one reminder."""
+    # Absolute times only: a stage sent late (booking made 30 minutes ahead) must not say "in an hour"
+    starts_at = timezone.localtime(datetime.fromisoformat(reminder["starts_at"]))
+    when = f"{starts_at:%A %d %B %Y} at {starts_at:%I:%M %p}"
+    subject = f"Reminder: your appointment with Dr. {reminder['doctor_name']} on {when}"
+    body = (
+        f"Hello {reminder['patient_name']},\n\n"
+        f"This is a reminder of your appointment with Dr. {reminder['doctor_name']} on {when}.\n"
+        f"{reminder['clinic_name']}, {reminder['address']}\n"
+    )
+    return subject, body
+
+
+class ConsoleReminderBackend:
+    """Writes one line per reminder to stdout; for development."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, reminders):
+        self.stream.write("".join(
+            f"[reminder] booking {reminder['booking_id']} -> {reminder['email']}: {reminder_message(reminder)[0]}\n"
+            for reminder in reminders
+        ))
+        self.stream.flush()
+
+
+class FileReminderBackend:
+    """Appends reminders as JSON lines to settings.REMINDER_FILE_PATH."""
+
+    def __init__(self, path=None):
+        self.path = path or getattr(settings, 'REMINDER_FILE_PATH', settings.BASE_DIR / 'reminders.jsonl')
+
+    def send(self, reminders):
+        with open(self.path, 'a', encoding='utf-8') as handle:
+            handle.write("".join(json.dumps(reminder) + "\n" for reminder in reminders))
+
+
+class EmailReminderBackend:
+    """Emails each reminder through Django's EMAIL_BACKEND, over one connection per batch."""
+
+    def send(self, reminders):
+        send_mass_mail(
+            [(*reminder_message(reminder), None, [reminder["email"]]) for reminder in reminders],
+            fail_silently=False
+        )
+
+
+@lru_cache(maxsize=None)
+def get_reminder_backend():
+    """Backend from settings.REMINDER_BACKEND, else the console backend."""
+    path = getattr(settings, 'REMINDER_BACKEND', None)
+    return import_string(path)() if path else ConsoleReminderBackend()
+
+
+def due_stage(booking, now):
+    """Latest reminder stage due at `now`, or None.
+
+    Earlier unsent stages are skipped, so a late tick sends one reminder, not
+    a burst. Stages already due when the booking was made are never scheduled
+    (see Booking.next_reminder_due).
+    """
+    if booking.starts_at <= now:
+        return None
+    stage = None
+    for index in range(booking.reminders_sent, len(REMINDER_LEADS)):
+        if booking.starts_at - REMINDER_LEADS[index] <= now:
+            stage = index
+    return stage
+
+
+def build_reminder(booking, stage):
+    info = getattr(booking, 'patient_info', None)
+    return {
+        "booking_id": booking.id,
+        "email": (info.email if info and info.email else booking.patient.email),
+        "patient_name": info.full_name if info else booking.patient.get_full_name(),
+        "doctor_name": booking.doctor.user.get_full_name(),
+        "clinic_name": booking.doctor.clinic_name,
+        "address": booking.doctor.address,
+        "starts_at": booking.starts_at.isoformat(),
+        "lead_hours": int(REMINDER_LEADS[stage].total_seconds() // 3600),
+    }
+
+
+def send_due_reminders(now=None, batch_size=REMINDER_BATCH_SIZE, backend=None):
+    """Send every reminder due at `now`, batch_size bookings at a time. Returns the number sent.
+
+    Each batch is locked (where the database supports it), sent and marked in
+    one transaction: a backend error rolls the batch back and it is retried
+    on the next tick, so delivery is at least once.
+    """
+    now = now or timezone.now()
+    backend = backend or get_reminder_backend()
+    sent = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Booking.objects.filter(next_reminder_at__lte=now)
+                .select_related('patient', 'doctor__user', 'patient_info')
+                .select_for_update(skip_locked=True, of=('self',))
+                .order_by('next_reminder_at')[:batch_size]
+            )
+            if not batch:
+                return sent
+            reminders = []
+            for booking in batch:
+                stage = due_stage(booking, now)
+                if stage is not None:
+                    reminders.append(build_reminder(booking, stage))
+                    booking.reminders_sent = stage + 1
+                # Next stage (always after `now`), or None once all are sent or the appointment has started
+                booking.next_reminder_at = booking.next_reminder_due(now)
+            if reminders:
+                backend.send(reminders)
+            Booking.objects.bulk_update(batch, ['reminders_sent', 'next_reminder_at'], batch_size=batch_size)
+        sent += len(reminders)
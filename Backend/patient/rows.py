@@ -0,0 +1,151 @@
+# patient/rows.py
+"""Read-only fast path for list endpoints.
+
+Lists are fetched as flat .values() rows over the needed joins and mapped to
+dicts by functions compiled once from the serializer they stand in for, so
+the output (key order and every formatted value) is the serializer's own.
+"""
+import math
+from functools import lru_cache
+
+from doctor.models import DoctorProfile
+from doctor.serializers import DoctorProfileSerializer
+from .serializers import PatientAppointmentSerializer
+from .streaming import STREAM_CHUNK_SIZE
+
+PATIENT_INFO_FIELDS = (
+    'full_name', 'email', 'phone_number', 'date_of_birth', 'reason_to_visit', 'symptoms_or_concerns',
+)
+
+
+def column(key, field):
+    """Getter for a plain column, formatted like `field` (None is passed through, as DRF does)."""
+    to_representation = field.to_representation
+
+    def get(row, request):
+        value = row[key]
+        return None if value is None else to_representation(value)
+    return get
+
+
+def full_name(prefix):
+    """CustomUser.get_full_name over `<prefix>first_name` / `<prefix>last_name` columns."""
+    first, last = f"{prefix}first_name", f"{prefix}last_name"
+
+    def get(row, request):
+        return f"{row[first]} {row[last]}".strip() or "N/A"
+    return get
+
+
+def compile_rows(serializer, columns, computed):
+    """Build row_to_dict(row, request) emitting `serializer`'s readable fields in order.
+
+    columns maps a field to the .values() key feeding it (default: the field
+    name); computed maps a field to a getter(row, request) for fields no
+    single column can feed. Returns (row_to_dict, values keys).
+    """
+    getters = []
+    keys = set()
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in computed:
+            getters.append((name, computed[name]))
+        else:
+            key = columns.get(name, name)
+            keys.add(key)
+            getters.append((name, column(key, field)))
+
+    def row_to_dict(row, request=None):
+        return {name: get(row, request) for name, get in getters}
+    return row_to_dict, keys
+
+
+def patient_info(row, request):
+    if row['patient_info__id'] is None:
+        return None
+    return {field: row[f'patient_info__{field}'] for field in PATIENT_INFO_FIELDS}
+
+
+@lru_cache(maxsize=None)
+def appointment_rows():
+    """(row_to_dict, values keys) matching PatientAppointmentSerializer."""
+    row_to_dict, keys = compile_rows(
+        PatientAppointmentSerializer(),
+        columns={
+            'doctor_email': 'doctor__user__email',
+            'clinic_name': 'doctor__clinic_name',
+            'specialization': 'doctor__specialization',
+            'address': 'doctor__address',
+            'qualifications': 'doctor__qualifications',
+        },
+        computed={
+            'doctor_name': full_name('doctor__user__'),
+            'patient_info': patient_info,
+        },
+    )
+    keys |= {'doctor__user__first_name', 'doctor__user__last_name', 'patient_info__id'}
+    keys |= {f'patient_info__{field}' for field in PATIENT_INFO_FIELDS}
+    return row_to_dict, sorted(keys)
+
+
+def serialize_appointments(bookings):
+    """PatientAppointmentSerializer(bookings, many=True).data, from one flat query."""
+    row_to_dict, keys = appointment_rows()
+    return [row_to_dict(row) for row in bookings.values(*keys)]
+
+
+def iter_appointments(bookings, chunk_size=STREAM_CHUNK_SIZE):
+    """serialize_appointments one item at a time, fetching chunk_size rows per round trip."""
+    row_to_dict, keys = appointment_rows()
+    for row in bookings.values(*keys).iterator(chunk_size=chunk_size):
+        yield row_to_dict(row)
+
+
+def photo_url(row, request):
+    # ImageField and get_profile_photo_url both build the absolute URL of the stored file
+    if not row['profile_photo']:
+        return None
+    url = DoctorProfile._meta.get_field('profile_photo').storage.url(row['profile_photo'])
+    return request.build_absolute_uri(url)
+
+
+def distance_km(row, request):
+    distance_sq = row.get('distance_sq')
+    return round(math.sqrt(distance_sq), 2) if distance_sq is not None else None
+
+
+@lru_cache(maxsize=None)
+def doctor_rows():
+    """(row_to_dict, values keys) matching DoctorProfileSerializer."""
+    serializer = DoctorProfileSerializer()
+    specialization_labels = dict(DoctorProfile._meta.get_field('specialization').flatchoices)
+    row_to_dict, keys = compile_rows(
+        serializer,
+        columns={'email': 'user__email'},
+        computed={
+            # PrimaryKeyRelatedField: the raw user_id column is already the output
+            'user': lambda row, request: row['user'],
+            'full_name': full_name('user__'),
+            'specialization_display': lambda row, request: specialization_labels.get(
+                row['specialization'], row['specialization']
+            ),
+            'profile_photo': photo_url,
+            'profile_photo_url': photo_url,
+            'distance_km': distance_km,
+        },
+    )
+    keys |= {'user', 'user__first_name', 'user__last_name', 'specialization', 'profile_photo'}
+    return row_to_dict, sorted(keys)
+
+
+def doctor_values(queryset):
+    """Flat rows for a DoctorProfile queryset, keeping its ordering annotations."""
+    _, keys = doctor_rows()
+    return queryset.values(*keys, *queryset.query.annotations)
+
+
+def serialize_doctors(rows, request):
+    """DoctorProfileSerializer(..., many=True).data for rows from doctor_values()."""
+    row_to_dict, _ = doctor_rows()
+    return [row_to_dict(row, request) for row in rows]
@@ -0,0 +1,52 @@
+# patient/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Booking, PatientBookingInfo
+from .slots import free_slot, invalidate_availability, sweeping, sync_slot
+from .stats import booking_changed
+from .sync import record_booking_change, record_booking_info_change
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_booking_availability(sender, instance, **kwargs):
+    """Drop the cached availability of the date a booking was written or removed on."""
+    if not sweeping():
+        invalidate_availability(instance.doctor_id, instance.date)
+
+
+@receiver(post_save, sender=Booking)
+def mark_booking_slot(sender, instance, created=False, **kwargs):
+    """Keep the materialized calendar in step with every booking write, whatever made it."""
+    sync_slot(instance, created)
+
+
+@receiver(post_delete, sender=Booking)
+def free_booking_slot(sender, instance, **kwargs):
+    if not sweeping():
+        free_slot(instance)
+
+
+@receiver(post_save, sender=Booking)
+def count_saved_booking(sender, instance, **kwargs):
+    booking_changed(instance)
+
+
+@receiver(post_delete, sender=Booking)
+def count_deleted_booking(sender, instance, **kwargs):
+    if not sweeping():
+        booking_changed(instance, deleted=True)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def log_booking_change(sender, instance, **kwargs):
+    """Append to the delta-sync log; a deleted booking's entry is its tombstone."""
+    if not sweeping():
+        record_booking_change(instance)
+
+
+@receiver(post_save, sender=PatientBookingInfo)
+def log_booking_info_change(sender, instance, **kwargs):
+    record_booking_info_change(instance)
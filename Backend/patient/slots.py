@@ -0,0 +1,481 @@
+# patient/slots.py
+import math
+from contextvars import ContextVar
+from datetime import date, datetime, timedelta
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from doctor.models import DoctorProfile
+from .models import Booking, PatientBookingInfo, ReleasedHold, Slot
+from .stats import bookings_deleted
+from .sync import record_changes
+
+SLOT_TIME_FORMAT = "%I:%M %p"
+MAX_RANGE_DAYS = 60
+CALENDAR_HORIZON_DAYS = 60
+DEFAULT_NEXT_SLOTS = 10
+MAX_NEXT_SLOTS = 50
+SLOT_HOLD_MINUTES = 10
+AVAILABILITY_CACHE_TIMEOUT = 300
+# PatientBookingInfo fields a released hold keeps for re-booking
+HOLD_INFO_FIELDS = (
+    'full_name', 'email', 'phone_number', 'date_of_birth', 'reason_to_visit', 'symptoms_or_concerns'
+)
+
+
+# Set while release_expired_holds deletes holds; Booking's per-row delete receivers leave their work to it
+_sweeping = ContextVar('sweeping_holds', default=False)
+
+
+def sweeping():
+    return _sweeping.get()
+
+
+def daterange(start_date, end_date):
+    """Yield every date from start_date to end_date (inclusive)."""
+    for offset in range((end_date - start_date).days + 1):
+        yield start_date + timedelta(days=offset)
+
+
+def works_on(doctor, day):
+    """Return True if the doctor takes appointments on the given date."""
+    return day.strftime("%A").lower() in doctor.working_days
+
+
+def slot_times(doctor, day):
+    """Yield (start_time, end_time) pairs of the doctor's schedule for one day."""
+    start = datetime.combine(day, doctor.start_time)
+    end = datetime.combine(day, doctor.end_time)
+    duration = timedelta(minutes=doctor.appointment_duration)
+
+    current = start
+    while current + duration <= end:
+        yield current.time(), (current + duration).time()
+        current += duration
+
+
+def format_slot(start_time, end_time, is_booked):
+    return {
+        "start_time": start_time.strftime(SLOT_TIME_FORMAT),
+        "end_time": end_time.strftime(SLOT_TIME_FORMAT),
+        "is_booked": is_booked
+    }
+
+
+def generate_slots(doctor, day, booked_times):
+    """Build the slot list for one day; booked_times is a set of start times."""
+    return [
+        format_slot(start_time, end_time, start_time in booked_times)
+        for start_time, end_time in slot_times(doctor, day)
+    ]
+
+
+def note_hold(holds, day, hold_expires_at):
+    """Record in `holds` ({"YYYY-MM-DD": datetime}) the earliest expiry of an active hold per date."""
+    if holds is not None and hold_expires_at is not None:
+        key = day.isoformat()
+        holds[key] = min(holds.get(key, hold_expires_at), hold_expires_at)
+
+
+def booked_times_by_date(doctor, start_date, end_date, holds=None):
+    """Load all busy bookings of a window in one query, grouped as {date: {start_time}}.
+
+    Expired payment holds are left out even if the sweeper has not deleted them yet.
+    """
+    booked = {}
+    rows = Booking.objects.filter(
+        doctor=doctor, date__range=(start_date, end_date)
+    ).exclude(hold_expires_at__lte=timezone.now()).values_list('date', 'start_time', 'hold_expires_at')
+    for day, start_time, hold_expires_at in rows:
+        booked.setdefault(day, set()).add(start_time)
+        note_hold(holds, day, hold_expires_at)
+    return booked
+
+
+def calendar_covers(doctor, start_date, end_date):
+    """True if the materialized calendar holds every date of the window."""
+    until = doctor.slots_generated_until
+    return until is not None and date.today() <= start_date and end_date <= until
+
+
+def materialized_slots(doctor, start_date, end_date, holds=None):
+    """Read a window from the Slot table with one range scan over its unique index."""
+    now = timezone.now()
+    calendar = {day.isoformat(): [] for day in daterange(start_date, end_date)}
+    rows = Slot.objects.filter(
+        doctor=doctor, date__range=(start_date, end_date)
+    ).order_by('date', 'start_time').values_list(
+        'date', 'start_time', 'end_time', 'status', 'booking__hold_expires_at'
+    )
+    for day, start_time, end_time, status, hold_expires_at in rows:
+        if status == "held":
+            is_booked = hold_expires_at is not None and hold_expires_at > now
+            if is_booked:
+                note_hold(holds, day, hold_expires_at)
+        else:
+            is_booked = status != "free"
+        calendar[day.isoformat()].append(format_slot(start_time, end_time, is_booked))
+    return calendar
+
+
+def compute_slots_for_range(doctor, start_date, end_date, holds=None):
+    """Return {"YYYY-MM-DD": [slots]} for every date in the window, bypassing the cache.
+
+    If given, `holds` receives the earliest expiry of an active hold per date.
+    """
+    if calendar_covers(doctor, start_date, end_date):
+        return materialized_slots(doctor, start_date, end_date, holds)
+
+    booked = booked_times_by_date(doctor, start_date, end_date, holds)
+    calendar = {}
+    for day in daterange(start_date, end_date):
+        if works_on(doctor, day):
+            calendar[day.isoformat()] = generate_slots(doctor, day, booked.get(day, set()))
+        else:
+            calendar[day.isoformat()] = []
+    return calendar
+
+
+def availability_cache_key(doctor_id, day):
+    return f"availability:{doctor_id}:{day.isoformat()}"
+
+
+def availability_timeout(hold_expires_at=None):
+    """Cache lifetime of a date's entry: AVAILABILITY_CACHE_TIMEOUT, cut short by a hold expiring sooner.
+
+    A held slot shows as booked; once the hold expires it is free again even
+    before the sweeper releases it, so the entry must not outlive the hold.
+    """
+    if hold_expires_at is None:
+        return AVAILABILITY_CACHE_TIMEOUT
+    left = math.ceil((hold_expires_at - timezone.now()).total_seconds())
+    return max(1, min(AVAILABILITY_CACHE_TIMEOUT, left))
+
+
+def count_cache(outcome, amount=1):
+    """Increment the shared hit/miss counter of the availability cache."""
+    key = f"availability:stats:{outcome}"
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        if not cache.add(key, amount, timeout=None):
+            cache.incr(key, amount)
+
+
+def availability_cache_stats():
+    hits = cache.get("availability:stats:hits", 0)
+    misses = cache.get("availability:stats:misses", 0)
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups, 4) if lookups else None,
+    }
+
+
+def slots_for_range(doctor, start_date, end_date):
+    """Cached {"YYYY-MM-DD": [slots]} for every date in the window.
+
+    Entries are stored per (doctor, date) together with the doctor's
+    schedule_version, so a schedule change turns every entry of the doctor
+    into a miss, while booking writes delete just the entry of their date
+    (see patient/signals.py). A date with an active hold is cached no longer
+    than the hold lasts.
+    """
+    keys = {availability_cache_key(doctor.id, day): day.isoformat() for day in daterange(start_date, end_date)}
+    cached = cache.get_many(keys)
+    calendar = {}
+    for key, (version, slots) in cached.items():
+        if version == doctor.schedule_version:
+            calendar[keys[key]] = slots
+
+    if len(calendar) == len(keys):
+        count_cache("hits")
+        return calendar
+
+    count_cache("misses")
+    holds = {}
+    calendar = compute_slots_for_range(doctor, start_date, end_date, holds)
+    entries_by_timeout = {}
+    for key, day in keys.items():
+        entries_by_timeout.setdefault(availability_timeout(holds.get(day)), {})[key] = (
+            doctor.schedule_version, calendar[day]
+        )
+    for timeout, entries in entries_by_timeout.items():
+        cache.set_many(entries, timeout=timeout)
+    return calendar
+
+
+def invalidate_availability(doctor_id, day):
+    cache.delete(availability_cache_key(doctor_id, day))
+
+
+def invalidate_availability_many(doctor_dates):
+    """Drop the cached availability of many (doctor_id, date) pairs in one cache call."""
+    cache.delete_many([availability_cache_key(doctor_id, day) for doctor_id, day in doctor_dates])
+
+
+def local_now():
+    """The current wall-clock time, naive like Slot dates and times."""
+    return timezone.localtime().replace(tzinfo=None)
+
+
+def next_free_slots(doctors, after, limit=DEFAULT_NEXT_SLOTS):
+    """Earliest free slots starting at or after `after` across a DoctorProfile queryset.
+
+    The (status, date, start_time) index hands back free slots already in time
+    order, so the database merges every doctor's calendar in a single ordered
+    scan that stops after `limit` rows; the window is capped at the calendar
+    horizon so the scan stays bounded however many doctors match.
+
+    `after` (naive, local time) never reaches back before now: slots that have
+    started are not free, whatever their row says. Only materialized calendars
+    are read; they are built on profile create and rolled forward by
+    build_slot_calendar --extend.
+    """
+    after = max(after, local_now())
+    horizon = after.date() + timedelta(days=CALENDAR_HORIZON_DAYS)
+    return list(
+        Slot.objects.filter(
+            Q(date__gt=after.date()) | Q(date=after.date(), start_time__gte=after.time()),
+            status="free",
+            date__lte=horizon,
+            doctor__in=doctors.values('id'),
+        ).order_by('date', 'start_time', 'doctor_id').values(
+            'doctor_id', 'date', 'start_time', 'end_time',
+            'doctor__user__first_name', 'doctor__user__last_name',
+            'doctor__specialization', 'doctor__clinic_name',
+        )[:limit]
+    )
+
+
+def slot_status(booking):
+    if booking.is_rejected:
+        return "rejected"
+    return "held" if booking.hold_expires_at else "booked"
+
+
+def build_calendar(doctors, start_date=None, days=CALENDAR_HORIZON_DAYS, batch_size=1000):
+    """(Re)build the Slot rows of the given doctors from start_date for `days` days.
+
+    Existing rows of the window are replaced; slot status is taken from the
+    bookings of the window, which are loaded with a single query.
+    """
+    start_date = start_date or date.today()
+    end_date = start_date + timedelta(days=days - 1)
+    doctor_ids = [doctor.id for doctor in doctors]
+
+    bookings = {}
+    for booking in Booking.objects.filter(
+        doctor_id__in=doctor_ids, date__range=(start_date, end_date)
+    ).only('id', 'doctor_id', 'date', 'start_time', 'is_rejected', 'hold_expires_at'):
+        bookings[(booking.doctor_id, booking.date, booking.start_time)] = booking
+
+    slots = []
+    for doctor in doctors:
+        for day in daterange(start_date, end_date):
+            if not works_on(doctor, day):
+                continue
+            for start_time, end_time in slot_times(doctor, day):
+                booking = bookings.get((doctor.id, day, start_time))
+                slots.append(Slot(
+                    doctor_id=doctor.id,
+                    date=day,
+                    start_time=start_time,
+                    end_time=end_time,
+                    status=slot_status(booking) if booking else "free",
+                    booking=booking,
+                ))
+
+    with transaction.atomic():
+        Slot.objects.filter(doctor_id__in=doctor_ids, date__gte=start_date).delete()
+        Slot.objects.bulk_create(slots, batch_size=batch_size)
+        DoctorProfile.objects.filter(id__in=doctor_ids).update(slots_generated_until=end_date)
+
+    for doctor in doctors:
+        doctor.slots_generated_until = end_date
+    return len(slots)
+
+
+def extend_calendars(doctors, until=None, batch_size=1000):
+    """Build the calendar days each doctor is missing up to `until` (default: the end of the horizon).
+
+    Only days after slots_generated_until are written (from today for a doctor
+    without a calendar, or with one that ended in the past), so rolling the
+    horizon forward costs one day of slots per doctor. Returns the number of
+    slots created.
+    """
+    today = date.today()
+    until = until or today + timedelta(days=CALENDAR_HORIZON_DAYS - 1)
+    doctors_by_start = {}
+    for doctor in doctors:
+        start_date = today
+        if doctor.slots_generated_until is not None:
+            start_date = max(today, doctor.slots_generated_until + timedelta(days=1))
+        if start_date <= until:
+            doctors_by_start.setdefault(start_date, []).append(doctor)
+
+    created = 0
+    for start_date, group in doctors_by_start.items():
+        try:
+            created += build_calendar(group, start_date, (until - start_date).days + 1, batch_size)
+        except IntegrityError:
+            # A concurrent request extended these calendars first
+            pass
+    return created
+
+
+def prune_past_slots(today=None):
+    """Delete the Slot rows of days gone by; nothing reads them. Returns the number deleted."""
+    deleted, _ = Slot.objects.filter(date__lt=today or date.today()).delete()
+    return deleted
+
+
+def rebuild_doctor_calendar(doctor):
+    """Regenerate one doctor's calendar after a schedule change (DoctorProfile.save), or build its first."""
+    if doctor.slots_generated_until is None:
+        return build_calendar([doctor])
+    days = max((doctor.slots_generated_until - date.today()).days + 1, CALENDAR_HORIZON_DAYS)
+    return build_calendar([doctor], days=days)
+
+
+def sync_slot(booking, created=True):
+    """Update the materialized slot of a booking in place (Booking post_save, see patient/signals.py).
+
+    A booking moved to another time first lets go of the slot it had.
+    """
+    if not created:
+        Slot.objects.filter(booking=booking).exclude(
+            doctor_id=booking.doctor_id, date=booking.date, start_time=booking.start_time
+        ).update(status="free", booking=None)
+    return Slot.objects.filter(
+        doctor_id=booking.doctor_id, date=booking.date, start_time=booking.start_time
+    ).update(status=slot_status(booking), booking=booking)
+
+
+def free_slot(booking):
+    """Free the slot of a deleted booking; the SET_NULL foreign key only drops the link."""
+    return Slot.objects.filter(
+        doctor_id=booking.doctor_id, date=booking.date, start_time=booking.start_time, booking__isnull=True
+    ).update(status="free")
+
+
+def hold_expiry():
+    """Expiry time for a slot hold created now."""
+    return timezone.now() + timedelta(minutes=SLOT_HOLD_MINUTES)
+
+
+def confirm_hold(booking, payment_id):
+    """Turn a held online booking into a confirmed one after payment."""
+    booking.hold_expires_at = None
+    booking.payment_status = "success"
+    booking.payment_id = payment_id
+    booking.save(update_fields=['hold_expires_at', 'payment_status', 'payment_id'])
+
+
+def release_expired_holds(**filters):
+    """Delete every expired, unpaid hold in bulk and free its slots.
+
+    Extra filters (e.g. doctor/date/start_time) narrow the sweep to one slot.
+    Holds being confirmed by VerifyPaymentView are locked and skipped. Holds
+    with a payment order are kept as ReleasedHold rows, since the patient may
+    still pay. Returns the number of released holds.
+
+    Booking's per-row delete receivers stand aside while the sweep deletes
+    (see sweeping()); what they would do hold by hold is done here once per
+    sweep instead.
+
+    On SQLite select_for_update is a no-op, so overlapping sweeps are not
+    kept apart by row locks: SQLite runs one write transaction at a time, the
+    later sweep waits (or fails with "database is locked") and then finds
+    the holds gone. A sweep that deleted nothing stops there; a partial
+    overlap only logs a change twice, which sync clients apply idempotently.
+    """
+    with transaction.atomic():
+        expired = list(
+            Booking.objects.filter(hold_expires_at__lte=timezone.now(), **filters)
+            .exclude(payment_status="success")
+            .select_for_update(skip_locked=True)
+            .values('id', 'patient_id', 'doctor_id', 'date', 'start_time', 'end_time', 'payment_id')
+        )
+        if not expired:
+            return 0
+        ids = [hold['id'] for hold in expired]
+
+        ordered = [hold for hold in expired if hold['payment_id']]
+        if ordered:
+            infos = {
+                info.pop('booking_id'): info for info in PatientBookingInfo.objects.filter(
+                    booking_id__in=[hold['id'] for hold in ordered]
+                ).values('booking_id', *HOLD_INFO_FIELDS)
+            }
+            ReleasedHold.objects.bulk_create([
+                ReleasedHold(
+                    booking_id=hold['id'], patient_id=hold['patient_id'], doctor_id=hold['doctor_id'],
+                    date=hold['date'], start_time=hold['start_time'], end_time=hold['end_time'],
+                    patient_info=infos.get(hold['id'], {}),
+                )
+                for hold in ordered
+            ], ignore_conflicts=True)
+
+        Slot.objects.filter(booking_id__in=ids).update(status="free", booking=None)
+        token = _sweeping.set(True)
+        try:
+            _, deleted = Booking.objects.filter(id__in=ids).delete()
+        finally:
+            _sweeping.reset(token)
+        deleted = deleted.get(Booking._meta.label, 0)
+        if not deleted:
+            return 0
+
+        record_changes(expired)
+        bookings_deleted(expired)
+        # The freed slots must not stay cached as booked
+        invalidate_availability_many({(hold['doctor_id'], hold['date']) for hold in expired})
+    return deleted
+
+
+def rebook_released_hold(hold_id, payment_id):
+    """Honour a payment verified after its hold was released: (ReleasedHold, new booking or None).
+
+    The slot is booked again (paid) if it is still free; otherwise the
+    payment is recorded on the hold and flagged for refund. A hold settles
+    once, so a repeated verification returns the earlier outcome.
+    """
+    with transaction.atomic():
+        hold = ReleasedHold.objects.select_for_update().get(id=hold_id)
+        if hold.payment_id:
+            return hold, None
+
+        booking = None
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    booking = Booking.objects.create(
+                        doctor_id=hold.doctor_id,
+                        patient_id=hold.patient_id,
+                        date=hold.date,
+                        start_time=hold.start_time,
+                        end_time=hold.end_time,
+                        payment_method="online",
+                        payment_status="success",
+                        payment_id=payment_id,
+                    )
+                    PatientBookingInfo.objects.create(booking=booking, **hold.patient_info)
+                break
+            except IntegrityError:
+                booking = None
+                # The slot may only be taken by another expired hold
+                if attempt or not release_expired_holds(
+                    doctor_id=hold.doctor_id, date=hold.date, start_time=hold.start_time
+                ):
+                    break
+
+        hold.payment_id = payment_id
+        hold.rebooked = booking
+        hold.needs_refund = booking is None
+        hold.save(update_fields=['payment_id', 'rebooked', 'needs_refund'])
+    return hold, booking
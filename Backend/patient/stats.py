@@ -0,0 +1,181 @@
+# patient/stats.py
+from datetime import date, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Min, Q, Subquery, Sum
+
+from .models import Booking, DailyBookingStats, DoctorPatientStats
+
+STATS_SERIES_DAYS = 30
+MAX_SERIES_DAYS = 366
+
+# Bookings that will (or did) take place; an online booking counts once it is paid
+KEPT_BOOKINGS = Q(is_rejected=False) & (~Q(payment_method="online") | Q(payment_status="success"))
+
+DAY_COUNTERS = {
+    "booked": Count('id'),
+    "rejected": Count('id', filter=Q(is_rejected=True)),
+    "online": Count('id', filter=Q(payment_method="online")),
+    # Counter bookings are created as "success" too, but only online payments are payments
+    "paid": Count('id', filter=Q(payment_method="online", payment_status="success")),
+    "kept": Count('id', filter=KEPT_BOOKINGS),
+}
+PATIENT_COUNTERS = {
+    "bookings": Count('id'),
+    "first_date": Min('date'),
+}
+
+
+def upsert(model, keys, values, create=True):
+    """Set `values` on the row identified by `keys`, creating it if needed (and allowed)."""
+    if model.objects.filter(**keys).update(**values) or not create:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **values)
+    except IntegrityError:
+        # A concurrent write created the row first
+        model.objects.filter(**keys).update(**values)
+
+
+def refresh_day(doctor_id, day, create=True):
+    """Recount one doctor's day from its bookings (a handful of rows, found by the unique index)."""
+    counts = Booking.objects.filter(doctor_id=doctor_id, date=day).aggregate(**DAY_COUNTERS)
+    if counts["booked"]:
+        upsert(DailyBookingStats, {"doctor_id": doctor_id, "date": day}, counts, create)
+    else:
+        DailyBookingStats.objects.filter(doctor_id=doctor_id, date=day).delete()
+
+
+def refresh_patient(doctor_id, patient_id, create=True):
+    counts = Booking.objects.filter(KEPT_BOOKINGS, doctor_id=doctor_id, patient_id=patient_id).aggregate(
+        **PATIENT_COUNTERS
+    )
+    if counts["bookings"]:
+        upsert(DoctorPatientStats, {"doctor_id": doctor_id, "patient_id": patient_id}, counts, create)
+    else:
+        DoctorPatientStats.objects.filter(doctor_id=doctor_id, patient_id=patient_id).delete()
+
+
+def booking_changed(booking, deleted=False):
+    """Bring the counters touched by one booking write or delete up to date.
+
+    Deletes never create rows: when the doctor or patient is being deleted,
+    the cascade removes their counters too.
+    """
+    refresh_day(booking.doctor_id, booking.date, create=not deleted)
+    refresh_patient(booking.doctor_id, booking.patient_id, create=not deleted)
+
+
+def bookings_deleted(bookings):
+    """booking_changed for a bulk delete of rows (dicts with doctor_id, patient_id and date).
+
+    Each day and patient touched is recounted once, however many of its rows went.
+    """
+    for doctor_id, day in {(row['doctor_id'], row['date']) for row in bookings}:
+        refresh_day(doctor_id, day, create=False)
+    for doctor_id, patient_id in {(row['doctor_id'], row['patient_id']) for row in bookings}:
+        refresh_patient(doctor_id, patient_id, create=False)
+
+
+def rebuild_stats(doctor_ids=None):
+    """Recompute every counter row (of the given doctors) from the bookings, set-based."""
+    bookings = Booking.objects.all()
+    days = DailyBookingStats.objects.all()
+    patients = DoctorPatientStats.objects.all()
+    if doctor_ids is not None:
+        bookings = bookings.filter(doctor_id__in=doctor_ids)
+        days = days.filter(doctor_id__in=doctor_ids)
+        patients = patients.filter(doctor_id__in=doctor_ids)
+
+    with transaction.atomic():
+        days.delete()
+        patients.delete()
+        DailyBookingStats.objects.bulk_create(
+            [DailyBookingStats(**row) for row in bookings.values('doctor_id', 'date').annotate(**DAY_COUNTERS)],
+            batch_size=1000
+        )
+        DoctorPatientStats.objects.bulk_create(
+            [
+                DoctorPatientStats(**row)
+                for row in bookings.filter(KEPT_BOOKINGS).values('doctor_id', 'patient_id').annotate(
+                    **PATIENT_COUNTERS
+                )
+            ],
+            batch_size=1000
+        )
+
+
+EMPTY_TOTALS = {
+    "fee": 0, "total_booked": 0, "total_rejected": 0, "completed": 0, "on_today": 0, "upcoming": 0,
+    "total_online": 0, "total_paid": 0, "seen_patients": 0,
+}
+
+
+def doctor_stats(doctor, days=STATS_SERIES_DAYS, today=None):
+    """Dashboard numbers of a doctor, read from the counter tables only, in two queries.
+
+    Totals, the number of patients seen (per-patient rows whose first kept
+    booking is in the past) and the consultation fee come from one conditional
+    aggregation over the per-day rows; the series from a range scan of the
+    last `days` days. None of it touches Booking. Appointments and revenue
+    count kept bookings only: unpaid online holds are not appointments yet.
+    """
+    today = today or date.today()
+    seen_patients = DoctorPatientStats.objects.filter(doctor=doctor, first_date__lt=today).order_by().values(
+        'doctor'
+    ).annotate(
+        count=Count('id')
+    ).values('count')
+    # One group (the doctor's fee); aliases must not shadow the counter columns they sum
+    totals = next(iter(
+        DailyBookingStats.objects.filter(doctor=doctor).order_by().values(fee=F('doctor__consultation_fee')).annotate(
+            total_booked=Sum('booked', default=0),
+            total_rejected=Sum('rejected', default=0),
+            completed=Sum('kept', filter=Q(date__lt=today), default=0),
+            on_today=Sum('kept', filter=Q(date=today), default=0),
+            upcoming=Sum('kept', filter=Q(date__gt=today), default=0),
+            total_online=Sum('online', default=0),
+            total_paid=Sum('paid', default=0),
+            seen_patients=Subquery(seen_patients),
+        )
+    ), EMPTY_TOTALS)
+
+    start = today - timedelta(days=days - 1)
+    rows = {
+        row['date']: row for row in DailyBookingStats.objects.filter(
+            doctor=doctor, date__range=(start, today)
+        ).values('date', 'booked', 'rejected', 'paid')
+    }
+    series = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = rows.get(day, {})
+        series.append({
+            "date": day.isoformat(),
+            "booked": row.get('booked', 0),
+            "rejected": row.get('rejected', 0),
+            "paid": row.get('paid', 0),
+        })
+
+    # No counter rows means no bookings, so nothing to multiply the fee by
+    fee = totals['fee']
+    return {
+        "total_appointments": totals['total_booked'],
+        "completed_appointments": totals['completed'],
+        "today_appointments": totals['on_today'],
+        "upcoming_appointments": totals['upcoming'],
+        "rejected_appointments": totals['total_rejected'],
+        "total_patients_seen": totals['seen_patients'] or 0,
+        # No ratings are collected yet
+        "average_rating": None,
+        "online_payments": totals['total_online'],
+        "successful_payments": totals['total_paid'],
+        "payment_success_rate": (
+            round(totals['total_paid'] / totals['total_online'], 4) if totals['total_online'] else None
+        ),
+        # At the current consultation fee
+        "revenue": fee * totals['completed'],
+        "expected_revenue": fee * (totals['on_today'] + totals['upcoming']),
+        "series": series,
+    }
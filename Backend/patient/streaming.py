@@ -0,0 +1,53 @@
+# patient/streaming.py
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+STREAM_CHUNK_SIZE = 2000
+STREAM_FORMATS = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def encode(item):
+    """One item encoded exactly as JSONRenderer would encode it."""
+    text = json.dumps(
+        item, cls=encoders.JSONEncoder, ensure_ascii=JSONRenderer.ensure_ascii,
+        allow_nan=not JSONRenderer.strict, separators=(',', ':') if JSONRenderer.compact else (', ', ': ')
+    )
+    return text.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+
+
+def json_array_chunks(items, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield a JSON array piecewise; the joined bytes equal JSONRenderer's output for list(items)."""
+    yield b"["
+    separator = ""
+    batch = []
+    for item in items:
+        batch.append(separator + encode(item))
+        separator = ","
+        if len(batch) >= chunk_size:
+            yield "".join(batch).encode()
+            batch = []
+    yield ("".join(batch) + "]").encode()
+
+
+def ndjson_chunks(items, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield one JSON document per line, chunk_size lines at a time."""
+    batch = []
+    for item in items:
+        batch.append(encode(item) + "\n")
+        if len(batch) >= chunk_size:
+            yield "".join(batch).encode()
+            batch = []
+    if batch:
+        yield "".join(batch).encode()
+
+
+def streaming_response(items, stream_format, chunk_size=STREAM_CHUNK_SIZE):
+    """StreamingHttpResponse writing `items` as a JSON array or NDJSON while they are produced."""
+    chunks = ndjson_chunks if stream_format == "ndjson" else json_array_chunks
+    return StreamingHttpResponse(chunks(items, chunk_size), content_type=STREAM_FORMATS[stream_format])
@@ -0,0 +1,84 @@
+# patient/sync.py
+"""Delta sync of bookings for clients that keep an offline copy.
+
+Every booking write or delete appends a BookingChange row. A client keeps
+the id of the last change it has applied (its cursor) and asks for what
+happened after it: the current rows of the bookings touched since, plus the
+ids of touched bookings that no longer exist (tombstones). A refresh costs
+one index range read over the new changes, however long the history is.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+
+from .models import Booking, BookingChange
+
+SYNC_PAGE_SIZE = 500
+MAX_SYNC_PAGE_SIZE = 5000
+# Change ids are drawn before commit, so a change can become visible after a
+# later id already was; cursors never move past changes younger than this
+SYNC_SETTLE_SECONDS = 2
+
+
+def record_change(booking_id, doctor_id, patient_id):
+    BookingChange.objects.create(booking_id=booking_id, doctor_id=doctor_id, patient_id=patient_id)
+
+
+def record_changes(bookings):
+    """record_change for many rows (dicts with id, doctor_id and patient_id) in one insert."""
+    BookingChange.objects.bulk_create([
+        BookingChange(booking_id=row['id'], doctor_id=row['doctor_id'], patient_id=row['patient_id'])
+        for row in bookings
+    ])
+
+
+def record_booking_change(booking):
+    record_change(booking.id, booking.doctor_id, booking.patient_id)
+
+
+def record_booking_info_change(info):
+    """Patient details live beside the booking; editing them changes what clients hold."""
+    owners = Booking.objects.filter(id=info.booking_id).values_list('doctor_id', 'patient_id').first()
+    if owners is not None:
+        record_change(info.booking_id, *owners)
+
+
+def parse_sync_params(query_params):
+    """(since, page_size) from ?since= (default 0: everything) and ?page_size=."""
+    try:
+        since = int(query_params.get('since', 0))
+        page_size = int(query_params.get('page_size', SYNC_PAGE_SIZE))
+    except ValueError:
+        raise ParseError("'since' and 'page_size' must be integers")
+    if since < 0:
+        raise ParseError("'since' must not be negative")
+    return since, max(1, min(page_size, MAX_SYNC_PAGE_SIZE))
+
+
+def booking_delta(bookings, owner, since, page_size, serialize):
+    """Changes after cursor `since` for one owner, at most page_size log entries at a time.
+
+    bookings is the owner's Booking queryset, owner the matching BookingChange
+    filter ({"doctor_id": ...} or {"patient_id": ...}) and serialize(queryset)
+    turns bookings into dicts carrying their id. Returns
+    {"cursor", "has_more", "changed", "deleted"}; clients call again with the
+    returned cursor until has_more is false.
+    """
+    settled = timezone.now() - timedelta(seconds=SYNC_SETTLE_SECONDS)
+    changes = list(
+        BookingChange.objects.filter(**owner, id__gt=since, changed_at__lte=settled)
+        .order_by('id').values_list('id', 'booking_id')[:page_size + 1]
+    )
+    has_more = len(changes) > page_size
+    changes = changes[:page_size]
+
+    touched = {booking_id for _, booking_id in changes}
+    changed = serialize(bookings.filter(id__in=touched).order_by('id')) if touched else []
+    present = {item['id'] for item in changed}
+    return {
+        "cursor": changes[-1][0] if changes else since,
+        "has_more": has_more,
+        "changed": changed,
+        "deleted": sorted(touched - present),
+    }
@@ -1,3 +1,709 @@
+from datetime import date, datetime, time, timedelta
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import CustomUser
+from accounts.tokens import ProfileRefreshToken
+from doctor.models import DoctorProfile
+from doctor.serializers import DoctorProfileSerializer
+from .models import (
+    Booking, BookingChange, DailyBookingStats, DoctorPatientStats, PatientBookingInfo, ReleasedHold, Slot,
+)
+from .reminders import send_due_reminders
+from .rows import doctor_values, serialize_appointments, serialize_doctors
+from .serializers import PatientAppointmentSerializer
+from .slots import (
+    AVAILABILITY_CACHE_TIMEOUT, CALENDAR_HORIZON_DAYS, build_calendar, hold_expiry, release_expired_holds,
+    slots_for_range,
+)
+from .views.patient_views import (
+    BookSlotView, DoctorAvailableSlotsView, DoctorListView, NextAvailableSlotsView, PatientAppointmentsView,
+    RejectBookingView, filter_doctors,
+)
+from .views.payment_views import VerifyPaymentView
+
+EVERY_DAY = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+# One page query, whatever the page size or depth (the ETag comes from a cached version)
+DOCTOR_LIST_QUERIES = 1
+
+
+def create_doctor(index=0, **overrides):
+    user = CustomUser.objects.create_user(
+        email=f"doctor-{index}@example.com", password=None, first_name="Doc", last_name=str(index), role="doctor"
+    )
+    fields = dict(
+        phone_number="0000000000",
+        specialization="cardiology",
+        years_of_experience=5,
+        consultation_fee=500,
+        qualifications="MBBS",
+        clinic_name=f"Clinic {index}",
+        address="Main Street",
+        working_days=EVERY_DAY,
+        start_time=time(9, 0),
+        end_time=time(12, 0),
+        appointment_duration=30,
+        bio="Doctor",
+    )
+    fields.update(overrides)
+    return DoctorProfile.objects.create(user=user, **fields)
+
+
+def create_patient(index=0):
+    return CustomUser.objects.create_user(
+        email=f"patient-{index}@example.com", password=None, first_name="Pat", last_name=str(index), role="patient"
+    )
+
+
+def create_booking(doctor, patient, day, start_time, **fields):
+    end_time = (datetime.combine(day, start_time) + timedelta(minutes=doctor.appointment_duration)).time()
+    booking = Booking.objects.create(doctor=doctor, patient=patient, date=day, start_time=start_time,
+                                     end_time=end_time, **fields)
+    PatientBookingInfo.objects.create(
+        booking=booking, full_name="Pat", phone_number="0000000000", date_of_birth=date(1990, 1, 1)
+    )
+    return booking
+
+
+class DoctorListQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctor_ids = [create_doctor(index).id for index in range(30)]
+
+    def walk(self, page_size):
+        """Follow the listing's cursors to the end; every request must stay within the budget."""
+        factory = APIRequestFactory()
+        view = DoctorListView.as_view()
+        request = factory.get("/", {"page_size": page_size})
+        seen = []
+        while request is not None:
+            with self.assertNumQueries(DOCTOR_LIST_QUERIES):
+                response = view(request).render()
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data["results"]), page_size)
+            seen.extend(doctor["id"] for doctor in response.data["results"])
+            request = factory.get(response.data["next"]) if response.data["next"] else None
+        return seen
+
+    def test_query_count_is_constant(self):
+        for page_size in (1, 7, 30, 100):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.walk(page_size), self.doctor_ids)
+
+    def test_revalidation_costs_no_query(self):
+        factory = APIRequestFactory()
+        view = DoctorListView.as_view()
+        etag = view(factory.get("/", {"page_size": 5})).render()["ETag"]
+
+        with self.assertNumQueries(0):
+            response = view(factory.get("/", {"page_size": 5}, HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 304)
+        # Other filters get their own ETag
+        self.assertNotEqual(view(factory.get("/", {"page_size": 6})).render()["ETag"], etag)
+
+        doctor = DoctorProfile.objects.get(id=self.doctor_ids[0])
+        doctor.clinic_name = "Renamed Clinic"
+        doctor.save()
+        response = view(factory.get("/", {"page_size": 5}, HTTP_IF_NONE_MATCH=etag)).render()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class FilterDoctorsTests(TestCase):
+    """The day/time filters read WorkingWindow rows, which must follow every schedule change."""
+
+    def setUp(self):
+        self.early = create_doctor(0, working_days=["monday", "wednesday"], start_time=time(9, 0), end_time=time(12, 0))
+        self.late = create_doctor(1, working_days=["tuesday"], start_time=time(14, 0), end_time=time(18, 0))
+        self.daily = create_doctor(2, start_time=time(8, 0), end_time=time(10, 0))
+
+    def filtered(self, **params):
+        return list(filter_doctors(DoctorProfile.objects.order_by('id'), params))
+
+    def test_day_and_hours(self):
+        early, late, daily = self.early, self.late, self.daily
+        cases = [
+            ({"day": "Monday"}, [early, daily]),
+            ({"day": "tuesday", "available_after": "13:00"}, [late]),
+            ({"day": "monday", "available_after": "10:00"}, [early]),
+            # Bounds are exclusive: working until 10:00 is not available after 10:00
+            ({"available_after": "10:00"}, [early, late]),
+            ({"available_before": "09:00"}, [daily]),
+            ({"available_after": "09:30", "available_before": "15:00"}, [early, late, daily]),
+            ({"day": "sunday", "available_before": "09:00"}, [daily]),
+        ]
+        for params, expected in cases:
+            with self.subTest(**params):
+                self.assertEqual(self.filtered(**params), expected)
+
+    def test_invalid_filters_are_rejected(self):
+        for params in ({"day": "someday"}, {"available_after": "9am"}):
+            with self.subTest(**params), self.assertRaises(ValidationError):
+                self.filtered(**params)
+
+    def test_windows_follow_schedule_changes(self):
+        early = DoctorProfile.objects.get(id=self.early.id)
+        early.working_days = ["friday"]
+        early.save()
+        self.assertEqual(self.filtered(day="monday"), [self.daily])
+        self.assertEqual(self.filtered(day="friday"), [early, self.daily])
+
+        early.end_time = time(15, 0)
+        early.save(update_fields=["end_time"])
+        self.assertEqual(self.filtered(day="friday", available_after="14:00"), [early])
+        self.assertEqual(list(early.working_windows.values_list("weekday", "end_time")), [(4, time(15, 0))])
+
+        # Saves that leave the schedule alone keep the rows
+        window_ids = list(early.working_windows.values_list("id", flat=True))
+        early.clinic_name = "Moved Clinic"
+        early.save()
+        self.assertEqual(list(early.working_windows.values_list("id", flat=True)), window_ids)
+
+
+class SerializerParityTests(TestCase):
+    """The rows fast path must render the same bytes as the serializers it stands in for."""
+
+    @classmethod
+    def setUpTestData(cls):
+        plain = create_doctor(0)
+        accented = create_doctor(1, clinic_name="Clínica Ñúñez", address="Straße 5", qualifications="医学士")
+        CustomUser.objects.filter(id=accented.user_id).update(first_name="Zoë", last_name="Ñúñez")
+        DoctorProfile.objects.filter(id=accented.id).update(profile_photo="doctor_photos/zoë.jpg")
+        # No name at all falls back to "N/A"
+        nameless = create_doctor(2, latitude=12.5, longitude=-45.25)
+        CustomUser.objects.filter(id=nameless.user_id).update(first_name="", last_name="")
+        patient = create_patient()
+        tomorrow = date.today() + timedelta(days=1)
+        create_booking(plain, patient, tomorrow, time(9, 0))
+        create_booking(accented, patient, tomorrow, time(9, 0), payment_method="online")
+        rejected = create_booking(nameless, patient, tomorrow, time(9, 0))
+        rejected.reject(reason="Fully booked — désolé")
+        # A booking whose info row was never written
+        Booking.objects.create(doctor=plain, patient=patient, date=tomorrow, start_time=time(10, 0),
+                               end_time=time(10, 30))
+        PatientBookingInfo.objects.filter(booking__doctor=accented).update(
+            full_name="Zoë Ñúñez", reason_to_visit="Müdigkeit", symptoms_or_concerns="头痛"
+        )
+
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+    def test_appointments_match_the_serializer(self):
+        bookings = Booking.objects.order_by("id")
+
+        expected = self.render(PatientAppointmentSerializer(bookings, many=True).data)
+        self.assertEqual(self.render(serialize_appointments(bookings)), expected)
+
+    def test_doctors_match_the_serializer(self):
+        request = APIRequestFactory().get("/")
+        doctors = DoctorProfile.objects.order_by("id")
+
+        expected = self.render(DoctorProfileSerializer(doctors, many=True, context={"request": request}).data)
+        self.assertEqual(self.render(serialize_doctors(doctor_values(doctors), request)), expected)
+
+
+class PatientAppointmentsPagesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = create_patient()
+        doctor = create_doctor()
+        # Four a day for five days on each side of today (today's split depends on the clock)
+        days = [date.today() + timedelta(days=offset) for offset in (-5, -4, -3, -2, -1, 1, 2, 3, 4, 5)]
+        bookings = Booking.objects.bulk_create([
+            Booking(doctor=doctor, patient=cls.patient, date=day, start_time=time(9 + index // 2, 30 * (index % 2)),
+                    end_time=time(9 + index // 2, 30 * (index % 2) + 29))
+            for day in days for index in range(4)
+        ])
+        PatientBookingInfo.objects.bulk_create([
+            PatientBookingInfo(booking=booking, full_name="Pat", phone_number="0", date_of_birth=date(1990, 1, 1))
+            for booking in bookings
+        ])
+        cls.upcoming = [booking.id for booking in bookings[20:]]
+        cls.past = [booking.id for booking in reversed(bookings[:20])]
+
+    def walk(self, mode, page_size):
+        token = ProfileRefreshToken.for_user(self.patient).access_token
+        factory = APIRequestFactory()
+        view = PatientAppointmentsView.as_view()
+        request = factory.get("/", {"mode": mode, "page_size": page_size}, HTTP_AUTHORIZATION=f"Bearer {token}")
+        seen = []
+        while request is not None:
+            # The page and the COUNT behind X-Total-Count; claims authentication costs none
+            with self.assertNumQueries(2):
+                response = view(request)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["X-Total-Count"], "20")
+            seen.extend(appointment["id"] for appointment in response.data["results"])
+            next_url = response.data["next"]
+            request = factory.get(next_url, HTTP_AUTHORIZATION=f"Bearer {token}") if next_url else None
+        return seen
+
+    def test_cursors_cover_each_mode_in_order(self):
+        for mode, expected in (("upcoming", self.upcoming), ("past", self.past)):
+            for page_size in (1, 6, 50):
+                with self.subTest(mode=mode, page_size=page_size):
+                    self.assertEqual(self.walk(mode, page_size), expected)
+
+
+class PatientAppointmentsModeTests(TestCase):
+    """Where today splits, how ties order, and where pages end, with the clock stopped at noon."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = create_patient()
+        doctor, other_doctor = create_doctor(0), create_doctor(1)
+        today = date.today()
+
+        def book(doctor, day, start_time):
+            return create_booking(doctor, cls.patient, day, start_time).id
+
+        cls.past = [book(doctor, today, time(11, 30)), book(doctor, today - timedelta(days=1), time(9, 0))]
+        cls.upcoming = [
+            book(doctor, today, time(12, 0)),
+            book(doctor, today, time(12, 30)),
+            # Same date and time at two doctors: the id breaks the tie
+            book(doctor, today + timedelta(days=1), time(9, 0)),
+            book(other_doctor, today + timedelta(days=1), time(9, 0)),
+        ]
+        # Somebody else's appointments are neither listed nor counted
+        stranger = create_patient(1)
+        create_booking(doctor, stranger, today + timedelta(days=1), time(10, 0))
+        create_booking(doctor, stranger, today - timedelta(days=1), time(10, 0))
+
+    def setUp(self):
+        noon = datetime.combine(date.today(), time(12, 0))
+
+        class Clock(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return noon
+
+        self.enterContext(mock.patch("patient.views.patient_views.datetime", Clock))
+        self.token = ProfileRefreshToken.for_user(self.patient).access_token
+
+    def pages(self, mode, page_size):
+        factory = APIRequestFactory()
+        view = PatientAppointmentsView.as_view()
+        request = factory.get("/", {"mode": mode, "page_size": page_size}, HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        pages = []
+        while request is not None:
+            response = view(request)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["X-Total-Count"], str(len(getattr(self, mode))))
+            pages.append([appointment["id"] for appointment in response.data["results"]])
+            next_url = response.data["next"]
+            request = factory.get(next_url, HTTP_AUTHORIZATION=f"Bearer {self.token}") if next_url else None
+        return pages
+
+    def test_today_splits_at_now(self):
+        self.assertEqual(self.pages("upcoming", 10), [self.upcoming])
+        self.assertEqual(self.pages("past", 10), [self.past])
+
+    def test_page_boundaries(self):
+        upcoming = self.upcoming
+        # A full last page has no next cursor, so there is never an empty trailing page
+        self.assertEqual(self.pages("upcoming", 4), [upcoming])
+        self.assertEqual(self.pages("upcoming", 2), [upcoming[:2], upcoming[2:]])
+        # A page ending inside a date/time tie resumes at the other half of it
+        self.assertEqual(self.pages("upcoming", 3), [upcoming[:3], upcoming[3:]])
+        self.assertEqual(self.pages("past", 1), [[booking_id] for booking_id in self.past])
+
+    def test_unknown_mode_is_rejected(self):
+        request = APIRequestFactory().get("/", {"mode": "soon"}, HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+        self.assertEqual(PatientAppointmentsView.as_view()(request).status_code, 400)
+
+
+class NextAvailableSlotsTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.view = NextAvailableSlotsView.as_view()
+
+    def get(self, **params):
+        return self.view(self.factory.get("/", params))
+
+    def test_past_after_is_clamped_to_now(self):
+        # Round-the-clock hours, so some of today's slots have always started
+        doctor = create_doctor(start_time=time(0, 0), end_time=time(23, 59))
+        build_calendar([doctor])
+        now = timezone.localtime().replace(tzinfo=None)
+
+        response = self.get(after=(date.today() - timedelta(days=1)).isoformat(), limit=3)
+
+        self.assertEqual(response.status_code, 200)
+        starts = [
+            datetime.strptime(f"{slot['date']} {slot['start_time']}", "%Y-%m-%d %I:%M %p")
+            for slot in response.data["slots"]
+        ]
+        self.assertEqual(len(starts), 3)
+        self.assertGreaterEqual(starts[0], now.replace(second=0, microsecond=0))
+
+    def test_listing_does_not_build_calendars(self):
+        doctor = create_doctor()
+        Slot.objects.filter(doctor=doctor).delete()
+        DoctorProfile.objects.filter(id=doctor.id).update(slots_generated_until=None)
+
+        self.assertEqual(self.get().data["slots"], [])
+        self.assertFalse(Slot.objects.filter(doctor=doctor).exists())
+
+    def test_extend_command_rolls_lagging_calendars_forward(self):
+        doctor = create_doctor()
+        build_calendar([doctor], start_date=date.today() - timedelta(days=3), days=5)
+
+        call_command("build_slot_calendar", "--extend", stdout=StringIO())
+
+        doctor.refresh_from_db()
+        self.assertEqual(doctor.slots_generated_until, date.today() + timedelta(days=CALENDAR_HORIZON_DAYS - 1))
+        # Days gone by are pruned, the horizon is complete
+        self.assertFalse(Slot.objects.filter(doctor=doctor, date__lt=date.today()).exists())
+        self.assertEqual(Slot.objects.filter(doctor=doctor).count(), CALENDAR_HORIZON_DAYS * 6)
+
+
+class CalendarSyncTests(TestCase):
+    """The Slot table follows profile and booking writes, whichever code path makes them."""
+
+    def setUp(self):
+        self.doctor = create_doctor()
+        self.day = date.today() + timedelta(days=1)
+
+    def slots(self, **filters):
+        return dict(
+            Slot.objects.filter(doctor=self.doctor, date=self.day, **filters).values_list('start_time', 'status')
+        )
+
+    def test_saved_schedule_change_regenerates_the_calendar(self):
+        self.assertEqual(len(self.slots()), 6)
+        doctor = DoctorProfile.objects.get(id=self.doctor.id)
+        doctor.end_time = time(10, 0)
+        doctor.save()
+
+        self.assertEqual(self.slots(), {time(9, 0): "free", time(9, 30): "free"})
+
+    def test_booking_writes_and_deletes_move_the_slot_status(self):
+        booking = create_booking(self.doctor, create_patient(), self.day, time(9, 0))
+        self.assertEqual(self.slots(status="booked"), {time(9, 0): "booked"})
+
+        booking.start_time, booking.end_time = time(10, 0), time(10, 30)
+        booking.save()
+        self.assertEqual(self.slots(status="booked"), {time(10, 0): "booked"})
+
+        booking.delete()
+        self.assertEqual(self.slots(status="booked"), {})
+
+
+class BookSlotTests(TestCase):
+    def setUp(self):
+        self.doctor = create_doctor()
+        self.patient = create_patient()
+        self.day = date.today() + timedelta(days=1)
+
+    def book(self, patient=None):
+        request = APIRequestFactory().post("/", {
+            "date": self.day.isoformat(), "start_time": "09:00 AM", "end_time": "09:30 AM",
+            "full_name": "Pat", "phone_number": "0000000000", "date_of_birth": "1990-01-01",
+        }, format="json")
+        force_authenticate(request, user=patient or self.patient)
+        return BookSlotView.as_view()(request, doctor_id=self.doctor.id)
+
+    def slot_status(self):
+        return Slot.objects.get(doctor=self.doctor, date=self.day, start_time=time(9, 0)).status
+
+    def test_taken_slot_is_a_conflict(self):
+        create_booking(self.doctor, create_patient(1), self.day, time(9, 0))
+
+        response = self.book()
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Booking.objects.filter(doctor=self.doctor, date=self.day).count(), 1)
+
+    def test_slot_held_by_an_expired_hold_is_released_and_booked(self):
+        create_booking(self.doctor, create_patient(1), self.day, time(9, 0), payment_method="online",
+                       hold_expires_at=timezone.now() - timedelta(minutes=1))
+
+        response = self.book()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Booking.objects.get(doctor=self.doctor, date=self.day).patient, self.patient)
+
+    def test_failed_patient_info_rolls_back_the_booking(self):
+        with mock.patch.object(PatientBookingInfo.objects, "create", side_effect=DatabaseError("disk full")):
+            with self.assertRaises(DatabaseError):
+                self.book()
+
+        self.assertFalse(Booking.objects.exists())
+        self.assertEqual(self.slot_status(), "free")
+        # The slot is still there to be booked
+        self.assertEqual(self.book().status_code, 201)
+        self.assertEqual(self.slot_status(), "booked")
+
+
+class RejectBookingTests(TestCase):
+    def setUp(self):
+        self.doctor = create_doctor()
+        self.patient = create_patient()
+        self.booking = create_booking(self.doctor, self.patient, date.today() + timedelta(days=1), time(9, 0))
+
+    def reject(self, user):
+        request = APIRequestFactory().post("/", {"reason": "Away"}, format="json")
+        force_authenticate(request, user=user)
+        return RejectBookingView.as_view()(request, booking_id=self.booking.id)
+
+    def test_only_the_booked_doctor_can_reject(self):
+        publish = self.enterContext(mock.patch("patient.views.patient_views.publish_booking_event"))
+        for user in (self.patient, create_doctor(1).user):
+            with self.subTest(role=user.role):
+                self.assertEqual(self.reject(user).status_code, 403)
+        publish.assert_not_called()
+        self.booking.refresh_from_db()
+        self.assertFalse(self.booking.is_rejected)
+
+        response = self.reject(self.doctor.user)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["is_rejected"], response.data["rejection_reason"]), (True, "Away"))
+        publish.assert_called_once()
+
+
+class DoctorAvailableSlotsRangeTests(TestCase):
+    WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday"]
+
+    def setUp(self):
+        cache.clear()
+        self.doctor = create_doctor(working_days=self.WEEKDAYS)
+        self.patient = create_patient()
+        self.horizon_end = self.doctor.slots_generated_until
+        booked, held, expired = (create_patient(index) for index in (1, 2, 3))
+        # A busy working day inside the calendar and one on its last days
+        for day in (self.working_day(date.today() + timedelta(days=1)), self.working_day(self.horizon_end)):
+            create_booking(self.doctor, booked, day, time(9, 0))
+            create_booking(self.doctor, held, day, time(9, 30), payment_method="online",
+                           hold_expires_at=hold_expiry())
+            create_booking(self.doctor, expired, day, time(10, 0), payment_method="online",
+                           hold_expires_at=timezone.now() - timedelta(minutes=1))
+
+    def working_day(self, day):
+        while day.strftime("%A").lower() not in self.WEEKDAYS:
+            day -= timedelta(days=1)
+        return day
+
+    def get(self, **params):
+        cache.clear()
+        request = APIRequestFactory().get("/", params)
+        force_authenticate(request, user=self.patient)
+        response = DoctorAvailableSlotsView.as_view()(request, doctor_id=self.doctor.id)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_range_equals_single_day_calls(self):
+        inside = date.today() + timedelta(days=1)
+        # The second window runs past the calendar, so it is generated from bookings instead
+        for start in (inside, self.horizon_end - timedelta(days=6)):
+            with self.subTest(start=start):
+                dates = self.get(**{"from": start.isoformat(), "days": 10})["dates"]
+
+                self.assertEqual(len(dates), 10)
+                for day, slots in dates.items():
+                    self.assertEqual(slots, self.get(date=day)["slots"])
+
+    def test_bookings_and_active_holds_are_busy(self):
+        for day in (self.working_day(date.today() + timedelta(days=1)), self.working_day(self.horizon_end)):
+            # Reached once from inside the calendar and once from a window generated past it
+            for params in ({"from": day.isoformat(), "days": 1}, {"from": day.isoformat(), "days": 3}):
+                with self.subTest(day=day, **params):
+                    slots = self.get(**params)["dates"][day.isoformat()]
+                    busy = [slot["start_time"] for slot in slots if slot["is_booked"]]
+
+                    self.assertEqual(busy, ["09:00 AM", "09:30 AM"])
+
+
+class AvailabilityCacheHoldTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.doctor = create_doctor()
+        self.day = date.today() + timedelta(days=1)
+        build_calendar([self.doctor])
+        self.hold = create_booking(
+            self.doctor, create_patient(), self.day, time(9, 0), payment_method="online", hold_expires_at=hold_expiry()
+        )
+
+    def first_slot(self):
+        return slots_for_range(self.doctor, self.day, self.day)[self.day.isoformat()][0]
+
+    def test_date_with_a_hold_is_cached_no_longer_than_the_hold(self):
+        with mock.patch.object(cache, "set_many", wraps=cache.set_many) as set_many:
+            slots_for_range(self.doctor, self.day, self.day + timedelta(days=1))
+
+        timeouts = {
+            key.rsplit(":", 1)[1]: call.kwargs["timeout"] for call in set_many.call_args_list for key in call.args[0]
+        }
+        left = (self.hold.hold_expires_at - timezone.now()).total_seconds()
+        self.assertLessEqual(timeouts[self.day.isoformat()], left + 1)
+        self.assertEqual(timeouts[(self.day + timedelta(days=1)).isoformat()], AVAILABILITY_CACHE_TIMEOUT)
+
+    def test_released_hold_is_dropped_from_the_cache(self):
+        self.assertTrue(self.first_slot()["is_booked"])
+        Booking.objects.filter(id=self.hold.id).update(hold_expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(release_expired_holds(), 1)
+
+        self.assertFalse(self.first_slot()["is_booked"])
+
+
+class ReleaseExpiredHoldsTests(TestCase):
+    def setUp(self):
+        self.doctor = create_doctor()
+        self.patient = create_patient()
+        self.day = date.today() + timedelta(days=1)
+        build_calendar([self.doctor])
+        # A paid booking on the same day keeps that day's counters alive
+        create_booking(self.doctor, create_patient(1), self.day, time(11, 0), payment_status="success")
+
+    def hold(self, day, start_time, **fields):
+        return create_booking(
+            self.doctor, self.patient, day, start_time, payment_method="online",
+            hold_expires_at=timezone.now() - timedelta(minutes=1), **fields
+        )
+
+    def test_sweep_costs_the_same_however_many_holds_it_releases(self):
+        for count in (1, 4):
+            with self.subTest(holds=count):
+                holds = [self.hold(self.day, time(9 + index // 2, 30 * (index % 2))) for index in range(count)]
+                last_change = BookingChange.objects.order_by('id').last().id
+
+                # Lock and read, free the slots, the delete (one read, details, two unlinks, holds), log, recount
+                with self.assertNumQueries(14):
+                    self.assertEqual(release_expired_holds(), count)
+
+                self.assertFalse(Booking.objects.filter(id__in=[hold.id for hold in holds]).exists())
+                self.assertFalse(PatientBookingInfo.objects.filter(booking_id__in=[hold.id for hold in holds]).exists())
+                self.assertEqual(Slot.objects.filter(doctor=self.doctor, date=self.day, status="free").count(), 5)
+                self.assertEqual(
+                    sorted(BookingChange.objects.filter(id__gt=last_change).values_list('booking_id', flat=True)),
+                    [hold.id for hold in holds]
+                )
+                stats = DailyBookingStats.objects.get(doctor=self.doctor, date=self.day)
+                self.assertEqual((stats.booked, stats.online), (1, 0))
+                self.assertFalse(DoctorPatientStats.objects.filter(doctor=self.doctor, patient=self.patient).exists())
+
+    def test_days_left_without_bookings_lose_their_counters(self):
+        later = self.day + timedelta(days=1)
+        self.hold(later, time(9, 0), payment_id="order_1")
+
+        self.assertEqual(release_expired_holds(), 1)
+
+        self.assertFalse(DailyBookingStats.objects.filter(doctor=self.doctor, date=later).exists())
+        self.assertEqual(ReleasedHold.objects.get().date, later)
+
+
+@mock.patch("patient.views.payment_views.client.utility.verify_payment_signature")
+class LatePaymentTests(TestCase):
+    """A payment verified after its slot hold expired."""
+
+    def setUp(self):
+        self.doctor = create_doctor()
+        self.patient = create_patient()
+        self.day = date.today() + timedelta(days=1)
+        build_calendar([self.doctor])
+        # Checkout was opened (an order exists), then the hold expired
+        self.hold = create_booking(
+            self.doctor, self.patient, self.day, time(9, 0), payment_method="online",
+            payment_id="order_1", hold_expires_at=timezone.now() - timedelta(minutes=1),
+        )
+
+    def verify(self):
+        request = APIRequestFactory().post("/", {
+            "booking_id": self.hold.id,
+            "razorpay_payment_id": "pay_1",
+            "razorpay_order_id": "order_1",
+            "razorpay_signature": "signature",
+        }, format="json")
+        force_authenticate(request, user=self.patient)
+        return VerifyPaymentView.as_view()(request)
+
+    def test_expired_hold_not_swept_yet_is_confirmed(self, verify_signature):
+        response = self.verify()
+
+        self.assertEqual(response.status_code, 200)
+        self.hold.refresh_from_db()
+        self.assertEqual((self.hold.payment_status, self.hold.hold_expires_at), ("success", None))
+
+    def test_released_hold_is_rebooked(self, verify_signature):
+        self.assertEqual(release_expired_holds(), 1)
+
+        response = self.verify()
+
+        self.assertEqual(response.status_code, 200)
+        booking = Booking.objects.get(id=response.data["booking_id"])
+        self.assertEqual((booking.start_time, booking.payment_status, booking.payment_id), (time(9, 0), "success", "pay_1"))
+        self.assertEqual(booking.patient_info.date_of_birth, date(1990, 1, 1))
+        self.assertEqual(Slot.objects.get(booking=booking).status, "booked")
+        # A repeated verification does not book twice
+        self.assertEqual(self.verify().data["booking_id"], booking.id)
+
+    def test_slot_taken_since_release_is_flagged_for_refund(self, verify_signature):
+        release_expired_holds()
+        create_booking(self.doctor, create_patient(1), self.day, time(9, 0), payment_status="success")
+
+        response = self.verify()
+
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(response.data["refund"])
+        released = ReleasedHold.objects.get(booking_id=self.hold.id)
+        self.assertEqual((released.payment_id, released.needs_refund, released.rebooked), ("pay_1", True, None))
+
+
+class ReminderScheduleTests(TestCase):
+    def setUp(self):
+        self.doctor = create_doctor()
+        self.patient = create_patient()
+        self.sent = []
+        self.backend = mock.Mock(send=self.sent.extend)
+
+    def book_ahead(self, hours):
+        starts_at = (timezone.localtime() + timedelta(hours=hours)).replace(second=0, microsecond=0)
+        return create_booking(self.doctor, self.patient, starts_at.date(), starts_at.time(), payment_status="success")
+
+    def send(self, at):
+        self.sent.clear()
+        send_due_reminders(now=at, backend=self.backend)
+        return [reminder["lead_hours"] for reminder in self.sent]
+
+    def test_stage_due_before_the_booking_was_made_is_skipped(self):
+        booking = self.book_ahead(3)
+
+        self.assertEqual(booking.next_reminder_at, booking.starts_at - timedelta(hours=1))
+        self.assertEqual(self.send(timezone.now()), [])
+        self.assertEqual(self.send(booking.starts_at - timedelta(minutes=59)), [1])
+        self.assertEqual(self.send(booking.starts_at - timedelta(minutes=1)), [])
+
+    def test_booking_made_days_ahead_gets_every_stage(self):
+        booking = self.book_ahead(48)
+
+        self.assertEqual(self.send(booking.starts_at - timedelta(hours=23)), [24])
+        self.assertEqual(self.send(booking.starts_at - timedelta(minutes=30)), [1])
+
+    def test_backfill_schedules_like_the_model(self):
+        backfill = import_module("patient.migrations.0012_booking_reminders")
+        now = timezone.now()
+        for hours in (0.5, 3, 48):
+            with self.subTest(hours=hours):
+                booking = self.book_ahead(hours)
+                self.assertEqual(backfill.first_reminder_due(booking, now), booking.next_reminder_due(now))
+                booking.delete()
+
+    def test_booking_inside_the_last_stage_is_reminded_at_once(self):
+        booking = self.book_ahead(0.5)
 
-# Create your tests here.
+        self.assertEqual(self.send(timezone.now()), [1])
+        booking.refresh_from_db()
+        self.assertIsNone(booking.next_reminder_at)
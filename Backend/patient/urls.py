@@ -1,13 +1,18 @@
 from django.urls import path
-from .views.patient_views import DoctorAvailableSlotsView,DoctorListView,BookSlotView,PatientAppointmentsView,RejectBookingView
+from .views.patient_views import DoctorAvailableSlotsView,DoctorListView,DoctorFacetsView,DoctorAutocompleteView,NextAvailableSlotsView,BookSlotView,PatientAppointmentsView,PatientAppointmentsSyncView,RejectBookingView,AvailabilityCacheStatsView
 from .views.chatbot_view import MedicalChatView
 from .views.payment_views import CreatePaymentOrderView,VerifyPaymentView
 
 urlpatterns = [
     path('doctor_listing/', DoctorListView.as_view(), name='doctor_listing'),
+    path('doctor_facets/', DoctorFacetsView.as_view(), name='doctor-facets'),
+    path('doctor_autocomplete/', DoctorAutocompleteView.as_view(), name='doctor-autocomplete'),
+    path('next_available_slots/', NextAvailableSlotsView.as_view(), name='next-available-slots'),
     path('<int:doctor_id>/available_slots/', DoctorAvailableSlotsView.as_view(), name='doctor-available-slots'),
     path('<int:doctor_id>/book_slot/', BookSlotView.as_view(), name='book-slot'),
+    path('availability_cache_stats/', AvailabilityCacheStatsView.as_view(), name='availability-cache-stats'),
     path('patient-appointment/', PatientAppointmentsView.as_view(), name='patient-appointment'),
+    path('patient-appointment/sync/', PatientAppointmentsSyncView.as_view(), name='patient-appointment-sync'),
     path('booking/<int:booking_id>/reject/', RejectBookingView.as_view(), name='reject-booking'),
     path('chatbot/', MedicalChatView.as_view(), name='chatbot'),
     path("create_payment_order/", CreatePaymentOrderView.as_view(), name="create_payment_order"),
@@ -4,41 +4,186 @@ from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from django.db.models import Q
-from datetime import datetime, timedelta
-from doctor.models import DoctorProfile
+from django.utils import timezone
+from datetime import date, datetime, timedelta
+from doctor.geo import DEFAULT_RADIUS_KM, MAX_RADIUS_KM, near
+from doctor.models import DoctorProfile, WEEKDAYS
+from doctor.conditional import listing_etag, not_modified, set_validators
+from doctor.facets import cached_facets
+from doctor.autocomplete import DEFAULT_AUTOCOMPLETE, MAX_AUTOCOMPLETE, get_index as get_autocomplete_index
+from doctor.search import get_search_backend
 from ..models import Booking,PatientBookingInfo
 from ..serializers import BookingSerializer,PatientBookingInfoSerializer,PatientAppointmentSerializer
 from doctor.serializers import DoctorProfileSerializer 
-from rest_framework.permissions import IsAuthenticated
+from ..events import BOOKING_CREATED, BOOKING_REJECTED, publish_booking_event
+from ..pagination import BookingKeysetPagination, DoctorCursorPagination
+from ..rows import doctor_values, serialize_appointments, serialize_doctors
+from ..sync import booking_delta, parse_sync_params
+from ..slots import (
+    DEFAULT_NEXT_SLOTS, MAX_NEXT_SLOTS, MAX_RANGE_DAYS, SLOT_TIME_FORMAT,
+    availability_cache_stats, hold_expiry, local_now, next_free_slots, release_expired_holds, slots_for_range,
+    works_on,
+)
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import ClaimsJWTAuthentication
+
+
+def parse_filter_time(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%H:%M").time()
+    except ValueError:
+        raise ValidationError({name: "Use HH:MM (24-hour)."})
+
+
+def filter_doctors(queryset, params):
+    """Apply the doctor_listing filters to a DoctorProfile queryset.
+
+    specialization, search, the schedule filters day, available_after and
+    available_before (HH:MM), which are answered from the indexed WorkingWindow
+    rows, and near=<lat>,<lng> with radius_km, which orders results by distance.
+    """
+    specialization = params.get('specialization')
+    search = params.get('search')
+    day = (params.get('day') or '').lower()
+    available_after = parse_filter_time(params, 'available_after')
+    available_before = parse_filter_time(params, 'available_before')
+
+    if specialization and specialization.lower() != "all":
+        queryset = queryset.filter(specialization__iexact=specialization)
+
+    if day or available_after or available_before:
+        if day and day not in WEEKDAYS:
+            raise ValidationError({"day": f"'{day}' is not a valid day"})
+        # Prefix selects the day's window when `day` is given, else the shared daily hours
+        prefix = 'working_windows__' if day else ''
+        window = {}
+        if day:
+            window['working_windows__weekday'] = WEEKDAYS.index(day)
+        if available_after:
+            window[f'{prefix}end_time__gt'] = available_after
+        if available_before:
+            window[f'{prefix}start_time__lt'] = available_before
+        # One filter() call so every condition applies to the same window row
+        queryset = queryset.filter(**window)
+
+    if search:
+        queryset = get_search_backend().search(queryset, search)
+
+    near_param = params.get('near')
+    if near_param:
+        try:
+            latitude, longitude = (float(part) for part in near_param.split(','))
+            radius_km = float(params.get('radius_km', DEFAULT_RADIUS_KM))
+        except ValueError:
+            raise ValidationError({"near": "Use near=<lat>,<lng> and a numeric radius_km."})
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValidationError({"near": "Coordinates are out of range."})
+        if not 0 < radius_km <= MAX_RADIUS_KM:
+            raise ValidationError({"radius_km": f"Must be between 0 and {MAX_RADIUS_KM}."})
+        # Applied last so distance order wins over search relevance
+        queryset = near(queryset, latitude, longitude, radius_km)
+
+    return queryset
 
 
 class DoctorListView(generics.ListAPIView):
     serializer_class = DoctorProfileSerializer
     permission_classes = [AllowAny]
     authentication_classes = []
+    pagination_class = DoctorCursorPagination
 
     def get_queryset(self):
-        queryset = DoctorProfile.objects.all()
-        specialization = self.request.query_params.get('specialization')
-        search = self.request.query_params.get('search')
-
-        if specialization and specialization.lower() != "all":
-            queryset = queryset.filter(specialization__iexact=specialization)
-
-        if search:
-            words = search.lower().split()
-            query = Q()
-            for word in words:
-                query &= (
-                    Q(user__first_name__icontains=word) |
-                    Q(user__last_name__icontains=word) |
-                    Q(clinic_name__icontains=word)
-                )
-            queryset = queryset.filter(query)
-
-        return queryset
+        # select_related: the serializer reads user.get_full_name and user.email per row
+        queryset = DoctorProfile.objects.select_related('user')
+        return filter_doctors(queryset, self.request.query_params)
+
+    def list(self, request, *args, **kwargs):
+        # No Last-Modified here: a deletion changes the listing without moving any timestamp
+        etag = listing_etag(request.query_params)
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+
+        # Read-only fast path: flat rows instead of per-instance DoctorProfileSerializer
+        page = self.paginate_queryset(doctor_values(self.get_queryset()))
+        response = self.get_paginated_response(serialize_doctors(page, request))
+        return set_validators(response, etag)
+
+
+class DoctorFacetsView(APIView):
+    """Filter-sidebar counts for the doctors matching the doctor_listing filters."""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        params = {key: value for key, value in request.query_params.items() if key not in ('cursor', 'page_size')}
+        queryset = filter_doctors(DoctorProfile.objects.all(), params)
+        return Response(cached_facets(queryset, params))
+
+
+class DoctorAutocompleteView(APIView):
+    """Search-box suggestions served from the in-process prefix index."""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        try:
+            limit = max(1, min(int(request.GET.get("limit", DEFAULT_AUTOCOMPLETE)), MAX_AUTOCOMPLETE))
+        except ValueError:
+            return Response({"error": "'limit' must be an integer"}, status=400)
+
+        results = [
+            {
+                "id": entry["id"],
+                "full_name": entry["full_name"],
+                "profile_photo_url": request.build_absolute_uri(entry["profile_photo"]) if entry["profile_photo"] else None,
+            }
+            for entry in get_autocomplete_index().search(request.GET.get("q", ""), limit)
+        ]
+        return Response(results)
+
+
+class NextAvailableSlotsView(APIView):
+    """Earliest free slots across every doctor matching the doctor_listing filters."""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        after_str = request.GET.get("after")
+        try:
+            if not after_str:
+                after = local_now()
+            elif "T" in after_str:
+                after = datetime.strptime(after_str, "%Y-%m-%dT%H:%M")
+            else:
+                after = datetime.strptime(after_str, "%Y-%m-%d")
+            limit = int(request.GET.get("limit", DEFAULT_NEXT_SLOTS))
+        except ValueError:
+            return Response({"error": "Invalid 'after' (YYYY-MM-DD or YYYY-MM-DDTHH:MM) or 'limit'"}, status=400)
+
+        limit = max(1, min(limit, MAX_NEXT_SLOTS))
+        after = max(after, local_now())
+        doctors = filter_doctors(DoctorProfile.objects.all(), request.query_params)
+        slots = [
+            {
+                "doctor_id": row["doctor_id"],
+                "doctor": f"{row['doctor__user__first_name']} {row['doctor__user__last_name']}".strip() or "N/A",
+                "specialization": row["doctor__specialization"],
+                "clinic_name": row["doctor__clinic_name"],
+                "date": row["date"].isoformat(),
+                "start_time": row["start_time"].strftime(SLOT_TIME_FORMAT),
+                "end_time": row["end_time"].strftime(SLOT_TIME_FORMAT),
+            }
+            for row in next_free_slots(doctors, after, limit)
+        ]
+        return Response({"after": after.isoformat(), "slots": slots})
 
 # patient/views.py
 # patient/views.py
@@ -77,37 +222,51 @@ class BookSlotView(APIView):
         except ValueError:
             return Response({"error": "Invalid date/time format"}, status=400)
 
-        # 4️⃣ Check slot availability
-        if Booking.objects.filter(doctor=doctor, patient=request.user, date=date_obj).exists():
+        # 4️⃣ One appointment per patient per doctor per day (expired holds don't count)
+        if Booking.objects.filter(
+            doctor=doctor, patient=request.user, date=date_obj
+        ).exclude(hold_expires_at__lte=timezone.now()).exists():
             return Response({"error": "You already have an appointment with this doctor on this date"}, status=400)
-        if Booking.objects.filter(doctor=doctor, date=date_obj, start_time=start_time_obj).exists():
-            return Response({"error": "This slot is already booked"}, status=400)
-
-        # 5️⃣ Create booking
-        booking = Booking.objects.create(
-            doctor=doctor,
-            patient=request.user,
-            date=date_obj,
-            start_time=start_time_obj,
-            end_time=end_time_obj,
-            payment_method=payment_method,
-            payment_status="success" if payment_method == "counter" else "pending"
-        )
-
-        PatientBookingInfo.objects.create(
-            booking=booking,
-            full_name=full_name,
-            email=email,
-            phone_number=phone_number,
-            date_of_birth=dob_obj,
-            reason_to_visit=reason_to_visit,
-            symptoms_or_concerns=symptoms_or_concerns
-        )
+
+        # 5️⃣ Create booking + patient info atomically; the (doctor, date, start_time)
+        # unique constraint decides who gets a contended slot. Online bookings only
+        # hold the slot until payment is verified.
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    booking = Booking.objects.create(
+                        doctor=doctor,
+                        patient=request.user,
+                        date=date_obj,
+                        start_time=start_time_obj,
+                        end_time=end_time_obj,
+                        payment_method=payment_method,
+                        payment_status="success" if payment_method == "counter" else "pending",
+                        hold_expires_at=hold_expiry() if payment_method == "online" else None
+                    )
+
+                    PatientBookingInfo.objects.create(
+                        booking=booking,
+                        full_name=full_name,
+                        email=email,
+                        phone_number=phone_number,
+                        date_of_birth=dob_obj,
+                        reason_to_visit=reason_to_visit,
+                        symptoms_or_concerns=symptoms_or_concerns
+                    )
+                break
+            except IntegrityError:
+                # The slot may only be taken by an expired hold the sweeper hasn't reached yet
+                if attempt or not release_expired_holds(doctor=doctor, date=date_obj, start_time=start_time_obj):
+                    return Response({"error": "This slot is already booked"}, status=status.HTTP_409_CONFLICT)
+
+        publish_booking_event(BOOKING_CREATED, booking)
 
         # ✅ Return booking_id for both counter and online payments
         return Response({
             "id": booking.id,  # ✅ Added this
-            "message": f"Appointment booked successfully for {start_time_str} - {end_time_str}"
+            "message": f"Appointment booked successfully for {start_time_str} - {end_time_str}",
+            "hold_expires_at": booking.hold_expires_at
         }, status=201)
 
 
@@ -122,6 +281,9 @@ class DoctorAvailableSlotsView(APIView):
         except DoctorProfile.DoesNotExist:
             return Response({"error": "Doctor not found"}, status=404)
 
+        if any(param in request.GET for param in ("from", "to", "days")):
+            return self.get_range(request, doctor)
+
         date_str = request.GET.get("date")
         if not date_str:
             return Response({"error": "Date is required (YYYY-MM-DD)"}, status=400)
@@ -132,49 +294,110 @@ class DoctorAvailableSlotsView(APIView):
             return Response({"error": "Invalid date format, use YYYY-MM-DD"}, status=400)
 
         weekday = date_obj.strftime("%A").lower()
-        if weekday not in doctor.working_days:
+        if not works_on(doctor, date_obj):
             return Response({
                 "doctor": doctor.user.get_full_name(),
                 "slots": [],
                 "message": f"Doctor does not take appointments on {weekday.title()}."
             })
 
-        # Generate slots
-        start = datetime.combine(date_obj, doctor.start_time)
-        end = datetime.combine(date_obj, doctor.end_time)
-        duration = timedelta(minutes=doctor.appointment_duration)
-
-        # Get already booked slots
-        booked_slots = Booking.objects.filter(doctor=doctor, date=date_obj).values_list('start_time', flat=True)
-
-        slots = []
-        current = start
-        while current + duration <= end:
-            slots.append({
-                "start_time": current.strftime("%I:%M %p"),
-                "end_time": (current + duration).strftime("%I:%M %p"),
-                "is_booked": current.time() in booked_slots
-            })
-            current += duration
-
         return Response({
             "doctor": doctor.user.get_full_name(),
             "date": date_str,
-            "slots": slots
+            "slots": slots_for_range(doctor, date_obj, date_obj)[date_obj.isoformat()]
         })
 
-class PatientAppointmentsView(APIView):
+    def get_range(self, request, doctor):
+        """Multi-day mode: ?from=YYYY-MM-DD&to=YYYY-MM-DD or ?from=&days=N (from defaults to today)."""
+        from_str = request.GET.get("from") or request.GET.get("date")
+        to_str = request.GET.get("to")
+        days_str = request.GET.get("days")
+
+        try:
+            start_date = datetime.strptime(from_str, "%Y-%m-%d").date() if from_str else date.today()
+            if to_str:
+                end_date = datetime.strptime(to_str, "%Y-%m-%d").date()
+            elif days_str:
+                days = int(days_str)
+                if days < 1:
+                    raise ValueError
+                end_date = start_date + timedelta(days=days - 1)
+            else:
+                return Response({"error": "Provide either 'to' or 'days' with 'from'"}, status=400)
+        except ValueError:
+            return Response({"error": "Invalid range, use from/to as YYYY-MM-DD and days as a positive integer"}, status=400)
+
+        if end_date < start_date:
+            return Response({"error": "'to' must not be before 'from'"}, status=400)
+        if (end_date - start_date).days + 1 > MAX_RANGE_DAYS:
+            return Response({"error": f"Range cannot exceed {MAX_RANGE_DAYS} days"}, status=400)
+
+        return Response({
+            "doctor": doctor.user.get_full_name(),
+            "from": start_date.isoformat(),
+            "to": end_date.isoformat(),
+            "dates": slots_for_range(doctor, start_date, end_date)
+        })
+
+class AvailabilityCacheStatsView(APIView):
+    """Hit/miss counters of the availability cache (staff only)."""
     authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(availability_cache_stats())
+
+# Keyset orderings of PatientAppointmentsView's modes: soonest first, most recent first
+APPOINTMENT_MODES = {
+    "upcoming": ('date', 'start_time', 'id'),
+    "past": ('-date', '-start_time', '-id'),
+}
+
+
+def appointment_split(mode, now):
+    """Filter for appointments starting at or after `now` (upcoming) or before it (past)."""
+    # The date bound alone is an index range; the OR only trims today's slots
+    today, now_time = now.date(), now.time()
+    if mode == "upcoming":
+        return Q(date__gte=today) & (Q(date__gt=today) | Q(start_time__gte=now_time))
+    return Q(date__lte=today) & (Q(date__lt=today) | Q(start_time__lt=now_time))
+
+
+class PatientAppointmentsView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        # Fetch all bookings for the logged-in patient
-        bookings = Booking.objects.filter(patient=request.user).select_related(
-            'doctor', 'doctor__user', 'patient_info'
-        ).order_by('-date', 'start_time')
+        bookings = Booking.objects.filter(patient=request.user)
+
+        # Without ?mode= the whole history is returned, newest day first
+        mode = request.query_params.get('mode')
+        if mode is None:
+            return Response(serialize_appointments(bookings.order_by('-date', 'start_time')))
+        if mode not in APPOINTMENT_MODES:
+            return Response(
+                {"error": f"'mode' must be one of: {', '.join(APPOINTMENT_MODES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # ?mode=upcoming|past: keyset pages of {"next", "results"} on the (patient, date, start_time)
+        # index, plus the mode's total in X-Total-Count; two queries whatever the page size or depth
+        bookings = bookings.filter(appointment_split(mode, datetime.now()))
+        page = BookingKeysetPagination(APPOINTMENT_MODES[mode]).paginate(request, bookings, serialize_appointments)
+        return Response(page, headers={"X-Total-Count": str(bookings.count())})
 
-        serializer = PatientAppointmentSerializer(bookings, many=True)
-        return Response(serializer.data)
+
+class PatientAppointmentsSyncView(APIView):
+    """Appointments changed since ?since=<cursor>, for clients keeping an offline copy."""
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        since, page_size = parse_sync_params(request.query_params)
+        bookings = Booking.objects.filter(patient=request.user)
+        return Response(booking_delta(
+            bookings, {"patient_id": request.user.id}, since, page_size, serialize_appointments
+        ))
     
 
 class RejectBookingView(APIView):
@@ -183,8 +406,12 @@ class RejectBookingView(APIView):
     def post(self, request, booking_id):
         reason = request.data.get("reason", "")
         try:
-            booking = Booking.objects.get(id=booking_id)
+            booking = Booking.objects.select_related('doctor').get(id=booking_id)
+            # Only the doctor the booking is with may reject it
+            if booking.doctor.user_id != request.user.id:
+                return Response({"error": "You can only reject your own bookings"}, status=403)
             booking.reject(reason=reason)
+            publish_booking_event(BOOKING_REJECTED, booking)
             serializer = PatientAppointmentSerializer(booking)
             return Response(serializer.data)
         except Booking.DoesNotExist:
@@ -4,8 +4,12 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 import razorpay
-from ..models import Booking
+from ..models import Booking, ReleasedHold
+from ..events import BOOKING_CREATED, PAYMENT_STATUS_CHANGED, publish_booking_event
+from ..slots import confirm_hold, rebook_released_hold
 from dotenv import load_dotenv
 import os
 load_dotenv()
@@ -31,6 +35,9 @@ class CreatePaymentOrderView(APIView):
         except Booking.DoesNotExist:
             return Response({"error": "Booking not found"}, status=404)
 
+        if booking.is_hold_expired:
+            return Response({"error": "Slot hold expired, please book again"}, status=410)
+
         # Razorpay expects amount in paise
         amount_paise = int(float(amount) * 100)
 
@@ -50,11 +57,17 @@ class CreatePaymentOrderView(APIView):
         booking.payment_status = "pending"
         booking.save()
 
+        # Orders cannot expire, so Checkout is closed (Razorpay's `timeout` option) when the hold runs out
+        timeout = None
+        if booking.hold_expires_at:
+            timeout = max(int((booking.hold_expires_at - timezone.now()).total_seconds()), 1)
+
         return Response({
             "order_id": order["id"],
             "amount": order["amount"],
             "currency": order["currency"],
-            "razorpay_key": RAZORPAY_KEY_ID 
+            "razorpay_key": RAZORPAY_KEY_ID,
+            "timeout": timeout
         })
 
 
@@ -71,10 +84,13 @@ class VerifyPaymentView(APIView):
         if not all([booking_id, razorpay_payment_id, razorpay_order_id, razorpay_signature]):
             return Response({"error": "Missing payment details"}, status=400)
 
-        try:
-            booking = Booking.objects.get(id=booking_id, patient=request.user)
-        except Booking.DoesNotExist:
-            return Response({"error": "Booking not found"}, status=404)
+        # The hold may have expired and been released while the patient was in checkout
+        booking = Booking.objects.filter(id=booking_id, patient=request.user).first()
+        released = None
+        if booking is None:
+            released = ReleasedHold.objects.filter(booking_id=booking_id, patient=request.user).first()
+            if released is None:
+                return Response({"error": "Booking not found"}, status=404)
 
         # Verify signature
         try:
@@ -85,12 +101,38 @@ class VerifyPaymentView(APIView):
             }
             client.utility.verify_payment_signature(params_dict)
         except razorpay.errors.SignatureVerificationError:
-            booking.payment_status = "failed"
-            booking.save()
+            if booking is not None:
+                booking.payment_status = "failed"
+                booking.save()
+                publish_booking_event(PAYMENT_STATUS_CHANGED, booking)
             return Response({"error": "Payment verification failed"}, status=400)
 
-        # Payment successful
-        booking.payment_status = "success"
-        booking.payment_id = razorpay_payment_id
-        booking.save()
-        return Response({"success": True, "message": "Payment verified and booking confirmed"})
+        if booking is not None:
+            # Payment successful: the slot hold becomes a confirmed booking. The lock keeps
+            # the sweeper from releasing it meanwhile, even if it has just expired.
+            with transaction.atomic():
+                booking = Booking.objects.select_for_update().filter(id=booking.id).first()
+                if booking is not None:
+                    confirm_hold(booking, razorpay_payment_id)
+            if booking is not None:
+                publish_booking_event(PAYMENT_STATUS_CHANGED, booking)
+                return Response({"success": True, "message": "Payment verified and booking confirmed"})
+            # Released between the lookup and the lock
+            released = ReleasedHold.objects.filter(booking_id=booking_id).first()
+            if released is None:
+                return Response({"error": "Booking not found"}, status=404)
+
+        released, rebooked = rebook_released_hold(released.id, razorpay_payment_id)
+        if rebooked is not None:
+            publish_booking_event(BOOKING_CREATED, rebooked)
+        if released.rebooked_id is not None:
+            return Response({
+                "success": True,
+                "message": "Payment verified and booking confirmed",
+                "booking_id": released.rebooked_id
+            })
+        return Response({
+            "error": "Your slot hold expired and the slot was booked by someone else. "
+                     "The payment has been recorded and will be refunded.",
+            "refund": True
+        }, status=409)
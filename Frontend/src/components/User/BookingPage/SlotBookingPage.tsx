@@ -45,6 +45,7 @@ interface RazorpayOptions {
   order_id: string;
   name: string;
   description: string;
+  timeout?: number;
   handler: (response: RazorpayResponse) => void;
   prefill: {
     name: string;
@@ -253,7 +254,7 @@ const MultiStepSlotBooking = () => {
           { headers: { Authorization: `Bearer ${localStorage.getItem("access_token")}` } }
         );
 
-        const { order_id, amount: r_amount, currency, razorpay_key } = orderRes.data;
+        const { order_id, amount: r_amount, currency, razorpay_key, timeout } = orderRes.data;
         console.log("Payment order created:", order_id);
 
         setBookingLoading(false);
@@ -265,6 +266,8 @@ const MultiStepSlotBooking = () => {
           order_id: order_id,
           name: "Doctor Appointment",
           description: "Appointment Payment",
+          // Checkout closes when the slot hold expires
+          ...(timeout ? { timeout } : {}),
           handler: async function (response: RazorpayResponse) {
             console.log("Payment successful:", response);
             try {
@@ -288,7 +291,11 @@ const MultiStepSlotBooking = () => {
             } catch (err) {
               console.error("Payment verification failed:", err);
               setBookingLoading(false);
-              setMessage("Payment verification failed. Please contact support.");
+              if (axios.isAxiosError(err) && err.response?.data?.refund) {
+                setMessage(err.response.data.error);
+              } else {
+                setMessage("Payment verification failed. Please contact support.");
+              }
             }
           },
           prefill: {
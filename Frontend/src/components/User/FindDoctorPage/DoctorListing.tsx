@@ -28,6 +28,7 @@ const DoctorPage = () => {
   const [searchQuery, setSearchQuery] = useState<string>("");
   const [specialties, setSpecialties] = useState<string[]>([]);
   const [doctors, setDoctors] = useState<Doctor[]>([]);
+  const [nextPage, setNextPage] = useState<string | null>(null);
   const [error, setError] = useState<string>("");
 
   const navigate = useNavigate();
@@ -64,7 +65,21 @@ const DoctorPage = () => {
       if (params.length > 0) url += `?${params.join("&")}`;
 
       const res = await axios.get(url);
-      setDoctors(res.data);
+      setDoctors(res.data.results);
+      setNextPage(res.data.next);
+    } catch (err) {
+      console.error("Error fetching doctors:", err);
+      setError("Failed to load doctors. Please try again later.");
+    }
+  };
+
+  // Listing is cursor-paginated; follow the "next" link to append a page
+  const loadMore = async () => {
+    if (!nextPage) return;
+    try {
+      const res = await axios.get(nextPage);
+      setDoctors((prev) => [...prev, ...res.data.results]);
+      setNextPage(res.data.next);
     } catch (err) {
       console.error("Error fetching doctors:", err);
       setError("Failed to load doctors. Please try again later.");
@@ -187,6 +202,17 @@ const DoctorPage = () => {
           ))}
         </div>
       )}
+
+      {nextPage && (
+        <div className="flex justify-center mt-10">
+          <button
+            onClick={loadMore}
+            className="px-6 py-2.5 border border-gray-200 rounded-xl text-[var(--color-text-main)] hover:bg-gray-50 transition font-medium text-sm"
+          >
+            Load more doctors
+          </button>
+        </div>
+      )}
     </div>
   );
 };
@@ -1,4 +1,5 @@
-import { useEffect, useState } from "react";
+import { useCallback, useEffect, useState } from "react";
+import { useDoctorEvents } from "./useDoctorEvents";
 
 interface Stats {
   total_appointments: number;
@@ -15,27 +16,30 @@ export const Appointment_info_card = () => {
     average_rating: 0,
   });
 
-  useEffect(() => {
-    const fetchStats = async () => {
-      try {
-        const response = await fetch("http://localhost:8000/doctor/appointment-stats/", {
-          headers: {
-            "Content-Type": "application/json",
-            Authorization: `Bearer ${localStorage.getItem("access_token")}`,
-          },
-        });
+  const fetchStats = useCallback(async () => {
+    try {
+      const response = await fetch("http://localhost:8000/doctor/appointment-stats/", {
+        headers: {
+          "Content-Type": "application/json",
+          Authorization: `Bearer ${localStorage.getItem("access_token")}`,
+        },
+      });
 
-        if (!response.ok) throw new Error("Failed to fetch appointment stats");
+      if (!response.ok) throw new Error("Failed to fetch appointment stats");
 
-        const data: Stats = await response.json();
-        setStats(data);
-      } catch (error) {
-        console.error("Error fetching appointment stats:", error);
-      }
-    };
+      const data: Stats = await response.json();
+      setStats(data);
+    } catch (error) {
+      console.error("Error fetching appointment stats:", error);
+    }
+  }, []);
 
+  useEffect(() => {
     fetchStats();
-  }, []);
+  }, [fetchStats]);
+
+  // Refresh when a booking for this doctor is created, rejected or paid
+  useDoctorEvents(fetchStats);
 
   const cards = [
     { title: "Total Appointments", number: stats.total_appointments, color: "bg-blue-500" },
@@ -1,4 +1,5 @@
-import { useEffect, useState } from "react";
+import { useCallback, useEffect, useRef, useState } from "react";
+import { useDoctorEvents } from "./useDoctorEvents";
 import {
   useReactTable,
   getCoreRowModel,
@@ -8,46 +9,74 @@ import {
 import { ColumnDef } from "@tanstack/react-table";
 
 interface Appointment {
+  id: number;
   patient_full_name: string;
   date: string;
   slot_time: string;
   reason_to_visit: string;
 }
 
+const SYNC_URL = "http://localhost:8000/doctor/booking-info/sync/";
+// The sync endpoint only returns changes older than two seconds (SYNC_SETTLE_SECONDS), so wait that long after an event
+const SYNC_SETTLE_MS = 2500;
+
+const toAppointment = (item: any): Appointment => ({
+  id: item.id,
+  patient_full_name: item.patient_info?.full_name || "N/A",
+  date: item.date,
+  slot_time: `${item.start_time.slice(0, 5)} - ${item.end_time.slice(0, 5)}`,
+  reason_to_visit: item.patient_info?.reason_to_visit || "N/A",
+});
+
+// Same order as the booking-info list: newest day first, then by time
+const byDisplayOrder = (a: Appointment, b: Appointment) =>
+  b.date.localeCompare(a.date) || a.slot_time.localeCompare(b.slot_time) || a.id - b.id;
+
 export default function UpcomingAppointments() {
   const [appointments, setAppointments] = useState<Appointment[]>([]);
+  // Local copy of the bookings and the last change applied to it; refreshes fetch only what changed since
+  const bookings = useRef(new Map<number, Appointment>());
+  const cursor = useRef(0);
+  const pending = useRef(Promise.resolve());
 
-  useEffect(() => {
-    const fetchAppointments = async () => {
-      try {
-        const response = await fetch("http://localhost:8000/doctor/booking-info/", {
+  const pullChanges = useCallback(async () => {
+    try {
+      let hasMore = true;
+      while (hasMore) {
+        const response = await fetch(`${SYNC_URL}?since=${cursor.current}`, {
           headers: {
             "Content-Type": "application/json",
             "Authorization": `Bearer ${localStorage.getItem("access_token")}`,
           },
         });
 
-        if (!response.ok) throw new Error("Failed to fetch booking info");
+        if (!response.ok) throw new Error("Failed to sync booking info");
 
         const data = await response.json();
-
-        // Format data for table display
-        const formatted: Appointment[] = data.map((item: any) => ({
-          patient_full_name: item.patient_info.full_name || "N/A",
-          date: item.date,
-          slot_time: `${item.start_time.slice(0, 5)} - ${item.end_time.slice(0, 5)}`,
-          reason_to_visit: item.patient_info?.reason_to_visit || "N/A",
-        }));
-
-        setAppointments(formatted);
-      } catch (error) {
-        console.error("Error fetching booking info:", error);
+        data.changed.forEach((item: any) => bookings.current.set(item.id, toAppointment(item)));
+        data.deleted.forEach((id: number) => bookings.current.delete(id));
+        cursor.current = data.cursor;
+        hasMore = data.has_more;
       }
-    };
 
-    fetchAppointments();
+      setAppointments([...bookings.current.values()].sort(byDisplayOrder));
+    } catch (error) {
+      console.error("Error syncing booking info:", error);
+    }
   }, []);
 
+  // One pull at a time, so each starts from the cursor the previous one reached
+  const sync = useCallback(() => {
+    pending.current = pending.current.then(pullChanges);
+  }, [pullChanges]);
+
+  useEffect(() => {
+    sync();
+  }, [sync]);
+
+  // Apply the changes when a booking for this doctor is created, rejected or paid
+  useDoctorEvents(() => setTimeout(sync, SYNC_SETTLE_MS));
+
   const columns: ColumnDef<Appointment>[] = [
     { header: "Patient", accessorKey: "patient_full_name" },
     { header: "Date", accessorKey: "date" },
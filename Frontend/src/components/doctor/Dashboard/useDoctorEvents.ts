@@ -0,0 +1,85 @@
+import { useEffect, useRef } from "react";
+
+const API = "http://localhost:8000";
+const DOCTOR_EVENT_TYPES = ["booking-created", "booking-rejected", "payment-status-changed"];
+// Tickets are single-use, so a dropped stream is reopened here with a new one instead of by EventSource
+const RECONNECT_MS = 3000;
+// How often to refresh when the backend cannot stream events (it answers 501 when served over WSGI)
+const POLL_MS = 30000;
+
+// One connection per page, shared by every component that listens
+const listeners = new Set<() => void>();
+let source: EventSource | null = null;
+let timer: ReturnType<typeof setTimeout> | undefined;
+// Bumped when the last listener leaves, so a connect still in flight gives up
+let generation = 0;
+
+const notify = () => listeners.forEach((listener) => listener());
+
+const stop = () => {
+  generation += 1;
+  clearTimeout(timer);
+  source?.close();
+  source = null;
+};
+
+const poll = (current: number) => {
+  timer = setTimeout(() => {
+    if (current !== generation) return;
+    notify();
+    poll(current);
+  }, POLL_MS);
+};
+
+const connect = async (reconnecting = false) => {
+  const current = generation;
+  const token = localStorage.getItem("access_token");
+  if (!token) return;
+
+  try {
+    const response = await fetch(`${API}/doctor/events/ticket/`, {
+      method: "POST",
+      headers: { Authorization: `Bearer ${token}` },
+    });
+    if (current !== generation) return;
+    if (response.status === 501) {
+      poll(current);
+      return;
+    }
+    if (!response.ok) throw new Error("Failed to get an events ticket");
+    const { ticket } = await response.json();
+    if (current !== generation) return;
+
+    source = new EventSource(`${API}/doctor/events/?ticket=${encodeURIComponent(ticket)}`);
+    DOCTOR_EVENT_TYPES.forEach((type) => source!.addEventListener(type, notify));
+    // Events published while the stream was down are lost; refresh once it is back
+    if (reconnecting) source.onopen = notify;
+    source.onerror = () => {
+      source?.close();
+      source = null;
+      timer = setTimeout(() => current === generation && connect(true), RECONNECT_MS);
+    };
+  } catch (error) {
+    console.error("Error connecting to doctor events:", error);
+    if (current === generation) {
+      timer = setTimeout(() => current === generation && connect(true), RECONNECT_MS);
+    }
+  }
+};
+
+// Calls onEvent whenever the backend pushes a booking change for the logged-in doctor
+export const useDoctorEvents = (onEvent: () => void) => {
+  const handler = useRef(onEvent);
+  handler.current = onEvent;
+
+  useEffect(() => {
+    const listener = () => handler.current();
+    listeners.add(listener);
+    if (listeners.size === 1) connect();
+
+    return () => {
+      listeners.delete(listener);
+      if (listeners.size === 0) stop();
+    };
+  }, []);
+};